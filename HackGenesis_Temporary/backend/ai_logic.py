@@ -1,87 +1,112 @@
 import random
 import math
+from .utils.keyword_scorer import KeywordScorer, TextBatch, load_lexicon
+
+# Keyword lexicons: keyword -> points. Prepared once at import (utils/keyword_scorer),
+# overridable through KEYWORD_LEXICON_FILE.
+RISK_LEXICON = load_lexicon("risk", {
+    # Priority 1: Life-threatening / Disaster (60-100 pts)
+    "tsunami": 40, "cyclone": 40, "flood": 40, "drowning": 40, "sos": 40, "emergency": 40, "earthquake": 40,
+    # Priority 2: Health / Significant Threat (30-60 pts)
+    "storm": 20, "oil spill": 20, "pollution": 20, "hazard": 20, "blocked": 20, "bridge collapse": 20,
+    # Priority 3: Environmental / Minor Anomaly (10-30 pts)
+    "algal bloom": 10, "waste": 10, "trash": 10, "erosion": 10, "beach": 10, "tide": 10,
+})
+# Location context words; any of them adds SHORE_BONUS once
+SHORE_WORDS = load_lexicon("shore", {"beach": 1, "shore": 1, "shoreline": 1, "seashore": 1, "ashore": 1})
+SHORE_BONUS = 5
+
+# Base prioritization based on 'needs' category (strongest category wins)
+AID_NEEDS_LEXICON = load_lexicon("aid_needs", {
+    "medical": 50, "rescue": 50, "food": 30, "water": 30, "shelter": 20,
+})
+# Keyword analysis (Accumulative)
+AID_KEYWORD_LEXICON = load_lexicon("aid_keywords", {
+    # High Priority Keywords (Critical Life Threat)
+    "rescue": 15, "trapped": 15, "bleeding": 15, "medical": 15, "drowning": 15, "ambulance": 15,
+    "stuck": 15, "baby": 15, "elderly": 15, "pregnant": 15, "critical": 15,
+    # Medium Priority Keywords (Essential/Health)
+    "food": 10, "water": 10, "shelter": 10, "medicine": 10, "fever": 10, "electricity": 10,
+    "supply": 10, "hungry": 10, "sick": 10,
+})
+
+_risk_scorer = KeywordScorer(RISK_LEXICON)
+_shore_scorer = KeywordScorer(SHORE_WORDS)
+_needs_scorer = KeywordScorer(AID_NEEDS_LEXICON)
+_aid_scorer = KeywordScorer(AID_KEYWORD_LEXICON)
 
 def calculate_risk_score(text: str, location: str) -> int:
     """
     Advanced heuristic-based model to assign a risk score.
     Higher scores mean higher priority for authorities.
     """
-    text_lower = text.lower()
-    score = 0
-    
-    # Priority 1: Life-threatening / Disaster (60-100 pts)
-    p1_keywords = ["tsunami", "cyclone", "flood", "drowning", "sos", "emergency", "earthquake"]
-    for kw in p1_keywords:
-        if kw in text_lower:
-            score += 40
-            
-    # Priority 2: Health / Significant Threat (30-60 pts)
-    p2_keywords = ["storm", "oil spill", "pollution", "hazard", "blocked", "bridge collapse"]
-    for kw in p2_keywords:
-        if kw in text_lower:
-            score += 20
-            
-    # Priority 3: Environmental / Minor Anomaly (10-30 pts)
-    p3_keywords = ["algal bloom", "waste", "trash", "erosion", "beach", "tide"]
-    for kw in p3_keywords:
-        if kw in text_lower:
-            score += 10
-            
+    score = _risk_scorer.score(text)
+
     # Location context bonus (e.g., if it's a known high-risk shoreline)
     # Simple mock: if 'beach' is mentioned with a threat, it's more relevant
-    if "beach" in text_lower or "shore" in text_lower:
-        score += 5
+    if _shore_scorer.any(text):
+        score += SHORE_BONUS
 
     return min(score, 100)
 
+def calculate_risk_scores(texts) -> list[int]:
+    """
+    Batch version of calculate_risk_score (locations are not used by the model yet).
+    """
+    batch = TextBatch(texts)
+    scores = _risk_scorer.score_many(batch)
+    shore = _shore_scorer.any_many(batch)
+    return [min(score + (SHORE_BONUS if near else 0), 100) for score, near in zip(scores, shore)]
+
+def _aid_label(score):
+    # Determine Label based on Score
+    if score >= 70:
+        return "High"
+    elif score >= 40:
+        return "Medium"
+    else:
+        return "Low"
+
 def calculate_aid_priority(needs: str, description: str) -> tuple[str, int]:
     """
     Determines urgency level and validation score for humanitarian aid.
     Returns: (Urgency_Label, Score_0_100)
     """
-    text_lower = (needs + " " + description).lower()
-    score = 0
-    
-    # Base prioritization based on 'needs' category
-    if "medical" in needs.lower() or "rescue" in needs.lower():
-        score += 50
-    elif "food" in needs.lower() or "water" in needs.lower():
-        score += 30
-    elif "shelter" in needs.lower():
-        score += 20
-        
-    # Keyword analysis (Accumulative)
-    # High Priority Keywords (Critical Life Threat)
-    high_keywords = ["rescue", "trapped", "bleeding", "medical", "drowning", "ambulance", "stuck", "baby", "elderly", "pregnant", "critical"]
-    for kw in high_keywords:
-        if kw in text_lower:
-            score += 15
-            
-    # Medium Priority Keywords (Essential/Health)
-    med_keywords = ["food", "water", "shelter", "medicine", "fever", "electricity", "supply", "hungry", "sick"]
-    for kw in med_keywords:
-        if kw in text_lower:
-            score += 10
-            
+    needs = needs or ""
+    description = description or ""
+    score = _needs_scorer.max_weight(needs)
+    score += _aid_scorer.score(needs + " " + description)
+
     # Length/Detail bonus (Real requests often explain more, but spam can be short)
-    if len(description) > 20: 
+    if len(description) > 20:
         score += 5
-        
+
     # Cap score at 100
     score = min(score, 100)
-    
-    # Determine Label based on Score
-    if score >= 70:
-        return "High", score
-    elif score >= 40:
-        return "Medium", score
-    else:
-        return "Low", score
+    return _aid_label(score), score
+
+def calculate_aid_priorities(requests) -> list[tuple[str, int]]:
+    """
+    Batch version of calculate_aid_priority over (needs, description) pairs.
+    """
+    needs = [n or "" for n, _ in requests]
+    descriptions = [d or "" for _, d in requests]
+    # needs is a short category string ("Food", "Medical"): score each distinct one once
+    distinct = list(dict.fromkeys(needs))
+    base_by_needs = dict(zip(distinct, _needs_scorer.max_weight_many(distinct)))
+    base = [base_by_needs[n] for n in needs]
+    keywords = _aid_scorer.score_many([n + " " + d for n, d in zip(needs, descriptions)])
+    results = []
+    for b, k, d in zip(base, keywords, descriptions):
+        score = min(b + k + (5 if len(d) > 20 else 0), 100)
+        results.append((_aid_label(score), score))
+    return results
 
-def generate_heatmap_data():
+def generate_heatmap_data(rng=random):
     """
     Generates a global dataset approximating world coastlines.
     Simulates global satellite monitoring data.
+    Pass a seeded random.Random for a reproducible set (services/heatmap does).
     """
     points = []
     
@@ -92,11 +117,11 @@ def generate_heatmap_data():
             lon = start_lon * (1 - t) + end_lon * t
             
             # Jitter to make it look less like a straight line
-            lat += random.uniform(-jitter, jitter)
-            lon += random.uniform(-jitter, jitter)
+            lat += rng.uniform(-jitter, jitter)
+            lon += rng.uniform(-jitter, jitter)
             
             # Intensity fluctuation
-            intensity = max(0.1, min(1.0, intensity_base + random.uniform(-0.3, 0.3)))
+            intensity = max(0.1, min(1.0, intensity_base + rng.uniform(-0.3, 0.3)))
             points.append([lat, lon, intensity])
             
     # Major Global Coastlines Approximations
@@ -1,13 +1,56 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
-from .routers import auth, posts, alerts, authority, trends
-from .database import engine, Base
+from .routers import auth, posts, alerts, authority, trends, images, search
+from .database import async_engine
+from .migrations import migrate, start_backfills
+from .services.http_client import close_http_client
+from .services.ingestion import start_ingestion, stop_ingestion
+from .services.image_pipeline import shutdown_image_pool
+from .services.heatmap import start_heatmap_refresh, stop_heatmap_refresh
+from .services.write_queue import write_queue
+from .services.like_counter import start_like_flush, stop_like_flush
+from .services.trend_store import start_trend_collector, stop_trend_collector
+from .services.retention import start_retention, stop_retention
+from .services.alert_push import start_alert_listener, stop_alert_listener
 
-# Create tables
-Base.metadata.create_all(bind=engine)
+# Bring the schema up to date (a single version query when it already is);
+# row backfills run in the background once the app is up
+migrate(backfill=False)
 
-app = FastAPI(title="Coastal Threat Alert System API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    start_backfills()
+    # Background feed ingestion keeps the alerts table current
+    start_ingestion()
+    # Hourly wave/wind/quake readings for /trends/data
+    start_trend_collector()
+    # Heatmap density layer is rebuilt on a schedule, not per request
+    start_heatmap_refresh()
+    # Likes are counted in memory and flushed on an interval
+    start_like_flush()
+    # Alert expiry and archiving of old resolved reports
+    start_retention()
+    # PostgreSQL: alerts committed by any worker reach this worker's push subscribers
+    start_alert_listener()
+    yield
+    await stop_alert_listener()
+    await stop_retention()
+    await stop_like_flush()
+    await stop_heatmap_refresh()
+    await stop_ingestion()
+    await stop_trend_collector()
+    # Flush queued small writes before the pool goes away
+    await asyncio.to_thread(write_queue.stop)
+    shutdown_image_pool()
+    # Drain the shared upstream connection pool
+    await close_http_client()
+    # Async DB connections belong to this event loop
+    await async_engine.dispose()
+
+app = FastAPI(title="Coastal Threat Alert System API", lifespan=lifespan)
 
 # CORS setup
 app.add_middleware(
@@ -16,6 +59,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
 # Include routers
@@ -24,6 +68,8 @@ app.include_router(posts.router)
 app.include_router(alerts.router)
 app.include_router(authority.router)
 app.include_router(trends.router)
+app.include_router(images.router)
+app.include_router(search.router)
 
 # Mount static files (Frontend)
 # Serve HTML files from parent directory
@@ -0,0 +1,270 @@
+"""
+Versioned schema migrations.
+
+Each migration has an `upgrade(conn)` that runs in one transaction together
+with its schema_version row, so a failed migration leaves nothing behind.
+Migrations that need to rewrite existing rows can add a `backfill(engine)`:
+it runs afterwards in short chunked transactions (the app keeps serving
+meanwhile) and is resumed on the next start if interrupted.
+
+Add new migrations to the end of MIGRATIONS; never edit one that has shipped.
+Upgrades must be idempotent (use the helpers below): a database may already
+have part of a change from the old fix_* scripts, and tables created by the
+baseline migration already have the current model columns.
+Run `python migrate.py` to apply everything, including backfills, by hand.
+"""
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from sqlalchemy import Boolean, Column, DateTime, Integer, MetaData, String, Table, func, inspect, select, text
+from .database import Base, engine as default_engine
+from .models import ARCHIVE_TABLES, alert_expiry, get_ist_time
+from .services.search import create_search_indexes
+from .utils.geo import grid_cell
+
+# Kept out of Base.metadata so create_all never touches it
+schema_meta = MetaData()
+schema_version = Table(
+    "schema_version", schema_meta,
+    Column("version", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("applied_at", DateTime, default=get_ist_time),
+    # False while the migration's chunked backfill is still outstanding
+    Column("backfilled", Boolean, nullable=False, default=True),
+)
+
+# PostgreSQL advisory lock key: one migrating process at a time
+MIGRATION_LOCK = 26020
+# Rows per backfill transaction
+BACKFILL_CHUNK = 1000
+
+class Migration:
+    def __init__(self, version, name, upgrade, backfill=None):
+        self.version = version
+        self.name = name
+        self.upgrade = upgrade
+        self.backfill = backfill
+
+# --- Helpers for upgrade functions ---
+
+def add_column(conn, table, name, ddl):
+    """ALTER TABLE ... ADD COLUMN unless it's already there (older databases differ)."""
+    if name not in {c["name"] for c in inspect(conn).get_columns(table)}:
+        print(f"Migrations: adding {table}.{name}")
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {ddl}"))
+
+def create_tables(conn, *tables):
+    """Creates the given model tables and their indexes if missing."""
+    Base.metadata.create_all(conn, tables=[Base.metadata.tables[t] for t in tables], checkfirst=True)
+
+def create_indexes(conn, *tables):
+    """
+    Creates any index declared on the models for these tables that the
+    database lacks. Indexes on columns that don't exist yet are left to
+    the later migration that adds the column.
+    """
+    for name in tables:
+        columns = {c["name"] for c in inspect(conn).get_columns(name)}
+        for index in Base.metadata.tables[name].indexes:
+            if all(c.name in columns for c in index.columns):
+                index.create(conn, checkfirst=True)
+
+def backfill_in_chunks(engine, select_sql, update_sql, convert, chunk=BACKFILL_CHUNK):
+    """
+    Keyset walk: `select_sql` must take :after and :limit and return rows
+    ordered by their first column (the key); `convert(row)` gives the
+    parameters for `update_sql`, or None to leave the row alone.
+    Each chunk is its own transaction.
+    """
+    after, total = None, 0
+    while True:
+        with engine.begin() as conn:
+            rows = conn.execute(text(select_sql), {"after": after, "limit": chunk}).all()
+            if not rows:
+                return total
+            params = [p for p in map(convert, rows) if p is not None]
+            if params:
+                conn.execute(text(update_sql), params)
+        total += len(params)
+        after = rows[-1][0]
+
+# --- Migrations ---
+
+BASELINE_TABLES = ("users", "posts", "comments", "alerts", "aid_requests", "change_log")
+
+def _baseline(conn):
+    """Tables as created by the original create_all (missing ones only)."""
+    create_tables(conn, *BASELINE_TABLES)
+
+def _legacy_columns(conn):
+    """
+    Everything the old fix_db / fix_schema_* / add_* scripts did, for
+    databases created before those columns existed.
+    """
+    add_column(conn, "alerts", "source", "VARCHAR DEFAULT 'Unknown'")
+    add_column(conn, "alerts", "external_id", "VARCHAR")
+    add_column(conn, "alerts", "grid_cell", "INTEGER")
+    add_column(conn, "posts", "status", "VARCHAR DEFAULT 'Open'")
+    for col in ("image_hash", "thumb_hash", "medium_hash"):
+        add_column(conn, "posts", col, "VARCHAR")
+    for col in ("lat", "lon"):
+        add_column(conn, "posts", col, "FLOAT")
+    for col, ddl in {
+        "description": "VARCHAR DEFAULT ''",
+        "needs": "VARCHAR DEFAULT 'General'",
+        "urgency": "VARCHAR DEFAULT 'Medium'",
+        "urgency_score": "INTEGER DEFAULT 0",
+        "status": "VARCHAR DEFAULT 'Pending'",
+        "contact": "VARCHAR DEFAULT ''",
+        "location": "VARCHAR DEFAULT 'Unknown'",
+    }.items():
+        add_column(conn, "aid_requests", col, ddl)
+    # Change tracking for dashboard delta polling
+    for table in ("posts", "aid_requests"):
+        add_column(conn, table, "updated_at", "TIMESTAMP")
+        add_column(conn, table, "version", "INTEGER NOT NULL DEFAULT 1")
+    create_indexes(conn, *BASELINE_TABLES)
+
+def _backfill_alert_grid_cells(engine):
+    return backfill_in_chunks(
+        engine,
+        "SELECT id, lat, lon FROM alerts WHERE grid_cell IS NULL AND lat IS NOT NULL AND lon IS NOT NULL "
+        "AND (:after IS NULL OR id > :after) ORDER BY id LIMIT :limit",
+        "UPDATE alerts SET grid_cell = :cell WHERE id = :id",
+        lambda row: {"id": row[0], "cell": grid_cell(row[1], row[2])},
+    )
+
+def _trend_tables(conn):
+    create_tables(conn, "trend_hourly", "trend_daily")
+
+def _expiry_and_archives(conn):
+    add_column(conn, "alerts", "expires_at", "TIMESTAMP")
+    create_indexes(conn, "alerts")
+    create_tables(conn, *(archive.name for archive in ARCHIVE_TABLES.values()))
+
+def _backfill_alert_expiry(engine):
+    def convert(row):
+        raised = row[2]
+        if isinstance(raised, str):
+            # Raw SQLite rows come back as text
+            raised = datetime.fromisoformat(raised)
+        return {"id": row[0], "expires_at": alert_expiry(row[1], raised or get_ist_time())}
+
+    return backfill_in_chunks(
+        engine,
+        "SELECT id, alert_type, created_at FROM alerts WHERE expires_at IS NULL "
+        "AND (:after IS NULL OR id > :after) ORDER BY id LIMIT :limit",
+        "UPDATE alerts SET expires_at = :expires_at WHERE id = :id",
+        convert,
+    )
+
+MIGRATIONS = [
+    Migration(1, "baseline tables", _baseline),
+    Migration(2, "columns and indexes from the fix_* scripts", _legacy_columns, _backfill_alert_grid_cells),
+    Migration(3, "trend time-series tables", _trend_tables),
+    Migration(4, "alert expiry and archive tables", _expiry_and_archives, _backfill_alert_expiry),
+    # Indexes existing rows inside the migration: the sync triggers must
+    # never see a row the index doesn't have yet
+    Migration(5, "full-text search indexes", create_search_indexes),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+# --- Runner ---
+
+@contextmanager
+def _migration_transaction(engine):
+    with engine.connect() as conn:
+        if conn.dialect.name == "sqlite":
+            # pysqlite runs DDL outside any transaction unless one is opened
+            # explicitly; IMMEDIATE also takes the write lock up front so two
+            # processes starting together migrate one after the other
+            conn.execution_options(isolation_level="AUTOCOMMIT")
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.exec_driver_sql("ROLLBACK")
+                raise
+            conn.exec_driver_sql("COMMIT")
+        else:
+            with conn.begin():
+                if conn.dialect.name == "postgresql":
+                    conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": MIGRATION_LOCK})
+                yield conn
+
+def schema_state(engine=default_engine):
+    """(version, backfills_done) in one query, or (0, False) before the first migration."""
+    try:
+        with engine.connect() as conn:
+            version, pending = conn.execute(select(
+                func.max(schema_version.c.version),
+                func.count().filter(schema_version.c.backfilled == False),
+            )).one()
+    except Exception:
+        return 0, False
+    return version or 0, not pending
+
+def _applied(conn):
+    return {row.version for row in conn.execute(select(schema_version.c.version))}
+
+def apply_migrations(engine=default_engine):
+    """Applies pending schema migrations in order, each in its own transaction."""
+    with _migration_transaction(engine) as conn:
+        schema_meta.create_all(conn, checkfirst=True)
+
+    for migration in MIGRATIONS:
+        with _migration_transaction(engine) as conn:
+            # Re-checked under the lock: another process may have just done it
+            if migration.version in _applied(conn):
+                continue
+            migration.upgrade(conn)
+            conn.execute(schema_version.insert().values(
+                version=migration.version, name=migration.name, backfilled=migration.backfill is None
+            ))
+        print(f"Migrations: applied {migration.version} ({migration.name})")
+
+def run_backfills(engine=default_engine):
+    """Runs every outstanding backfill to completion (chunked; safe to interrupt)."""
+    with engine.connect() as conn:
+        pending = set(conn.execute(
+            select(schema_version.c.version).where(schema_version.c.backfilled == False)
+        ).scalars())
+    for migration in MIGRATIONS:
+        if migration.version not in pending:
+            continue
+        rows = migration.backfill(engine)
+        with engine.begin() as conn:
+            conn.execute(schema_version.update().where(
+                schema_version.c.version == migration.version
+            ).values(backfilled=True))
+        print(f"Migrations: backfill for {migration.version} ({migration.name}) done, {rows} rows")
+
+def migrate(engine=default_engine, backfill=True):
+    """
+    Brings the schema up to LATEST_VERSION. Costs a single query when it
+    already is, so it's cheap to call on every start.
+    """
+    version, backfilled = schema_state(engine)
+    if version == LATEST_VERSION and backfilled:
+        return
+    if version > LATEST_VERSION:
+        raise RuntimeError(f"Database schema is at version {version}, newer than this code ({LATEST_VERSION})")
+    if version < LATEST_VERSION:
+        apply_migrations(engine)
+    if backfill:
+        run_backfills(engine)
+
+def _backfill_worker(engine):
+    try:
+        run_backfills(engine)
+    except Exception as e:
+        print(f"Migrations: backfill failed, will resume on next start: {e!r}")
+
+def start_backfills(engine=default_engine):
+    """Runs outstanding backfills on a background thread so startup isn't held up."""
+    if schema_state(engine)[1]:
+        return None
+    thread = threading.Thread(target=_backfill_worker, args=(engine,), name="schema-backfill", daemon=True)
+    thread.start()
+    return thread
@@ -1,7 +1,8 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Float, Boolean
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Text, Date, DateTime, ForeignKey, Float, Boolean, Index, Table, event, text
+from sqlalchemy.orm import relationship, deferred, object_session
 from datetime import datetime, timedelta
 from .database import Base
+from .utils.geo import grid_cell
 
 def get_ist_time():
     # Helper to get current time in IST (Naive for SQLite storage ease)
@@ -26,7 +27,16 @@ class Post(Base):
     location = Column(String)
     caption = Column(String)
     description = Column(Text)
-    image_data = Column(Text) # Storing base64 string for simplicity in hackathon
+    # Reporter's coordinates when the browser shared them (density heatmap)
+    lat = Column(Float, nullable=True)
+    lon = Column(Float, nullable=True)
+    # Legacy inline base64; new uploads go to the blob store. Deferred so
+    # loading a post never drags the image text along.
+    image_data = deferred(Column(Text))
+    image_hash = Column(String, index=True) # sha256 of the image in services/blob_store
+    # Resized variants (services/image_pipeline), filled in after upload
+    thumb_hash = Column(String)
+    medium_hash = Column(String)
     
     created_at = Column(DateTime, default=get_ist_time)
     user_id = Column(Integer, ForeignKey("users.id"))
@@ -37,17 +47,29 @@ class Post(Base):
     # Community interaction
     likes = Column(Integer, default=0)
     status = Column(String, default="Open") # Open, Resolved, Dismissed
+
+    # Change tracking for dashboard delta polling (see ChangeLog)
+    updated_at = Column(DateTime, default=get_ist_time, onupdate=get_ist_time)
+    version = Column(Integer, default=1, nullable=False)
     
     owner = relationship("User", back_populates="posts")
     comments = relationship("Comment", back_populates="post")
 
+    __table_args__ = (
+        # Feed keyset pagination (ORDER BY created_at DESC, id DESC)
+        Index("ix_posts_created_at_id", "created_at", "id"),
+        Index("ix_posts_user_id_created_at", "user_id", "created_at"),
+        # Authority dashboard: filter by status, order by risk
+        Index("ix_posts_status_risk_score", "status", "risk_score"),
+    )
+
 class Comment(Base):
     __tablename__ = "comments"
     
     id = Column(Integer, primary_key=True, index=True)
     text = Column(String)
     created_at = Column(DateTime, default=get_ist_time)
-    post_id = Column(String, ForeignKey("posts.id"))
+    post_id = Column(String, ForeignKey("posts.id"), index=True)
     
     post = relationship("Post", back_populates="comments")
 
@@ -55,10 +77,14 @@ class Alert(Base):
     __tablename__ = "alerts"
 
     id = Column(Integer, primary_key=True, index=True)
+    # Stable upstream id for ingested alerts (e.g. "usgs:us7000abcd"), NULL for local ones
+    external_id = Column(String, unique=True, index=True, nullable=True)
     location = Column(String)
     # Geo-coordinates for distance sorting
     lat = Column(Float)
     lon = Column(Float)
+    # Coarse spatial bucket (see utils/geo.grid_cell), kept in sync with lat/lon
+    grid_cell = Column(Integer, index=True)
     
     title = Column(String)
     message = Column(String)
@@ -66,6 +92,35 @@ class Alert(Base):
     alert_type = Column(String) # Cyclone, Algal Bloom, etc.
     source = Column(String, default="Unknown") # e.g. Satellite, IoT
     created_at = Column(DateTime, default=get_ist_time)
+    # End of the validity window (see ALERT_VALIDITY); expired alerts are
+    # hidden from /alerts and moved to alerts_archive by services/retention
+    expires_at = Column(DateTime, index=True)
+
+    __table_args__ = (
+        Index("ix_alerts_lat_lon", "lat", "lon"),
+    )
+
+# How long an alert stays active after it was raised, by alert_type
+ALERT_VALIDITY = {
+    "Earthquake": timedelta(hours=24),
+    "Tsunami": timedelta(hours=48),
+    "Cyclone": timedelta(hours=6),
+    "Weather": timedelta(hours=6),
+}
+DEFAULT_ALERT_VALIDITY = timedelta(hours=24)
+
+def alert_expiry(alert_type, raised_at):
+    return raised_at + ALERT_VALIDITY.get(alert_type, DEFAULT_ALERT_VALIDITY)
+
+@event.listens_for(Alert, "before_insert")
+@event.listens_for(Alert, "before_update")
+def _sync_alert_grid_cell(mapper, connection, target):
+    target.grid_cell = grid_cell(target.lat, target.lon)
+
+@event.listens_for(Alert, "before_insert")
+def _default_alert_expiry(mapper, connection, target):
+    if target.expires_at is None:
+        target.expires_at = alert_expiry(target.alert_type, target.created_at or get_ist_time())
 
 class AidRequest(Base):
     __tablename__ = "aid_requests"
@@ -83,4 +138,112 @@ class AidRequest(Base):
     contact = Column(String, default="")
     location = Column(String, default="Unknown")
 
+    # Change tracking for dashboard delta polling (see ChangeLog)
+    updated_at = Column(DateTime, default=get_ist_time, onupdate=get_ist_time)
+    version = Column(Integer, default=1, nullable=False)
+
     user = relationship("User", back_populates="aid_requests")
+
+    __table_args__ = (
+        # Authority dashboard: filter by status, order by urgency then recency
+        Index("ix_aid_requests_status_urgency_ts", "status", "urgency_score", "timestamp"),
+    )
+
+class TrendHourly(Base):
+    """
+    Hourly environmental readings per monitoring station (services/stations),
+    filled by the trends collector (services/trend_store). Times are naive IST.
+    """
+    __tablename__ = "trend_hourly"
+
+    station = Column(String, primary_key=True) # stations.MONITORED_STATIONS key
+    hour = Column(DateTime, primary_key=True)
+    wave_height = Column(Float) # m
+    wind_speed = Column(Float) # km/h
+    quake_mag = Column(Float) # strongest quake near the station that hour, 0 = none
+
+class TrendDaily(Base):
+    """Daily maxima rolled up from trend_hourly (what /trends/data reads)."""
+    __tablename__ = "trend_daily"
+
+    station = Column(String, primary_key=True)
+    day = Column(Date, primary_key=True)
+    wave_height_max = Column(Float)
+    wind_speed_max = Column(Float)
+    quake_mag_max = Column(Float)
+
+def _archive_table(table):
+    """
+    `<table>_archive`: the same columns plus archived_at, but no foreign
+    keys, unique constraints or secondary indexes, so archived rows never
+    get in the way of the hot table (e.g. an external_id showing up again).
+    A column added to the hot table needs adding here too (migration).
+    """
+    return Table(
+        f"{table.name}_archive", Base.metadata,
+        *(Column(c.name, c.type, primary_key=c.primary_key, autoincrement=False) for c in table.columns),
+        Column("archived_at", DateTime, default=get_ist_time, index=True),
+    )
+
+# Cold storage for expired alerts and long-resolved reports (services/retention)
+ARCHIVE_TABLES = {
+    table.name: _archive_table(table)
+    for table in (Alert.__table__, Post.__table__, Comment.__table__, AidRequest.__table__)
+}
+
+class ChangeLog(Base):
+    """
+    Append-only log of dashboard-visible changes. `seq` is the global,
+    monotonically increasing change sequence clients poll with ?since=.
+    """
+    __tablename__ = "change_log"
+
+    seq = Column(Integer, primary_key=True, autoincrement=True)
+    entity = Column(String, nullable=False) # "post" | "aid_request"
+    entity_id = Column(String, nullable=False)
+    op = Column(String, nullable=False) # insert | update | delete
+    changed_at = Column(DateTime, default=get_ist_time)
+
+# Entity names used in change_log
+TRACKED_ENTITIES = {Post: "post", AidRequest: "aid_request"}
+# PostgreSQL advisory lock key serializing change_log writers (see record_change)
+CHANGE_LOG_LOCK = 26026
+
+def lock_change_log(connection):
+    """
+    PostgreSQL: sequence values are handed out before commit, so with
+    concurrent writers a lower seq could become visible after a poller has
+    moved past it. Holding this lock until commit keeps seq order = commit
+    order. (SQLite has a single writer anyway.)
+    """
+    if connection.dialect.name == "postgresql":
+        connection.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": CHANGE_LOG_LOCK})
+
+def record_change(connection, entity, entity_id, op):
+    """
+    Appends to change_log on the given connection (i.e. inside the caller's
+    transaction). Bulk query.update() bypasses mapper events, so callers
+    doing those must record the change themselves.
+    """
+    lock_change_log(connection)
+    connection.execute(ChangeLog.__table__.insert().values(
+        entity=entity, entity_id=str(entity_id), op=op, changed_at=get_ist_time()
+    ))
+
+def _bump_version(mapper, connection, target):
+    session = object_session(target)
+    if session is not None and not session.is_modified(target, include_collections=False):
+        return
+    target.version = (target.version or 0) + 1
+    record_change(connection, TRACKED_ENTITIES[type(target)], target.id, "update")
+
+def _log_insert(mapper, connection, target):
+    record_change(connection, TRACKED_ENTITIES[type(target)], target.id, "insert")
+
+def _log_delete(mapper, connection, target):
+    record_change(connection, TRACKED_ENTITIES[type(target)], target.id, "delete")
+
+for _model in TRACKED_ENTITIES:
+    event.listen(_model, "before_update", _bump_version)
+    event.listen(_model, "after_insert", _log_insert)
+    event.listen(_model, "after_delete", _log_delete)
@@ -1,105 +1,190 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from ..database import get_db
-from ..models import Alert
-import datetime
+import asyncio
+import os
+from fastapi import APIRouter, Depends, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..database import get_async_db
 
 # Import the ranking service
 from ..services.alert_ranking import rank_alerts
+from ..services.alert_index import active_alerts_select, nearby_alerts_select
+from ..services.ingestion import ingestion_stats
+from ..services.feed_guard import FEEDS, feed_status
+from ..services.retention import expiry_wheel, retention_stats
+from ..services.alert_push import alert_broker, CLOSE
+from ..services.heatmap import get_heatmap, BIN_MEDIA_TYPE, HEATMAP_CACHE_CONTROL
+from ..utils.http_cache import cached_response
 
 router = APIRouter(tags=["Alerts"])
 
-import random # Add random import
+# Alerts returned per request (the best `limit` after ranking)
+ALERTS_TOP_K = 50
+MAX_ALERTS_TOP_K = 200
 
 @router.get("/alerts")
-def get_alerts(lat: float = None, lon: float = None, radius_km: float = 50, db: Session = Depends(get_db)):
+async def get_alerts(
+    lat: float = None,
+    lon: float = None,
+    radius_km: float = 50,
+    limit: int = Query(ALERTS_TOP_K, ge=1, le=MAX_ALERTS_TOP_K),
+    db: AsyncSession = Depends(get_async_db)
+):
     """
-    Get active alerts.
-    - If lat/lon provided: Fetches LIVE data from external APIs (Weather, Earthquakes).
-    - If not: Returns general stored alerts.
+    Get active alerts, best first.
+    - Live feeds (Weather, Earthquakes) are ingested in the background
+      (services/ingestion), so this only reads the local indexed store.
+    - If lat/lon provided: alerts within radius_km.
+    - If not: all active alerts (ranked without the proximity term).
+    Expired alerts (past expires_at) are never returned.
+    Everything is ranked by services/alert_ranking's priority score,
+    near-duplicate events from different sources are merged, and only the
+    top `limit` are returned.
     """
-    
-    response = []
-    
-    # 1. LIVE DATA FETCH (Priority)
-    if lat is not None and lon is not None:
+    return await _stored_alerts(db, lat, lon, radius_km, limit)
+
+@router.get("/alerts/ingestion-stats")
+def get_ingestion_stats():
+    return ingestion_stats
+
+@router.get("/alerts/retention-stats")
+def get_retention_stats():
+    return {"timers": len(expiry_wheel), **retention_stats}
+
+@router.get("/alerts/feed-status")
+def get_feed_status():
+    """Circuit breaker state and data age per upstream provider."""
+    return feed_status()
+
+# external_id prefix -> feed it was ingested from
+FEED_BY_PREFIX = {"usgs": "usgs", "openmeteo": "open-meteo"}
+
+def _is_stale(alert):
+    """True for an ingested alert whose provider hasn't answered recently (we can't vouch for it)."""
+    if not alert.external_id:
+        return False
+    feed = FEED_BY_PREFIX.get(alert.external_id.split(":", 1)[0])
+    return feed is not None and FEEDS[feed].is_stale()
+
+# SSE comment sent when idle so proxies don't drop the connection (seconds)
+SSE_KEEPALIVE = float(os.environ.get("ALERT_PUSH_KEEPALIVE", "15"))
+# Subscriptions wider than this are clamped
+MAX_PUSH_RADIUS_KM = 2000
+
+@router.get("/alerts/push-stats")
+def get_push_stats():
+    return {"subscribers": len(alert_broker), **alert_broker.stats}
+
+@router.get("/alerts/stream")
+async def stream_alerts(
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    radius_km: float = Query(50, gt=0, le=MAX_PUSH_RADIUS_KM)
+):
+    """
+    Server-Sent Events: one `data:` line per new/updated alert within radius_km.
+    Fetch GET /alerts once for the current state, then listen here.
+    """
+    sub = alert_broker.subscribe(lat, lon, radius_km)
+
+    async def events():
         try:
-            from ..services.live_data import get_real_time_alerts
-            live_alerts = get_real_time_alerts(lat, lon)
-            
-            # Define IST timezone
-            IST = datetime.timezone(datetime.timedelta(hours=5, minutes=30))
-
-            # Convert to response format
-            for a in live_alerts:
-                response.append({
-                    "id": random.randint(1000, 9999), # Temp ID for frontend
-                    "location": "Nearby Region",
-                    "lat": a.get("lat", lat), 
-                    "lon": a.get("lon", lon),
-                    "title": a["title"],
-                    "message": a["message"],
-                    "severity": a["severity"],
-                    "alert_type": a["type"],
-                    "source": a["source"],
-                    "created_at": datetime.datetime.now(IST),
-                    "distance_km": 0, # Calculated client side or roughly here
-                    "cpi": 50, # dynamic calc needed ideally
-                    "priority_score": 100 if a["severity"] == "High" else 50
-                })
-        except Exception as e:
-            print(f"Live fetch failed: {e}")
-
-    # 2. DATABASE ALERTS (Community Reports & Persistence)
-    # We still want community reports from the DB
-    db_alerts = db.query(Alert).all()
-    
+            yield ": subscribed\n\n"
+            while True:
+                try:
+                    message = await asyncio.wait_for(sub.queue.get(), SSE_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if message is CLOSE:
+                    # Too slow to keep up; the client reconnects and re-syncs
+                    yield "event: close\ndata: {}\n\n"
+                    break
+                yield f"data: {message}\n\n"
+        finally:
+            alert_broker.unsubscribe(sub)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.websocket("/ws/alerts")
+async def alerts_socket(
+    websocket: WebSocket,
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    radius_km: float = Query(50, gt=0, le=MAX_PUSH_RADIUS_KM)
+):
+    """
+    Same feed as /alerts/stream over a WebSocket (one JSON text frame per alert).
+    """
+    await websocket.accept()
+    sub = alert_broker.subscribe(lat, lon, radius_km)
+
+    async def pump():
+        while True:
+            message = await sub.queue.get()
+            if message is CLOSE:
+                # 1013 = try again later
+                await websocket.close(code=1013)
+                return
+            await websocket.send_text(message)
+
+    sender = asyncio.create_task(pump())
+    try:
+        # Client messages are ignored; this just notices the disconnect
+        while True:
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        sender.cancel()
+        alert_broker.unsubscribe(sub)
+
+async def _stored_alerts(db: AsyncSession, lat, lon, radius_km, limit):
     if lat is not None and lon is not None:
-        ranked_db = rank_alerts(db_alerts, lat, lon)
-        for r in ranked_db:
-            # Add DB alerts to the list
-             response.append({
-                "id": r["alert"].id,
-                "location": r["alert"].location,
-                "lat": r["alert"].lat,
-                "lon": r["alert"].lon,
-                "title": r["alert"].title,
-                "message": r["alert"].message,
-                "severity": r["alert"].severity,
-                "alert_type": r["alert"].alert_type,
-                "source": r["alert"].source,
-                "created_at": r["alert"].created_at,
-                "distance_km": r["distance_km"],
-                "cpi": r["cpi"],
-                "priority_score": r["priority_score"]
-            })
+        # Spatial prefilter: only rows in the grid cells / bbox around the user
+        db_alerts = (await db.scalars(nearby_alerts_select(lat, lon, radius_km))).all()
     else:
         # Fallback if no location
-        for a in db_alerts:
-             response.append({
-                "id": a.id,
-                "location": a.location,
-                "lat": a.lat,
-                "lon": a.lon,
-                "title": a.title,
-                "message": a.message,
-                "severity": a.severity,
-                "alert_type": a.alert_type,
-                "source": a.source,
-                "created_at": a.created_at,
-                "distance_km": 0,
-                "cpi": 0,
-                "priority_score": 0
-            })
-
-    # Deduplicate or Sort?
-    # For now, put High Severity text to top
-    response.sort(key=lambda x: 1 if x["severity"] == 'High' else 2)
-    
-    return response
+        lat = lon = None
+        db_alerts = (await db.scalars(active_alerts_select())).all()
+
+    ranked = rank_alerts(db_alerts, lat, lon, radius_km=radius_km, top_k=limit, dedupe=True)
+    return [
+        {
+            "id": r["alert"].id,
+            "location": r["alert"].location,
+            "lat": r["alert"].lat,
+            "lon": r["alert"].lon,
+            "title": r["alert"].title,
+            "message": r["alert"].message,
+            "severity": r["alert"].severity,
+            "alert_type": r["alert"].alert_type,
+            "source": r["alert"].source,
+            "created_at": r["alert"].created_at,
+            "distance_km": r["distance_km"],
+            "cpi": r["cpi"],
+            "priority_score": r["priority_score"],
+            "stale": _is_stale(r["alert"])
+        }
+        for r in ranked
+    ]
 
 # Removed seed_alerts call for purely live + db approach, or logic can remain separate
 @router.get("/heatmap")
-def get_heatmap_data():
-    from ..ai_logic import generate_heatmap_data
-    return generate_heatmap_data()
+def get_heatmap_data(request: Request):
+    """
+    [[lat, lon, intensity], ...] - precomputed (services/heatmap), served with an ETag.
+    """
+    snapshot = get_heatmap()
+    return cached_response(request, snapshot.json, "application/json", snapshot.etag, HEATMAP_CACHE_CONTROL)
+
+@router.get("/heatmap.bin")
+def get_heatmap_binary(request: Request):
+    """
+    Same points packed as uint32 count + float32 lats + float32 lons + uint8 intensities.
+    """
+    snapshot = get_heatmap()
+    return cached_response(request, snapshot.bin, BIN_MEDIA_TYPE, snapshot.etag, HEATMAP_CACHE_CONTROL)
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from ..database import get_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..database import get_async_db
 from ..models import User
 from pydantic import BaseModel
 from typing import Optional
@@ -21,8 +22,8 @@ class UserLogin(BaseModel):
     password: str
 
 @router.post("/register")
-def register(user: UserCreate, db: Session = Depends(get_db)):
-    db_user = db.query(User).filter(User.email == user.email).first()
+async def register(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
+    db_user = await db.scalar(select(User).where(User.email == user.email))
     if db_user:
         raise HTTPException(status_code=400, detail="Email already registered")
     
@@ -36,14 +37,13 @@ def register(user: UserCreate, db: Session = Depends(get_db)):
         role=user.role
     )
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
     return {"message": "User registered successfully", "user_id": new_user.id, "role": new_user.role}
 
 @router.post("/login")
-def login(user: UserLogin, db: Session = Depends(get_db)):
+async def login(user: UserLogin, db: AsyncSession = Depends(get_async_db)):
     # Check user
-    db_user = db.query(User).filter(User.email == user.email).first()
+    db_user = await db.scalar(select(User).where(User.email == user.email))
     if not db_user:
         raise HTTPException(status_code=400, detail="Invalid credentials")
         
@@ -60,10 +60,10 @@ def login(user: UserLogin, db: Session = Depends(get_db)):
     }
 
 @router.get("/me")
-def get_current_user_info(user_id: int, db: Session = Depends(get_db)):
+async def get_current_user_info(user_id: int, db: AsyncSession = Depends(get_async_db)):
     # Hacky: In a real app we'd decode the JWT token. 
     # Here we just trust the user_id param for simplicity to fix the session sync issue.
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return {
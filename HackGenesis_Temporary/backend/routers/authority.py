@@ -1,9 +1,19 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from ..database import get_db
-from ..models import Post, AidRequest
-from ..ai_logic import generate_heatmap_data, calculate_aid_priority
+from fastapi import APIRouter, Depends, Query, Request, Response
+from fastapi.responses import StreamingResponse, JSONResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload, load_only
+from ..database import get_db, get_async_db, SessionLocal
+from ..models import Post, AidRequest, User
+from ..ai_logic import calculate_aid_priority
+from ..services.blob_store import image_url
+from ..utils.json_stream import stream_json_object
+from ..utils.http_cache import cached_response, etag_matches
+from ..services.heatmap import get_heatmap, HEATMAP_CACHE_CONTROL
+from ..services.write_queue import write_queue
+from ..services.change_feed import current_seq, oldest_seq, changed_entities, DELTA_MAX_ITEMS
 from pydantic import BaseModel
+from typing import Optional
 
 router = APIRouter(tags=["Authority"])
 
@@ -16,9 +26,9 @@ class AidRequestCreate(BaseModel):
     location: str
 
 @router.get("/users/{user_id}/activity")
-def get_user_activity(user_id: int, db: Session = Depends(get_db)):
+async def get_user_activity(user_id: int, db: AsyncSession = Depends(get_async_db)):
     # 1. User's Posts
-    posts = db.query(Post).filter(Post.user_id == user_id).order_by(Post.created_at.desc()).all()
+    posts = (await db.scalars(select(Post).where(Post.user_id == user_id).order_by(Post.created_at.desc()))).all()
     posts_data = []
     for p in posts:
         posts_data.append({
@@ -30,7 +40,9 @@ def get_user_activity(user_id: int, db: Session = Depends(get_db)):
         })
 
     # 2. User's Aid Requests
-    requests = db.query(AidRequest).filter(AidRequest.user_id == user_id).order_by(AidRequest.timestamp.desc()).all()
+    requests = (await db.scalars(
+        select(AidRequest).where(AidRequest.user_id == user_id).order_by(AidRequest.timestamp.desc())
+    )).all()
     req_data = []
     for r in requests:
         req_data.append({
@@ -46,76 +58,183 @@ def get_user_activity(user_id: int, db: Session = Depends(get_db)):
         "aid_requests": req_data
     }
 
-@router.get("/authority/dashboard-data")
-def get_authority_data(view: str = "active", db: Session = Depends(get_db)):
-    # view can be 'active' or 'all'
-    
-    # 1. Posts
-    post_query = db.query(Post)
-    if view == "active":
-        post_query = post_query.filter((Post.status == "Open") | (Post.status == None))
-    
-    prioritized_posts = post_query.order_by(Post.risk_score.desc()).all()
-    
-    posts_data = []
-    for p in prioritized_posts:
-        posts_data.append({
-            "id": p.id,
-            "risk_score": p.risk_score,
-            "location": p.location,
-            "caption": p.caption,
-            "description": p.description,
-            "image_data": p.image_data,
-            "status": p.status, # Include status for history view
-            "created_at": p.created_at.isoformat()
-        })
-        
-    # 2. Aid Requests
-    aid_query = db.query(AidRequest)
-    if view == "active":
-        aid_query = aid_query.filter(AidRequest.status != "Resolved").filter(AidRequest.status != "Dismissed") # Keep Delegated/In Progress in active? 
-        # Actually simplified: Active = Pending, In Progress, Delegated. Resolved/Dismissed = History.
-        # Let's be strict: Active does NOT include Resolved or Dismissed.
-        aid_query = aid_query.filter(~AidRequest.status.in_(["Resolved", "Dismissed"]))
-
-    aid_requests = aid_query.order_by(
-        AidRequest.urgency_score.desc(),
-        AidRequest.timestamp.desc()
-    ).all()
-    
-    aid_data = []
-    for a in aid_requests:
-         aid_data.append({
-             "id": a.id,
-             "user_name": a.user.name if a.user else "Unknown",
-             "user_email": a.user.email if a.user else "Unknown",
-             "description": a.description,
-             "needs": a.needs,
-             "urgency": a.urgency,
-             "urgency_score": a.urgency_score, 
-             "status": a.status,
-             "contact": a.contact,
-             "location": a.location,
-             "timestamp": a.timestamp.isoformat()
-         })
-         
+# Dashboard paging (the 15s poll only ever re-reads one page)
+DASHBOARD_PAGE_SIZE = 50
+DASHBOARD_MAX_PAGE_SIZE = 200
+# Rows fetched per round-trip while streaming
+STREAM_BATCH = 100
+
+# Active = Pending, In Progress, Delegated. Resolved/Dismissed = History.
+CLOSED_AID_STATUSES = ["Resolved", "Dismissed"]
+
+def _dashboard_post(p):
+    return {
+        "id": p.id,
+        "risk_score": p.risk_score,
+        "location": p.location,
+        "caption": p.caption,
+        "description": p.description,
+        "thumb_url": image_url(p.thumb_hash),
+        "image_url": image_url(p.image_hash), # full size, load on demand
+        "status": p.status, # Include status for history view
+        "created_at": p.created_at.isoformat(),
+        "version": p.version
+    }
+
+def _dashboard_aid(a):
     return {
-        "prioritized_posts": posts_data,
-        "aid_requests": aid_data
+        "id": a.id,
+        "user_name": a.user.name if a.user else "Unknown",
+        "user_email": a.user.email if a.user else "Unknown",
+        "description": a.description,
+        "needs": a.needs,
+        "urgency": a.urgency,
+        "urgency_score": a.urgency_score,
+        "status": a.status,
+        "contact": a.contact,
+        "location": a.location,
+        "timestamp": a.timestamp.isoformat(),
+        "version": a.version
     }
 
+def _post_query(db):
+    return db.query(Post).options(load_only(
+        Post.id, Post.risk_score, Post.location, Post.caption, Post.description,
+        Post.thumb_hash, Post.image_hash, Post.status, Post.created_at, Post.version
+    ))
+
+def _aid_query(db):
+    return db.query(AidRequest).options(
+        joinedload(AidRequest.user).load_only(User.name, User.email)
+    )
+
+def _post_visible(p, view):
+    return view != "active" or p.status in ("Open", None)
+
+def _aid_visible(a, view):
+    # Mirrors the SQL filter: NOT IN (...) never matches NULL
+    return view != "active" or (a.status is not None and a.status not in CLOSED_AID_STATUSES)
+
+def _paged(query, offset, page_size, flags, key):
+    # Fetch one extra row to know whether another page exists
+    for i, row in enumerate(query.offset(offset).limit(page_size + 1).yield_per(STREAM_BATCH)):
+        if i == page_size:
+            flags[key] = True
+            break
+        yield row
+
+def _stream_dashboard(view, page, page_size, cursor):
+    # Own session: the response body is produced after the request dependencies exit
+    db = SessionLocal()
+    flags = {"posts_has_more": False, "aid_has_more": False}
+    offset = (page - 1) * page_size
+    try:
+        # 1. Posts (served by ix_posts_status_risk_score)
+        post_query = _post_query(db)
+        if view == "active":
+            post_query = post_query.filter((Post.status == "Open") | (Post.status == None))
+        post_query = post_query.order_by(Post.risk_score.desc(), Post.id)
+
+        # 2. Aid Requests (served by ix_aid_requests_status_urgency_ts)
+        aid_query = _aid_query(db)
+        if view == "active":
+            aid_query = aid_query.filter(~AidRequest.status.in_(CLOSED_AID_STATUSES))
+        aid_query = aid_query.order_by(
+            AidRequest.urgency_score.desc(),
+            AidRequest.timestamp.desc(),
+            AidRequest.id
+        )
+
+        yield from stream_json_object(
+            [
+                ("prioritized_posts", (_dashboard_post(p) for p in _paged(post_query, offset, page_size, flags, "posts_has_more"))),
+                ("aid_requests", (_dashboard_aid(a) for a in _paged(aid_query, offset, page_size, flags, "aid_has_more"))),
+            ],
+            # cursor was read before the rows: anything newer is re-sent by the next ?since= poll
+            trailer=lambda: {"page": page, "page_size": page_size, "cursor": cursor, **flags}
+        )
+    finally:
+        db.close()
+
+def _dashboard_delta(db, view, since, head):
+    """
+    Items inserted/updated/removed (for this view) after change `since`.
+    Falls back to {"reset": true} when the log no longer covers `since`
+    or the delta is larger than a full page would be.
+    """
+    if since < oldest_seq(db) - 1 or since > head:
+        return {"reset": True, "cursor": head}
+
+    changes = changed_entities(db, since, limit=DELTA_MAX_ITEMS)
+    if changes is None:
+        return {"reset": True, "cursor": head}
+
+    post_ids, aid_ids = changes.get("post", []), changes.get("aid_request", [])
+    posts = {p.id: p for p in _post_query(db).filter(Post.id.in_(post_ids))} if post_ids else {}
+    aids = {str(a.id): a for a in _aid_query(db).filter(AidRequest.id.in_([int(i) for i in aid_ids]))} if aid_ids else {}
+
+    delta = {
+        "since": since,
+        "cursor": head,
+        "prioritized_posts": {"upserted": [], "removed": []},
+        "aid_requests": {"upserted": [], "removed": []},
+    }
+    for pid in post_ids:
+        p = posts.get(pid)
+        if p is not None and _post_visible(p, view):
+            delta["prioritized_posts"]["upserted"].append(_dashboard_post(p))
+        else:
+            delta["prioritized_posts"]["removed"].append(pid)
+    for aid in aid_ids:
+        a = aids.get(aid)
+        if a is not None and _aid_visible(a, view):
+            delta["aid_requests"]["upserted"].append(_dashboard_aid(a))
+        else:
+            delta["aid_requests"]["removed"].append(int(aid))
+    return delta
+
+@router.get("/authority/dashboard-data")
+def get_authority_data(
+    request: Request,
+    view: str = "active",
+    page: int = Query(1, ge=1),
+    page_size: int = Query(DASHBOARD_PAGE_SIZE, ge=1, le=DASHBOARD_MAX_PAGE_SIZE),
+    since: Optional[int] = Query(None, ge=0),
+    db: Session = Depends(get_db)
+):
+    # view can be 'active' or 'all'
+    # One indexed lookup decides whether anything changed at all
+    head = current_seq(db)
+    mode = "full" if since is None else f"since-{since}"
+    etag = f'W/"{view}.{page}.{page_size}.{mode}.{head}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    if since is not None:
+        return JSONResponse(_dashboard_delta(db, view, since, head), headers=headers)
+
+    # Streamed: the first rows reach the browser before the whole page is encoded
+    return StreamingResponse(
+        _stream_dashboard(view, page, page_size, head),
+        media_type="application/json",
+        headers=headers
+    )
+
 class PostStatusUpdate(BaseModel):
     status: str
 
 @router.put("/authority/posts/{post_id}/status")
-def update_post_status(post_id: str, update: PostStatusUpdate, db: Session = Depends(get_db)):
-    post = db.query(Post).filter(Post.id == post_id).first()
-    if not post:
-        return {"error": "Post not found"}
-    
-    post.status = update.status
-    db.commit()
-    return {"message": "Status updated", "new_status": post.status}
+def update_post_status(post_id: str, update: PostStatusUpdate):
+    # Group-committed by the single writer (services/write_queue)
+    def op(db):
+        post = db.query(Post).filter(Post.id == post_id).first()
+        if not post:
+            return {"error": "Post not found"}
+
+        post.status = update.status
+        return {"message": "Status updated", "new_status": post.status}
+    return write_queue.run(op)
 
 @router.post("/authority/aid-request")
 def log_aid_request(req: AidRequestCreate, db: Session = Depends(get_db)):
@@ -139,15 +258,17 @@ class AidStatusUpdate(BaseModel):
     status: str
 
 @router.put("/authority/aid-requests/{req_id}/status")
-def update_aid_status(req_id: int, update: AidStatusUpdate, db: Session = Depends(get_db)):
-    req = db.query(AidRequest).filter(AidRequest.id == req_id).first()
-    if not req:
-        return {"error": "Request not found"}
-    
-    req.status = update.status
-    db.commit()
-    return {"message": "Status updated", "new_status": req.status}
+def update_aid_status(req_id: int, update: AidStatusUpdate):
+    def op(db):
+        req = db.query(AidRequest).filter(AidRequest.id == req_id).first()
+        if not req:
+            return {"error": "Request not found"}
+
+        req.status = update.status
+        return {"message": "Status updated", "new_status": req.status}
+    return write_queue.run(op)
     
 @router.get("/authority/heatmap")
-def get_heatmap():
-    return generate_heatmap_data()
+def get_authority_heatmap(request: Request):
+    snapshot = get_heatmap()
+    return cached_response(request, snapshot.json, "application/json", snapshot.etag, HEATMAP_CACHE_CONTROL)
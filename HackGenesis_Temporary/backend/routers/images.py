@@ -0,0 +1,39 @@
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import FileResponse
+from ..services.blob_store import (
+    put_stream, has_blob, blob_path, blob_mime, image_url, BlobTooLarge, NotAnImage
+)
+
+router = APIRouter(tags=["Images"])
+
+# Blobs are immutable (the URL is the content hash), so caches may keep them forever
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+
+@router.post("/images")
+async def upload_image(request: Request):
+    """
+    Streaming upload: send the raw image bytes as the request body.
+    Returns the content hash to reference from POST /posts (image_hash).
+    """
+    try:
+        blob_hash, size = await put_stream(request.stream())
+    except BlobTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except NotAnImage as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"image_hash": blob_hash, "url": image_url(blob_hash), "size": size}
+
+@router.get("/images/{blob_hash}")
+def get_image(blob_hash: str, request: Request):
+    if not has_blob(blob_hash):
+        raise HTTPException(status_code=404, detail="Image not found")
+
+    etag = f'"{blob_hash}"'
+    headers = {"ETag": etag, "Cache-Control": IMMUTABLE_CACHE}
+
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in [t.strip() for t in if_none_match.split(",")] or if_none_match.strip() == "*":
+        return Response(status_code=304, headers=headers)
+
+    # FileResponse handles Range / If-Range (206 Partial Content) itself
+    return FileResponse(blob_path(blob_hash), media_type=blob_mime(blob_hash), headers=headers)
@@ -1,10 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from ..database import get_db
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import and_, or_, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload, selectinload, load_only
+from ..database import get_db, get_async_db
 from ..models import Post, User, Comment
 from ..ai_logic import calculate_risk_score
+from ..services.blob_store import put_bytes, has_blob, decode_data_url, image_url, BlobTooLarge, NotAnImage
+from ..services.image_pipeline import submit_post_image
+from ..services.write_queue import write_queue
+from ..services.like_counter import like_counter
+import binascii
 from pydantic import BaseModel
 from typing import Optional, List
+from datetime import datetime
 import uuid
 
 router = APIRouter(tags=["Posts"])
@@ -14,37 +22,146 @@ class PostCreate(BaseModel):
     location: str
     caption: str
     description: str
-    image_data: str # Base64
+    image_data: Optional[str] = None # Base64 / data URL (small images)
+    image_hash: Optional[str] = None # From POST /images (streamed upload)
+    lat: Optional[float] = None # Reporter position, if shared
+    lon: Optional[float] = None
 
 class CommentCreate(BaseModel):
     user_id: int
     text: str
 
+# Keyset pagination: ?after=<created_at>,<id> from the previous page's X-Next-Cursor
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Output field -> Post columns it needs (id/created_at are always loaded for the cursor)
+POST_FIELDS = {
+    "id": [],
+    "owner": [Post.user_id],
+    "owner_id": [Post.user_id],
+    "location": [Post.location],
+    "caption": [Post.caption],
+    "description": [Post.description],
+    "imageUrl": [Post.image_hash],
+    "thumbUrl": [Post.thumb_hash],
+    "mediumUrl": [Post.medium_hash],
+    "likes": [Post.likes],
+    "createdAt": [],
+    "commentCount": [],
+    "comments": [],
+}
+
+def _parse_cursor(after: str):
+    try:
+        ts, post_id = after.rsplit(",", 1)
+        return datetime.fromisoformat(ts), post_id
+    except ValueError:
+        raise HTTPException(status_code=400, detail="after must be '<created_at>,<id>'")
+
+def _make_cursor(p):
+    return f"{p.created_at.isoformat()},{p.id}"
+
 @router.get("/posts")
-def get_posts(db: Session = Depends(get_db)):
-    posts = db.query(Post).order_by(Post.created_at.desc()).all()
+def get_posts(
+    response: Response,
+    after: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    fields: Optional[str] = None,
+    user_id: Optional[int] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Newest first, one page at a time. The cursor for the next page is in the
+    X-Next-Cursor header (absent on the last page).
+    fields=id,caption,... limits both the columns loaded and the keys returned.
+    """
+    wanted = list(POST_FIELDS) if not fields else [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in wanted if f not in POST_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+
+    columns = {Post.id, Post.created_at}
+    for f in wanted:
+        columns.update(POST_FIELDS[f])
+    query = db.query(Post).options(load_only(*columns))
+    # Eager loading keeps this at a fixed number of queries regardless of page size
+    if "owner" in wanted:
+        query = query.options(joinedload(Post.owner).load_only(User.name))
+    if "comments" in wanted:
+        query = query.options(selectinload(Post.comments))
+
+    if user_id is not None:
+        query = query.filter(Post.user_id == user_id)
+    if after:
+        ts, post_id = _parse_cursor(after)
+        query = query.filter(or_(
+            Post.created_at < ts,
+            and_(Post.created_at == ts, Post.id < post_id)
+        ))
+
+    # Served by ix_posts_created_at_id; one extra row tells us if there is a next page
+    posts = query.order_by(Post.created_at.desc(), Post.id.desc()).limit(limit + 1).all()
+    has_more = len(posts) > limit
+    posts = posts[:limit]
+
+    counts = {}
+    if "commentCount" in wanted and "comments" not in wanted and posts:
+        counts = dict(
+            db.query(Comment.post_id, func.count(Comment.id))
+            .filter(Comment.post_id.in_([p.id for p in posts]))
+            .group_by(Comment.post_id)
+            .all()
+        )
+
+    if has_more:
+        response.headers["X-Next-Cursor"] = _make_cursor(posts[-1])
+
     # Serialize manually or use Pydantic schema response_model
     # For speed, doing a quick dict conversion including user name
     result = []
     for p in posts:
-        result.append({
-            "id": p.id,
-            "owner": p.owner.name if p.owner else "Unknown",
-            "owner_id": p.user_id,
-            "location": p.location,
-            "caption": p.caption,
-            "description": p.description,
-            "imageData": p.image_data,
-            "likes": p.likes,
-            "createdAt": p.created_at.isoformat(),
-            "comments": [{"text": c.text, "at": c.created_at.isoformat()} for c in p.comments]
-        })
+        item = {}
+        for f in wanted:
+            if f == "id": item[f] = p.id
+            elif f == "owner": item[f] = p.owner.name if p.owner else "Unknown"
+            elif f == "owner_id": item[f] = p.user_id
+            elif f == "location": item[f] = p.location
+            elif f == "caption": item[f] = p.caption
+            elif f == "description": item[f] = p.description
+            # Lists reference the resized copy; full image is fetched on demand
+            elif f == "imageUrl": item[f] = image_url(p.image_hash)
+            elif f == "thumbUrl": item[f] = image_url(p.thumb_hash)
+            elif f == "mediumUrl": item[f] = image_url(p.medium_hash)
+            # Plus likes counted in memory but not flushed yet
+            elif f == "likes": item[f] = (p.likes or 0) + like_counter.pending(p.id)
+            elif f == "createdAt": item[f] = p.created_at.isoformat()
+            elif f == "commentCount": item[f] = len(p.comments) if "comments" in wanted else counts.get(p.id, 0)
+            elif f == "comments": item[f] = [{"text": c.text, "at": c.created_at.isoformat()} for c in p.comments]
+        result.append(item)
     return result
 
 @router.post("/posts")
 def create_post(post: PostCreate, db: Session = Depends(get_db)):
     # Calculate Risk Score (AI)
     risk = calculate_risk_score(post.caption + " " + post.description, post.location)
+
+    # Images live in the content-addressed blob store, the row only keeps the hash
+    image_hash = post.image_hash
+    image_bytes = None
+    if image_hash:
+        if not has_blob(image_hash):
+            raise HTTPException(status_code=400, detail="Unknown image_hash")
+    elif post.image_data:
+        try:
+            image_bytes = decode_data_url(post.image_data)
+            image_hash = put_bytes(image_bytes)
+        except NotAnImage as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except (binascii.Error, ValueError):
+            raise HTTPException(status_code=400, detail="image_data is not valid base64")
+        except BlobTooLarge as e:
+            raise HTTPException(status_code=413, detail=str(e))
     
     new_post = Post(
         id="p_" + str(uuid.uuid4().hex[:8]),
@@ -52,35 +169,64 @@ def create_post(post: PostCreate, db: Session = Depends(get_db)):
         location=post.location,
         caption=post.caption,
         description=post.description,
-        image_data=post.image_data,
-        risk_score=risk
+        image_hash=image_hash,
+        risk_score=risk,
+        lat=post.lat,
+        lon=post.lon
     )
     db.add(new_post)
     db.commit()
     db.refresh(new_post)
+
+    if image_hash:
+        # Thumbnails are built in the image worker pool, not on this thread
+        submit_post_image(new_post.id, image_hash, image_bytes)
+
     return {"message": "Post created", "post_id": new_post.id, "risk_score": risk}
 
+@router.get("/posts/{post_id}")
+async def get_post(post_id: str, db: AsyncSession = Depends(get_async_db)):
+    # Relationships loaded up front: an async session can't lazy-load
+    p = await db.scalar(
+        select(Post).where(Post.id == post_id).options(joinedload(Post.owner), selectinload(Post.comments))
+    )
+    if not p:
+        raise HTTPException(status_code=404, detail="Post not found")
+    return {
+        "id": p.id,
+        "owner": p.owner.name if p.owner else "Unknown",
+        "owner_id": p.user_id,
+        "location": p.location,
+        "caption": p.caption,
+        "description": p.description,
+        "imageUrl": image_url(p.image_hash),
+        "thumbUrl": image_url(p.thumb_hash),
+        "mediumUrl": image_url(p.medium_hash),
+        "likes": (p.likes or 0) + like_counter.pending(p.id),
+        "status": p.status,
+        "riskScore": p.risk_score,
+        "createdAt": p.created_at.isoformat(),
+        "comments": [{"text": c.text, "at": c.created_at.isoformat()} for c in p.comments]
+    }
+
 @router.post("/posts/{post_id}/like")
-def like_post(post_id: str, db: Session = Depends(get_db)):
-    post = db.query(Post).filter(Post.id == post_id).first()
-    if not post:
+def like_post(post_id: str):
+    # Counted in memory, written in batches (services/like_counter)
+    likes = like_counter.add(post_id)
+    if likes is None:
         raise HTTPException(status_code=404, detail="Post not found")
-    
-    post.likes += 1
-    db.commit()
-    return {"likes": post.likes}
+    return {"likes": likes}
 
 @router.post("/posts/{post_id}/comment")
-def add_comment(post_id: str, comment: CommentCreate, db: Session = Depends(get_db)):
-    post = db.query(Post).filter(Post.id == post_id).first()
-    if not post:
-        raise HTTPException(status_code=404, detail="Post not found")
-        
-    new_comment = Comment(
-        text=comment.text,
-        post_id=post_id
-        # In a real app, link to user_id too
-    )
-    db.add(new_comment)
-    db.commit()
-    return {"message": "Comment added"}
+def add_comment(post_id: str, comment: CommentCreate):
+    def op(db):
+        if not db.query(Post.id).filter(Post.id == post_id).first():
+            raise HTTPException(status_code=404, detail="Post not found")
+        new_comment = Comment(
+            text=comment.text,
+            post_id=post_id
+            # In a real app, link to user_id too
+        )
+        db.add(new_comment)
+        return {"message": "Comment added"}
+    return write_queue.run(op)
@@ -0,0 +1,38 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..database import get_async_db
+from ..services.search import search, SEARCH_TYPES
+
+router = APIRouter(tags=["Search"])
+
+SEARCH_PAGE_SIZE = 20
+SEARCH_MAX_PAGE_SIZE = 100
+# Ranked results aren't worth paging through much further than this
+SEARCH_MAX_OFFSET = 500
+
+@router.get("/search")
+async def search_reports(
+    q: str = Query(..., min_length=1, max_length=200),
+    types: str = Query(",".join(SEARCH_TYPES), description="Comma-separated: post, alert, aid_request"),
+    limit: int = Query(SEARCH_PAGE_SIZE, ge=1, le=SEARCH_MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0, le=SEARCH_MAX_OFFSET),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Full-text search over posts (caption, description, location), alerts
+    (title, message) and aid requests (needs, description, location).
+    Every word must match (the last one as a prefix too); results are
+    ranked best first with an HTML snippet, matches wrapped in <mark>.
+    Fetch the next page with offset=next_offset (null on the last page).
+    """
+    wanted = [t.strip() for t in types.split(",") if t.strip()]
+    unknown = [t for t in wanted if t not in SEARCH_TYPES]
+    if unknown or not wanted:
+        raise HTTPException(status_code=400, detail=f"types must be from {', '.join(SEARCH_TYPES)}")
+
+    results, more = await search(db, q, wanted, limit=limit, offset=offset)
+    return {
+        "query": q,
+        "results": results,
+        "next_offset": offset + limit if more else None
+    }
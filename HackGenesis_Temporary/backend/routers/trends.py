@@ -1,94 +1,72 @@
-from fastapi import APIRouter, Depends
-import random
-import requests
-from sqlalchemy.orm import Session
-from ..database import get_db
+from fastapi import APIRouter, Depends, Query
 from datetime import datetime, timedelta
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..database import get_async_db
+from ..models import TrendDaily, TrendHourly, get_ist_time
+from ..services.stations import nearest_station
+from ..services.trend_store import collector_stats, trend_series, TRENDS_MAX_DAYS, TRENDS_MAX_HOURLY_DAYS
+from ..services.feed_guard import stale_feeds
 
 router = APIRouter(tags=["Trends"])
 
-@router.get("/trends/data")
-def get_trends_data(db: Session = Depends(get_db)):
-    # --- 1. SETUP ---
-    # Default Location: Mumbai (19.0760, 72.8777) - A good proxy for India coast
-    lat, lon = 19.0760, 72.8777
-    
-    # Dates: Past 7 Days
-    today = datetime.now()
-    dates_7d = [(today - timedelta(days=i)).strftime('%d %b') for i in range(6, -1, -1)]
-    start_date = (today - timedelta(days=6)).strftime("%Y-%m-%d")
-    end_date = today.strftime("%Y-%m-%d")
-
-    # --- 2. FLOOD / STORM SURGE RISK (Real Wave Height) ---
-    wave_heights = []
-    try:
-        # Open-Meteo Marine API
-        marine_url = f"https://marine-api.open-meteo.com/v1/marine?latitude={lat}&longitude={lon}&daily=wave_height_max&start_date={start_date}&end_date={end_date}&timezone=auto"
-        res = requests.get(marine_url, timeout=3)
-        data = res.json()
-        
-        if "daily" in data and "wave_height_max" in data["daily"]:
-            wave_heights = data["daily"]["wave_height_max"]
-            # Ensure it matches length
-            wave_heights = wave_heights[:7]
-        else:
-             # Fallback if marine data unavailable for location (e.g. landlocked, though coords are Mumbai)
-             wave_heights = [0.5, 0.6, 0.8, 0.7, 0.6, 0.5, 0.6] 
-    except Exception as e:
-        print(f"Marine Fetch Error: {e}")
-        wave_heights = [0.5, 0.6, 0.8, 0.7, 0.6, 0.5, 0.6]
+# Default location: Mumbai - a good proxy for the India coast
+DEFAULT_LAT, DEFAULT_LON = 19.0760, 72.8777
 
-    # --- 3. STORM RISK (Real Wind Speed History) ---
-    wind_speeds = []
-    try:
-        # Open-Meteo Weather API
-        weather_url = f"https://api.open-meteo.com/v1/forecast?latitude={lat}&longitude={lon}&daily=windspeed_10m_max&start_date={start_date}&end_date={end_date}&timezone=auto"
-        res = requests.get(weather_url, timeout=3)
-        data = res.json()
-        
-        if "daily" in data and "windspeed_10m_max" in data["daily"]:
-            wind_speeds = data["daily"]["windspeed_10m_max"]
-            wind_speeds = wind_speeds[:7]
-        else:
-             wind_speeds = [15, 18, 22, 20, 15, 12, 18]
-    except Exception as e:
-        print(f"Wind Fetch Error: {e}")
-        wind_speeds = [15, 18, 22, 20, 15, 12, 18]
+@router.get("/trends/data")
+async def get_trends_data(
+    lat: float = Query(DEFAULT_LAT, ge=-90, le=90),
+    lon: float = Query(DEFAULT_LON, ge=-180, le=180),
+    days: int = Query(7, ge=1, le=TRENDS_MAX_DAYS),
+    resolution: str = Query("day", pattern="^(day|hour)$"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Wave height, wind speed and nearby quake magnitude for the monitored
+    station closest to lat/lon over the last `days`, read from the local
+    time-series store (services/trend_store fills it in the background).
+    Long ranges are downsampled to per-bucket maxima; `bucket` says how many
+    days (or hours) each point covers. Missing readings are null.
+    `stale_sources` lists providers the collector couldn't reach recently,
+    i.e. the newest points may be missing or out of date.
+    """
+    station = nearest_station(lat, lon)
+    today = get_ist_time().date()
+    first_day = today - timedelta(days=days - 1)
 
-    # --- 4. TSUNAMI RISK (Real Seismic Activity) ---
-    # We will fetch earthquakes globally or in a wide region (Indian Ocean) and see max magnitude per day
-    earthquake_mags = [0] * 7
-    try:
-        # USGS Feed (Last 7 Days)
-        usgs_url = "https://earthquake.usgs.gov/earthquakes/feed/v1.0/summary/4.5_week.geojson"
-        res = requests.get(usgs_url, timeout=4)
-        data = res.json()
-        
-        features = data.get("features", [])
-        
-        # Bucket by day
-        for f in features:
-            mag = f["properties"]["mag"]
-            timestamp = f["properties"]["time"] # ms
-            dt = datetime.fromtimestamp(timestamp / 1000.0)
-            
-            # Check if within our 7 day window
-            delta_days = (today - dt).days
-            if 0 <= delta_days < 7:
-                 # We index from 0 (6 days ago) to 6 (today)
-                 # delta=0 => today => index 6
-                 # delta=6 => 6 days ago => index 0
-                 idx = 6 - delta_days
-                 if mag > earthquake_mags[idx]:
-                     earthquake_mags[idx] = mag
-                     
-    except Exception as e:
-         print(f"USGS Fetch Error: {e}")
-         earthquake_mags = [2.1, 1.8, 2.5, 3.0, 2.2, 1.9, 2.0]
+    if resolution == "hour" and days <= TRENDS_MAX_HOURLY_DAYS:
+        first = datetime.combine(first_day, datetime.min.time())
+        t = TrendHourly
+        rows = (await db.execute(
+            select(t.hour, t.wave_height, t.wind_speed, t.quake_mag)
+            .where(t.station == station["key"], t.hour >= first).order_by(t.hour)
+        )).all()
+        now_hour = get_ist_time().replace(minute=0, second=0, microsecond=0)
+        count = int((now_hour - first) / timedelta(hours=1)) + 1
+        data = trend_series(rows, first, count, timedelta(hours=1), "%d %b %H:00")
+        resolution = "hour"
+    else:
+        t = TrendDaily
+        rows = (await db.execute(
+            select(t.day, t.wave_height_max, t.wind_speed_max, t.quake_mag_max)
+            .where(t.station == station["key"], t.day >= first_day).order_by(t.day)
+        )).all()
+        data = trend_series(rows, first_day, days, timedelta(days=1), "%d %b")
+        resolution = "day"
 
     return {
-        "dates": dates_7d,
-        "flood_risk": wave_heights,    # Wave Height (m)
-        "storm_risk": wind_speeds,     # Wind Speed (km/h)
-        "tsunami_risk": earthquake_mags # Magnitude (Richter)
+        "station": station,
+        "days": days,
+        "resolution": resolution,
+        "dates": data["dates"],
+        "bucket": data["bucket"],
+        "flood_risk": data["flood_risk"],    # Wave Height (m)
+        "storm_risk": data["storm_risk"],    # Wind Speed (km/h)
+        "tsunami_risk": data["tsunami_risk"], # Magnitude (Richter)
+        "updated_at": collector_stats["last_run_at"],
+        "stale_sources": stale_feeds(["open-meteo-marine", "open-meteo", "usgs"])
     }
+
+@router.get("/trends/collector-stats")
+def get_collector_stats():
+    return collector_stats
@@ -0,0 +1,29 @@
+from sqlalchemy import or_, select
+from ..models import Alert, get_ist_time
+from ..utils.geo import bounding_box, cells_in_box
+
+def active_alerts_select():
+    """
+    Alerts still inside their validity window. Expired ones are archived
+    by services/retention within a tick or so; this hides them meanwhile.
+    """
+    return select(Alert).where(or_(Alert.expires_at.is_(None), Alert.expires_at > get_ist_time()))
+
+def nearby_alerts_select(lat, lon, radius_km):
+    """
+    SELECT for only the alerts that can possibly fall within radius_km.
+    1. Grid cells covering the bounding box (uses ix_alerts_grid_cell)
+    2. Bounding box on lat/lon to trim the cell edges
+    The exact haversine cut is left to the ranking step.
+    """
+    min_lat, max_lat, min_lon, max_lon = bounding_box(lat, lon, radius_km)
+
+    stmt = active_alerts_select()
+    cells = cells_in_box(min_lat, max_lat, min_lon, max_lon)
+    if cells is not None:
+        stmt = stmt.where(Alert.grid_cell.in_(cells))
+
+    stmt = stmt.where(Alert.lat.between(min_lat, max_lat))
+    if min_lon > -180.0 or max_lon < 180.0:
+        stmt = stmt.where(Alert.lon.between(min_lon, max_lon))
+    return stmt
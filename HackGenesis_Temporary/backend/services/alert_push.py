@@ -0,0 +1,301 @@
+import asyncio
+import itertools
+import json
+import os
+from collections import defaultdict
+from sqlalchemy import event, select, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session, object_session
+from ..database import ASYNC_DATABASE_URL, AsyncSessionLocal
+from ..models import Alert
+from ..utils.geo import haversine, grid_cell, bounding_box, cells_in_box
+
+# Subscriptions are indexed on the same 1-degree grid as the alerts table
+PUSH_CELL_DEG = 1.0
+# Messages buffered per subscriber before the oldest ones are dropped
+SUBSCRIBER_QUEUE = int(os.environ.get("ALERT_PUSH_QUEUE", "100"))
+# A subscriber that has lost this many messages is disconnected (it can re-sync via GET /alerts)
+MAX_DROPPED = int(os.environ.get("ALERT_PUSH_MAX_DROPPED", "500"))
+
+# Queued to a subscriber's stream to tell the sender to hang up
+CLOSE = None
+
+class Subscriber:
+    __slots__ = ("id", "lat", "lon", "radius_km", "cells", "queue", "dropped", "closed")
+
+    def __init__(self, sub_id, lat, lon, radius_km, cells, queue_size):
+        self.id = sub_id
+        self.lat = lat
+        self.lon = lon
+        self.radius_km = radius_km
+        self.cells = cells # None = registered as a wide-area subscriber
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.dropped = 0
+        self.closed = False
+
+    def offer(self, message):
+        """
+        Never blocks the publisher: when the client can't keep up the oldest
+        buffered message is discarded. Returns False once the subscriber is closed.
+        """
+        if self.closed:
+            return False
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+            if self.dropped >= MAX_DROPPED:
+                self.close()
+                return False
+        self.queue.put_nowait(message)
+        return True
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        # Make room for the sentinel so the sender loop always wakes up
+        while self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(CLOSE)
+
+class AlertBroker:
+    """
+    Geographic pub/sub. Each subscription is registered in every grid cell its
+    circle touches; an alert is matched by looking up its own cell only, then
+    checking the exact distance. Very large circles go to a short "wide" list.
+    """
+
+    def __init__(self, queue_size=SUBSCRIBER_QUEUE, cell_deg=PUSH_CELL_DEG):
+        self.queue_size = queue_size
+        self.cell_deg = cell_deg
+        self._cells = defaultdict(set)
+        self._wide = set()
+        self._subs = {}
+        self._ids = itertools.count(1)
+        self._loop = None
+        self.stats = {"published": 0, "delivered": 0, "dropped": 0, "disconnected": 0}
+
+    def __len__(self):
+        return len(self._subs)
+
+    def subscribe(self, lat, lon, radius_km):
+        # Fan-out runs on the loop that owns the subscriber queues
+        self._loop = asyncio.get_running_loop()
+        min_lat, max_lat, min_lon, max_lon = bounding_box(lat, lon, radius_km)
+        cells = cells_in_box(min_lat, max_lat, min_lon, max_lon, self.cell_deg)
+        sub = Subscriber(next(self._ids), lat, lon, radius_km, cells, self.queue_size)
+        if cells is None:
+            self._wide.add(sub)
+        else:
+            for cell in cells:
+                self._cells[cell].add(sub)
+        self._subs[sub.id] = sub
+        return sub
+
+    def unsubscribe(self, sub):
+        if self._subs.pop(sub.id, None) is None:
+            return
+        if sub.cells is None:
+            self._wide.discard(sub)
+        else:
+            for cell in sub.cells:
+                bucket = self._cells.get(cell)
+                if bucket is not None:
+                    bucket.discard(sub)
+                    if not bucket:
+                        del self._cells[cell]
+        sub.close()
+
+    def match(self, lat, lon):
+        """Subscribers whose radius covers the point."""
+        candidates = self._cells.get(grid_cell(lat, lon, self.cell_deg), ())
+        matched = []
+        for group in (candidates, self._wide):
+            for sub in group:
+                if haversine(sub.lat, sub.lon, lat, lon) <= sub.radius_km:
+                    matched.append(sub)
+        return matched
+
+    def fan_out(self, alerts):
+        """
+        Delivers each alert dict to its matching subscribers. Must run on the
+        broker's loop; the message is encoded once and shared by all of them.
+        """
+        for alert in alerts:
+            if alert.get("lat") is None or alert.get("lon") is None:
+                continue
+            self.stats["published"] += 1
+            message = json.dumps(alert, default=_default)
+            for sub in self.match(alert["lat"], alert["lon"]):
+                before = sub.dropped
+                if sub.offer(message):
+                    self.stats["delivered"] += 1
+                else:
+                    self.stats["disconnected"] += 1
+                    self.unsubscribe(sub)
+                self.stats["dropped"] += sub.dropped - before
+
+    def publish(self, alerts):
+        """
+        Thread-safe entry point (ingestion commits from a worker thread).
+        """
+        loop = self._loop
+        if not alerts or loop is None or loop.is_closed() or not self._subs:
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self.fan_out(alerts)
+        else:
+            loop.call_soon_threadsafe(self.fan_out, alerts)
+
+def _default(o):
+    if hasattr(o, "isoformat"):
+        return o.isoformat()
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+def alert_payload(alert, event_type):
+    return {
+        "event": event_type,
+        "id": alert.id,
+        "location": alert.location,
+        "lat": alert.lat,
+        "lon": alert.lon,
+        "title": alert.title,
+        "message": alert.message,
+        "severity": alert.severity,
+        "alert_type": alert.alert_type,
+        "source": alert.source,
+        "created_at": alert.created_at,
+    }
+
+alert_broker = AlertBroker()
+
+# --- Publish on commit ---
+# SQLite (one process): mapper events snapshot the row (it is expired after
+# commit), the session event pushes the batch only once the transaction is
+# durable.
+# PostgreSQL (several workers, only one of them ingesting): the flush
+# NOTIFYs the changed alert ids, which PostgreSQL delivers to every
+# listening worker at commit (never on rollback). Each worker's listener
+# task loads those rows and fans them out to its own subscribers.
+
+_PENDING_KEY = "alert_push_pending"
+_NOTIFY_KEY = "alert_push_notify"
+
+PUSH_CHANNEL = "alert_push"
+# (event, id) pairs per NOTIFY; keeps the payload well under its 8000-byte limit
+NOTIFY_CHUNK = 200
+# Listener connection health check / reconnect delay (seconds)
+LISTEN_HEARTBEAT = 30
+LISTEN_RETRY = 5
+
+def _queue_alert(event_type):
+    def listener(mapper, connection, target):
+        session = object_session(target)
+        if session is None:
+            return
+        if connection.dialect.name == "postgresql":
+            # Subscribers may be on any worker
+            session.info.setdefault(_NOTIFY_KEY, []).append([event_type, target.id])
+        elif alert_broker._subs:
+            session.info.setdefault(_PENDING_KEY, []).append(alert_payload(target, event_type))
+    return listener
+
+event.listen(Alert, "after_insert", _queue_alert("new"))
+event.listen(Alert, "after_update", _queue_alert("updated"))
+
+@event.listens_for(Session, "after_commit")
+def _publish_pending(session):
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending:
+        alert_broker.publish(pending)
+
+@event.listens_for(Session, "after_flush")
+def _notify_pending(session, flush_context):
+    pending = session.info.pop(_NOTIFY_KEY, None)
+    if not pending:
+        return
+    connection = session.connection()
+    for i in range(0, len(pending), NOTIFY_CHUNK):
+        connection.execute(text("SELECT pg_notify(:channel, :payload)"),
+                           {"channel": PUSH_CHANNEL, "payload": json.dumps(pending[i:i + NOTIFY_CHUNK])})
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session):
+    session.info.pop(_PENDING_KEY, None)
+    session.info.pop(_NOTIFY_KEY, None)
+
+# --- Cross-worker listener (PostgreSQL) ---
+
+async def _fan_out_notified(changes):
+    if not alert_broker._subs:
+        return
+    events = {}
+    for event_type, alert_id in changes:
+        events.setdefault(alert_id, event_type)  # inserted then updated = still "new"
+    async with AsyncSessionLocal() as db:
+        alerts = (await db.scalars(select(Alert).where(Alert.id.in_(list(events))).order_by(Alert.id))).all()
+    # Rows archived in the meantime are simply gone
+    alert_broker.fan_out([alert_payload(a, events[a.id]) for a in alerts])
+
+_fan_out_tasks = set()
+
+def _on_notify(connection, pid, channel, payload):
+    try:
+        changes = json.loads(payload)
+    except ValueError:
+        return
+    task = asyncio.get_running_loop().create_task(_fan_out_notified(changes))
+    _fan_out_tasks.add(task)
+    task.add_done_callback(_fan_out_done)
+
+def _fan_out_done(task):
+    _fan_out_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        print(f"Alert push: fan-out of notified alerts failed: {task.exception()!r}")
+
+async def alert_listener_loop():
+    """
+    Holds a LISTEN connection for PUSH_CHANNEL, reconnecting if it drops.
+    Alerts committed while it is down aren't pushed; clients re-sync with
+    GET /alerts when they reconnect anyway.
+    """
+    import asyncpg
+
+    dsn = make_url(ASYNC_DATABASE_URL).set(drivername="postgresql").render_as_string(hide_password=False)
+    while True:
+        try:
+            connection = await asyncpg.connect(dsn)
+            try:
+                await connection.add_listener(PUSH_CHANNEL, _on_notify)
+                while True:
+                    await asyncio.sleep(LISTEN_HEARTBEAT)
+                    await connection.execute("SELECT 1")
+            finally:
+                await connection.close()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Alert push listener failed: {e!r}; reconnecting in {LISTEN_RETRY}s")
+        await asyncio.sleep(LISTEN_RETRY)
+
+_task = None
+
+def start_alert_listener():
+    global _task
+    if make_url(ASYNC_DATABASE_URL).get_backend_name() == "postgresql" and _task is None:
+        _task = asyncio.create_task(alert_listener_loop())
+    return _task
+
+async def stop_alert_listener():
+    global _task
+    if _task is not None:
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+        _task = None
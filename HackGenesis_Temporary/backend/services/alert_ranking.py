@@ -1,40 +1,182 @@
-from ..utils.geo import haversine
-from ..utils.severity import severity_weight
-from ..utils.cpi import estimate_cpi
+import heapq
+import math
+import numpy as np
+from ..utils.geo import haversine_np
+from ..utils.severity import SEVERITY_WEIGHTS, DEFAULT_SEVERITY_WEIGHT
+from ..utils.cpi import CPI_BY_TYPE, DEFAULT_CPI
 
-def rank_alerts(alerts, user_lat, user_lon):
-    ranked = []
+# User request: "first priority should be of the nearest coastal area"
+# We assign a massive weight to proximity.
+# Logic:
+# 1. Proximity Score (0-60): Linear decay over 500km. 0km = 60pts, 500km+ = 0pts.
+# 2. Severity Score (0-30): 0.3 * severity_weight (High=100, Med=60, Low=30).
+# 3. CPI/Type Score (0-10): 0.1 * estimate_cpi for the alert type.
+PROXIMITY_MAX_POINTS = 60
+PROXIMITY_RANGE_KM = 500
+SEVERITY_FACTOR = 0.3
+CPI_FACTOR = 0.1
+
+# Spatio-temporal dedupe: alerts of the same type whose (lat, lon, time)
+# buckets are equal or adjacent count as one event (e.g. a USGS quake and
+# a manually posted alert for it); only the highest-priority one is kept.
+# 0.1 deg is ~11 km, so merged alerts are at most ~22 km / 6 h apart.
+DEDUPE_CELL_DEG = 0.1
+DEDUPE_WINDOW_S = 3 * 3600
+# Candidates considered per requested result before dedupe (grown if not enough)
+DEDUPE_POOL = 4
+
+class AlertBatch:
+    """
+    Column-oriented snapshot of a list of alerts.
+    Coordinates, severity weights and CPI live in contiguous float arrays so
+    a whole batch is scored in one vectorized pass.
+    """
 
-    for alert in alerts:
-        distance = haversine(user_lat, user_lon, alert.lat, alert.lon)
-        severity = severity_weight(alert.severity)
-        cpi = estimate_cpi(alert.alert_type)
-
-        # User request: "first priority should be of the nearest coastal area"
-        # We assign a massive weight to proximity.
-        # Logic: 
-        # 1. Proximity Score (0-60): Linear decay over 500km. 0km = 60pts, 500km+ = 0pts.
-        # 2. Severity Score (0-30): High=30, Med=15, Low=5.
-        # 3. CPI/Type Score (0-10): Bonus for specific types.
-        
-        proximity_score = max(0, 60 * (1 - (distance / 500)))
-        
-        priority_score = (
-            severity * 0.3 +        # Severity is usually 10-100 scale in utils, let's assume severity_weight returns 0-100? No, let's check.
-                                    # Assuming severity_weight returns relative value, we'll just trust the previous logic's scale but rebalanced.
-                                    # Actually, let's look at the original code: 0.5 * severity.
-                                    # We will use the new proximity logic + existing severity/cpi.
-            proximity_score + 
-            0.1 * cpi
+    def __init__(self, alerts, lats, lons, severity, cpi):
+        self.alerts = alerts
+        self.lats = lats
+        self.lons = lons
+        self.severity = severity
+        self.cpi = cpi
+
+    @classmethod
+    def from_alerts(cls, alerts):
+        alerts = list(alerts)
+        n = len(alerts)
+        # Missing coordinates become NaN (never within any radius)
+        lats = np.fromiter((np.nan if a.lat is None else a.lat for a in alerts), dtype=np.float64, count=n)
+        lons = np.fromiter((np.nan if a.lon is None else a.lon for a in alerts), dtype=np.float64, count=n)
+        severity = np.fromiter(
+            (SEVERITY_WEIGHTS.get(a.severity, DEFAULT_SEVERITY_WEIGHT) for a in alerts),
+            dtype=np.float64, count=n
+        )
+        cpi = np.fromiter(
+            (CPI_BY_TYPE.get(a.alert_type, DEFAULT_CPI) for a in alerts),
+            dtype=np.float64, count=n
         )
+        return cls(alerts, lats, lons, severity, cpi)
+
+    def __len__(self):
+        return len(self.alerts)
+
+    def score(self, user_lat, user_lon):
+        """
+        Returns (distance_km, priority_score) arrays for every alert.
+        Without a user location distance is None and proximity scores 0.
+        """
+        if user_lat is None or user_lon is None:
+            return None, SEVERITY_FACTOR * self.severity + CPI_FACTOR * self.cpi
+        distance = haversine_np(user_lat, user_lon, self.lats, self.lons)
+        proximity = np.maximum(0, PROXIMITY_MAX_POINTS * (1 - distance / PROXIMITY_RANGE_KM))
+        priority = SEVERITY_FACTOR * self.severity + proximity + CPI_FACTOR * self.cpi
+        return distance, priority
+
+    def top(self, user_lat, user_lon, radius_km=None, top_k=None):
+        """
+        Returns (indices, distance_km, priority_score) for the best alerts,
+        highest priority first. top_k uses a partial sort (argpartition),
+        so only the k winners are fully ordered.
+        """
+        distance, priority = self.score(user_lat, user_lon)
+
+        idx = np.arange(len(self.alerts))
+        if radius_km is not None and distance is not None:
+            idx = idx[distance <= radius_km]
+
+        if top_k is not None and top_k < len(idx):
+            if top_k <= 0:
+                idx = idx[:0]
+            else:
+                part = np.argpartition(-priority[idx], top_k - 1)[:top_k]
+                idx = idx[part]
 
+        order = np.argsort(-priority[idx], kind="stable")
+        idx = idx[order]
+        return idx, None if distance is None else distance[idx], priority[idx]
+
+    def top_unique(self, user_lat, user_lon, radius_km=None, top_k=None):
+        """
+        Like top(), but near-duplicate events (see event_keys) are dropped.
+        The best DEDUPE_POOL * top_k candidates (argpartition) go on a heap
+        and are popped in priority order until top_k distinct events are
+        found; only if the pool runs out first is it widened and redone.
+        """
+        distance, priority = self.score(user_lat, user_lon)
+
+        idx = np.arange(len(self.alerts))
+        if radius_km is not None and distance is not None:
+            idx = idx[distance <= radius_km]
+
+        pool = len(idx) if top_k is None else top_k * DEDUPE_POOL
+        while True:
+            candidates = idx
+            if pool < len(idx):
+                candidates = idx[np.argpartition(-priority[idx], pool - 1)[:pool]]
+            # (-priority, index): ties keep input order, same as top()
+            heap = list(zip((-priority[candidates]).tolist(), candidates.tolist()))
+            heapq.heapify(heap)
+            seen = set()
+            picked = []
+            while heap and (top_k is None or len(picked) < top_k):
+                _, i = heapq.heappop(heap)
+                alert = self.alerts[i]
+                if any(key in seen for key in event_keys(alert, neighbours=True)):
+                    continue
+                seen.update(event_keys(alert))
+                picked.append(i)
+            if len(candidates) == len(idx) or len(picked) == top_k:
+                break
+            pool *= DEDUPE_POOL
+
+        idx = np.array(picked, dtype=np.int64)
+        return idx, None if distance is None else distance[idx], priority[idx]
+
+def event_keys(alert, neighbours=False):
+    """
+    Hash buckets of an alert: (type, lat cell, lon cell, time window).
+    neighbours=True also yields the 26 adjacent buckets, so events that
+    straddle a bucket edge still collide.
+    """
+    created = getattr(alert, "created_at", None)
+    slot = int(created.timestamp() // DEDUPE_WINDOW_S) if created is not None else None
+    kind = (alert.alert_type or "").lower()
+    if alert.lat is None or alert.lon is None:
+        # Can't be located, so can't be matched to anything
+        return [("id", id(alert))]
+    row = math.floor(alert.lat / DEDUPE_CELL_DEG)
+    col = math.floor(alert.lon / DEDUPE_CELL_DEG)
+    if not neighbours:
+        return [(kind, row, col, slot)]
+    slots = (slot,) if slot is None else (slot - 1, slot, slot + 1)
+    return [
+        (kind, row + dr, col + dc, s)
+        for dr in (-1, 0, 1) for dc in (-1, 0, 1) for s in slots
+    ]
+
+def rank_alerts(alerts, user_lat, user_lon, radius_km=None, top_k=None, dedupe=False):
+    """
+    Scores alerts with the priority formula above, best first.
+    user_lat/user_lon may be None (no proximity term, distance_km None).
+    dedupe=True merges near-duplicate events across sources (top_unique).
+    """
+    batch = alerts if isinstance(alerts, AlertBatch) else AlertBatch.from_alerts(alerts)
+    if len(batch) == 0:
+        return []
+
+    if dedupe:
+        idx, distance, priority = batch.top_unique(user_lat, user_lon, radius_km=radius_km, top_k=top_k)
+    else:
+        idx, distance, priority = batch.top(user_lat, user_lon, radius_km=radius_km, top_k=top_k)
+    distance = [None] * len(idx) if distance is None else distance.tolist()
+
+    ranked = []
+    for i, d, p in zip(idx.tolist(), distance, priority.tolist()):
         ranked.append({
-            "alert": alert,
-            "distance_km": round(distance, 2),
-            "cpi": cpi,
-            "priority_score": round(priority_score, 2)
+            "alert": batch.alerts[i],
+            "distance_km": None if d is None else round(d, 2),
+            "cpi": int(batch.cpi[i]),
+            "priority_score": round(p, 2)
         })
 
-    # Sort by priority score descending
-    ranked.sort(key=lambda x: x["priority_score"], reverse=True)
+    # Already sorted by priority score descending
     return ranked
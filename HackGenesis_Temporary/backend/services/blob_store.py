@@ -0,0 +1,130 @@
+import base64
+import hashlib
+import os
+import re
+import tempfile
+
+# Content-addressed image store: files live at BLOB_DIR/<ab>/<sha256>.
+# Identical uploads hash to the same file, so they are stored once.
+BLOB_DIR = os.environ.get("BLOB_DIR", "./blobs")
+CHUNK_SIZE = 64 * 1024
+MAX_BLOB_BYTES = int(os.environ.get("MAX_BLOB_BYTES", str(10 * 1024 * 1024)))
+
+# Enough leading bytes for sniff_mime to recognise every type it knows
+SNIFF_BYTES = 16
+
+_HASH_RE = re.compile(r"^[0-9a-f]{64}$")
+# sha256 of b"", left on disk by uploads from before empty ones were refused
+_EMPTY_HASH = hashlib.sha256(b"").hexdigest()
+_DATA_URL_RE = re.compile(r"^data:(?P<mime>[\w/+.-]+)?(?P<params>(;[^,;]+)*),", re.IGNORECASE)
+
+class BlobTooLarge(Exception):
+    pass
+
+class NotAnImage(Exception):
+    pass
+
+def is_valid_hash(blob_hash):
+    return bool(blob_hash) and bool(_HASH_RE.match(blob_hash))
+
+def blob_path(blob_hash):
+    return os.path.join(BLOB_DIR, blob_hash[:2], blob_hash)
+
+def has_blob(blob_hash):
+    return is_valid_hash(blob_hash) and blob_hash != _EMPTY_HASH and os.path.exists(blob_path(blob_hash))
+
+def _check_image(head):
+    # Empty or non-image blobs would be accepted as image_hash and then
+    # choke the thumbnail pipeline, so they're never stored
+    if not head:
+        raise NotAnImage("Empty upload")
+    if sniff_mime(head) == "application/octet-stream":
+        raise NotAnImage("Not a JPEG, PNG, GIF or WebP image")
+
+def _commit_temp(tmp_path, blob_hash):
+    # Rename is atomic, so readers never see a half-written blob
+    final = blob_path(blob_hash)
+    if os.path.exists(final):
+        os.remove(tmp_path)  # Duplicate upload
+    else:
+        os.makedirs(os.path.dirname(final), exist_ok=True)
+        os.replace(tmp_path, final)
+    return blob_hash
+
+def _temp_file():
+    os.makedirs(BLOB_DIR, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=BLOB_DIR, suffix=".part")
+    return os.fdopen(fd, "wb"), tmp_path
+
+def put_bytes(data: bytes):
+    """
+    Stores a blob and returns its sha256 hex digest.
+    """
+    if len(data) > MAX_BLOB_BYTES:
+        raise BlobTooLarge(f"Blob exceeds {MAX_BLOB_BYTES} bytes")
+    _check_image(data[:SNIFF_BYTES])
+    blob_hash = hashlib.sha256(data).hexdigest()
+    if has_blob(blob_hash):
+        return blob_hash
+    f, tmp_path = _temp_file()
+    with f:
+        f.write(data)
+    return _commit_temp(tmp_path, blob_hash)
+
+async def put_stream(chunks):
+    """
+    Streams an async iterable of byte chunks to disk while hashing, so the
+    upload never has to sit in memory. Returns (hash, size).
+    Raises NotAnImage (before anything is committed) for empty or
+    non-image uploads.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    head = b""
+    f, tmp_path = _temp_file()
+    try:
+        with f:
+            async for chunk in chunks:
+                if not chunk:
+                    continue
+                size += len(chunk)
+                if size > MAX_BLOB_BYTES:
+                    raise BlobTooLarge(f"Blob exceeds {MAX_BLOB_BYTES} bytes")
+                if len(head) < SNIFF_BYTES:
+                    head += chunk[:SNIFF_BYTES - len(head)]
+                digest.update(chunk)
+                f.write(chunk)
+        _check_image(head)
+    except Exception:
+        os.remove(tmp_path)
+        raise
+    return _commit_temp(tmp_path, digest.hexdigest()), size
+
+def decode_data_url(value: str):
+    """
+    Accepts a data URL ("data:image/png;base64,....") or bare base64.
+    Returns the raw bytes, or None for empty input.
+    """
+    if not value:
+        return None
+    match = _DATA_URL_RE.match(value)
+    payload = value[match.end():] if match else value
+    return base64.b64decode(payload)
+
+def sniff_mime(head: bytes):
+    if head.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if head[:6] in (b"GIF87a", b"GIF89a"):
+        return "image/gif"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    return "application/octet-stream"
+
+def blob_mime(blob_hash):
+    with open(blob_path(blob_hash), "rb") as f:
+        return sniff_mime(f.read(SNIFF_BYTES))
+
+def image_url(blob_hash):
+    return f"/images/{blob_hash}" if blob_hash else None
@@ -0,0 +1,30 @@
+from sqlalchemy import func
+from ..models import ChangeLog
+
+# Larger deltas than this are cheaper to send as a full page reload
+DELTA_MAX_ITEMS = 500
+
+def current_seq(db):
+    """Latest change sequence number (0 when nothing was ever logged)."""
+    return db.query(func.max(ChangeLog.seq)).scalar() or 0
+
+def oldest_seq(db):
+    """Oldest sequence still in the log; older cursors can't be served a delta."""
+    return db.query(func.min(ChangeLog.seq)).scalar() or 0
+
+def changed_entities(db, since, limit=DELTA_MAX_ITEMS):
+    """
+    Distinct entity ids changed after `since`, grouped by entity name:
+    {"post": [...], "aid_request": [...]}. Returns None if more than
+    `limit` entities changed (caller should fall back to a full reload).
+    """
+    rows = db.query(ChangeLog.entity, ChangeLog.entity_id).filter(
+        ChangeLog.seq > since
+    ).group_by(ChangeLog.entity, ChangeLog.entity_id).limit(limit + 1).all()
+    if len(rows) > limit:
+        return None
+
+    changes = {}
+    for entity, entity_id in rows:
+        changes.setdefault(entity, []).append(entity_id)
+    return changes
@@ -0,0 +1,82 @@
+import asyncio
+import time
+
+class TTLCache:
+    """
+    Small in-process cache for upstream feeds (asyncio).
+
+    - Fresh entries (age < ttl) are returned directly.
+    - Stale entries (ttl <= age < ttl + stale_ttl) are returned immediately
+      while one background task refreshes them (stale-while-revalidate).
+    - Missing / expired entries are fetched once: concurrent callers for the
+      same key await the same in-flight fetch (single-flight), so N users
+      cause one upstream request instead of N.
+    Failed fetches are not cached; every waiter sees the same exception.
+    `fetch` is a zero-argument callable returning an awaitable.
+    """
+
+    def __init__(self, max_entries=1024, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries = {}  # key -> (value, fetched_at, ttl, stale_ttl)
+        self._inflight = {}  # key -> asyncio.Future
+        self.stats = {"hits": 0, "stale_hits": 0, "misses": 0, "fetches": 0, "errors": 0}
+
+    async def get(self, key, fetch, ttl, stale_ttl=0):
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, fetched_at, _, _ = entry
+            age = self.clock() - fetched_at
+            if age < ttl:
+                self.stats["hits"] += 1
+                return value
+            if age < ttl + stale_ttl:
+                self.stats["stale_hits"] += 1
+                if key not in self._inflight:
+                    self._start_fetch(key, fetch, ttl, stale_ttl)
+                return value
+
+        self.stats["misses"] += 1
+        flight = self._inflight.get(key)
+        if flight is None:
+            flight = self._start_fetch(key, fetch, ttl, stale_ttl)
+        # shield: one caller timing out must not cancel the fetch for everyone else
+        return await asyncio.shield(flight)
+
+    def _start_fetch(self, key, fetch, ttl, stale_ttl):
+        task = asyncio.ensure_future(self._run_fetch(key, fetch, ttl, stale_ttl))
+        # Background refreshes may have no awaiter; mark their errors as retrieved
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        self._inflight[key] = task
+        return task
+
+    async def _run_fetch(self, key, fetch, ttl, stale_ttl):
+        try:
+            value = await fetch()
+            self.stats["fetches"] += 1
+            self._entries[key] = (value, self.clock(), ttl, stale_ttl)
+            self._evict()
+            return value
+        except Exception:
+            self.stats["errors"] += 1
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    def _evict(self):
+        # Drop dead entries first, then the oldest.
+        if len(self._entries) <= self.max_entries:
+            return
+        now = self.clock()
+        for key, (_, fetched_at, ttl, stale_ttl) in list(self._entries.items()):
+            if now - fetched_at >= ttl + stale_ttl:
+                del self._entries[key]
+        while len(self._entries) > self.max_entries:
+            oldest = min(self._entries, key=lambda k: self._entries[k][1])
+            del self._entries[oldest]
+
+    def clear(self):
+        self._entries.clear()
+
+# Shared by every request in this process
+feed_cache = TTLCache()
@@ -0,0 +1,240 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+import httpx
+from .http_client import get_json
+
+# Consecutive failures that open a provider's breaker
+FEED_FAILURE_THRESHOLD = int(os.environ.get("FEED_FAILURE_THRESHOLD", "3"))
+# Seconds an open breaker rejects calls before letting one probe through;
+# doubles after each failed probe, up to the max
+FEED_RESET_TIMEOUT = float(os.environ.get("FEED_RESET_TIMEOUT", "30"))
+FEED_MAX_RESET_TIMEOUT = float(os.environ.get("FEED_MAX_RESET_TIMEOUT", "600"))
+# Last-known-good documents, one JSON file per feed URL, plus a `<feed>.ok`
+# marker touched on every successful fetch. The markers are what workers
+# share: a worker that doesn't fetch a feed itself still sees its age.
+FEED_SNAPSHOT_DIR = os.environ.get("FEED_SNAPSHOT_DIR", "./feed_snapshots")
+# A feed is stale once it has missed this many of its scheduled refreshes
+FEED_STALE_INTERVALS = float(os.environ.get("FEED_STALE_INTERVALS", "3"))
+# Seconds between re-reads of the marker by is_stale()/status()
+FEED_MARKER_RECHECK = 5
+
+class CircuitOpen(Exception):
+    """Raised instead of calling a provider whose breaker is open."""
+
+class CircuitBreaker:
+    """
+    closed: calls go through; FEED_FAILURE_THRESHOLD failures in a row open it.
+    open: calls fail immediately (no network, no timeout) until reset_timeout passes.
+    half-open: exactly one probe call goes through; success closes the
+    breaker, failure re-opens it with a doubled timeout.
+    Single event loop only (no locking).
+    """
+
+    def __init__(self, failure_threshold=FEED_FAILURE_THRESHOLD, reset_timeout=FEED_RESET_TIMEOUT,
+                 max_reset_timeout=FEED_MAX_RESET_TIMEOUT, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.base_reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        self.clock = clock
+        self.state = "closed"
+        self.failures = 0
+        self.reset_timeout = reset_timeout
+        self._opened_at = None
+        self._probing = False
+        self.stats = {"calls": 0, "rejected": 0, "failures": 0, "opened": 0}
+
+    def allow(self):
+        if self.state == "open" and self.clock() - self._opened_at >= self.reset_timeout:
+            self.state = "half-open"
+        if self.state == "closed":
+            return True
+        if self.state == "half-open" and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def record_success(self):
+        self.state = "closed"
+        self.failures = 0
+        self.reset_timeout = self.base_reset_timeout
+        self._probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        self.stats["failures"] += 1
+        if self.state == "half-open":
+            # Failed probe: back off harder
+            self.reset_timeout = min(self.reset_timeout * 2, self.max_reset_timeout)
+            self._open()
+        elif self.state == "closed" and self.failures >= self.failure_threshold:
+            self._open()
+        self._probing = False
+
+    def _open(self):
+        self.state = "open"
+        self._opened_at = self.clock()
+        self.stats["opened"] += 1
+
+    async def call(self, fn):
+        """Awaits fn() under the breaker; raises CircuitOpen without calling it when open."""
+        if not self.allow():
+            self.stats["rejected"] += 1
+            raise CircuitOpen()
+        self.stats["calls"] += 1
+        try:
+            result = await fn()
+        except httpx.HTTPStatusError as e:
+            # 4xx means our request was wrong, not that the provider is down
+            if e.response.status_code == 429 or e.response.status_code >= 500:
+                self.record_failure()
+            else:
+                self.record_success()
+            raise
+        except BaseException:
+            # Includes cancellation (a caller's deadline), so a hung probe can't
+            # leave the breaker half-open forever
+            self.record_failure()
+            raise
+        self.record_success()
+        return result
+
+def _write_snapshot(path, document):
+    os.makedirs(FEED_SNAPSHOT_DIR, exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(document, f)
+    os.replace(tmp, path)
+
+def _touch(path, when):
+    os.makedirs(FEED_SNAPSHOT_DIR, exist_ok=True)
+    with open(path, "a"):
+        pass
+    os.utime(path, (when, when))
+
+class Feed:
+    """
+    One upstream provider: a circuit breaker plus last-known-good copies of
+    its documents (in memory and on disk, so they survive a restart).
+    """
+
+    def __init__(self, name, stale_after):
+        self.name = name
+        # Data older than this (seconds) is flagged stale in API responses;
+        # replaced once a fetcher declares its schedule (refreshed_every)
+        self.stale_after = stale_after
+        self.refresh_interval = None
+        self.breaker = CircuitBreaker()
+        self.last_success = self._newest_snapshot_time()  # epoch seconds, any worker
+        self.last_error = None
+        self._snapshots = {}  # url -> (document, fetched_at)
+        self._marker_checked = None
+
+    def refreshed_every(self, seconds):
+        """
+        Declares a fetcher that makes this feed answer every `seconds`. The
+        most frequent one counts: missing FEED_STALE_INTERVALS of its
+        refreshes makes the feed stale.
+        """
+        if self.refresh_interval is None or seconds < self.refresh_interval:
+            self.refresh_interval = seconds
+            self.stale_after = seconds * FEED_STALE_INTERVALS
+
+    def _path(self, url):
+        return os.path.join(FEED_SNAPSHOT_DIR, f"{self.name}__{hashlib.sha1(url.encode()).hexdigest()[:16]}.json")
+
+    def _marker(self):
+        return os.path.join(FEED_SNAPSHOT_DIR, f"{self.name}.ok")
+
+    def _newest_snapshot_time(self):
+        try:
+            times = [e.stat().st_mtime for e in os.scandir(FEED_SNAPSHOT_DIR)
+                     if e.name == f"{self.name}.ok" or (e.name.startswith(self.name + "__") and e.name.endswith(".json"))]
+        except OSError:
+            return None
+        return max(times) if times else None
+
+    def _refresh_last_success(self):
+        # Picks up successful fetches made by other workers
+        now = time.monotonic()
+        if self._marker_checked is not None and now - self._marker_checked < FEED_MARKER_RECHECK:
+            return
+        self._marker_checked = now
+        try:
+            mtime = os.path.getmtime(self._marker())
+        except OSError:
+            return
+        if self.last_success is None or mtime > self.last_success:
+            self.last_success = mtime
+
+    def _save(self, url, document, when):
+        if document is not None:
+            _write_snapshot(self._path(url), document)
+        _touch(self._marker(), when)
+
+    async def get_json(self, url, snapshot=True):
+        """
+        Fresh document via the breaker (raises on failure); with snapshot=True
+        it is also kept as the last-known-good copy of url.
+        """
+        try:
+            document = await self.breaker.call(lambda: get_json(url))
+        except CircuitOpen:
+            raise
+        except BaseException as e:
+            self.last_error = repr(e)
+            raise
+        now = time.time()
+        self.last_success = now
+        if snapshot:
+            self._snapshots[url] = (document, now)
+        try:
+            await asyncio.to_thread(self._save, url, document if snapshot else None, now)
+        except OSError as e:
+            print(f"Feed {self.name}: could not save snapshot: {e!r}")
+        return document
+
+    def last_known_good(self, url):
+        """(document, fetched_at) from the last successful fetch of url, or None."""
+        snapshot = self._snapshots.get(url)
+        if snapshot is None:
+            path = self._path(url)
+            try:
+                with open(path) as f:
+                    snapshot = (json.load(f), os.path.getmtime(path))
+            except (OSError, ValueError):
+                return None
+            self._snapshots[url] = snapshot
+        return snapshot
+
+    def is_stale(self):
+        self._refresh_last_success()
+        return self.last_success is None or time.time() - self.last_success > self.stale_after
+
+    def status(self):
+        self._refresh_last_success()
+        age = None if self.last_success is None else round(time.time() - self.last_success, 1)
+        return {
+            "breaker": self.breaker.state,
+            "stale": self.is_stale(),
+            "age_s": age,
+            "stale_after_s": self.stale_after,
+            "last_error": self.last_error,
+            **self.breaker.stats,
+        }
+
+# stale_after is a fallback: ingestion and the trend collector declare
+# their schedules with refreshed_every() when they are imported
+FEEDS = {
+    "usgs": Feed("usgs", stale_after=300),
+    "open-meteo": Feed("open-meteo", stale_after=900),
+    "open-meteo-marine": Feed("open-meteo-marine", stale_after=2 * 3600),
+}
+
+def stale_feeds(names=None):
+    return [name for name in (names or FEEDS) if FEEDS[name].is_stale()]
+
+def feed_status():
+    return {name: feed.status() for name, feed in FEEDS.items()}
@@ -0,0 +1,297 @@
+import asyncio
+import hashlib
+import json
+import os
+import random
+import struct
+import threading
+import time
+import numpy as np
+from sqlalchemy import event
+from sqlalchemy.orm import Session, load_only, object_session
+from ..database import SessionLocal
+from ..models import Alert, Post, get_ist_time
+from ..ai_logic import generate_heatmap_data
+from ..utils.geo import grid_cell
+from ..utils.severity import severity_weight
+
+# Same seed -> same coastline baseline on every process and restart
+HEATMAP_SEED = int(os.environ.get("HEATMAP_SEED", "26"))
+# How often the snapshot is re-encoded from the density grid (seconds)
+HEATMAP_REFRESH = float(os.environ.get("HEATMAP_REFRESH", "30"))
+HEATMAP_REFRESH_ENABLED = os.environ.get("HEATMAP_REFRESH_ENABLED", "1") == "1"
+# How often the grid is rebuilt from the database, to pick up writes from
+# other processes (rescore.py, scripts); in-process writes apply immediately
+HEATMAP_RECONCILE = float(os.environ.get("HEATMAP_RECONCILE", "3600"))
+# Synthetic coastline layer: "auto" = only while there are no located reports
+HEATMAP_BASELINE = os.environ.get("HEATMAP_BASELINE", "auto")
+
+# Density layer: reports are binned into cells of this size (degrees)
+DENSITY_CELL_DEG = 0.5
+# Decayed weight at which a cell reaches full intensity
+DENSITY_SATURATION = 200.0
+# A report counts half after this long (seconds)
+HEATMAP_HALF_LIFE = float(os.environ.get("HEATMAP_HALF_LIFE", str(24 * 3600)))
+# Cells fainter than this are left out of the snapshot
+MIN_INTENSITY = 0.01
+# Posts with a zero risk score still register on the map
+MIN_POST_WEIGHT = 5
+# Rebase the decay landmark before 2^exponent gets anywhere near overflow
+REBASE_EXPONENT = 500
+
+# Binary layout (little endian): uint32 count, float32 lat[count], float32 lon[count],
+# uint8 intensity[count] (0-255 -> 0.0-1.0)
+BIN_HEADER = struct.Struct("<I")
+BIN_MEDIA_TYPE = "application/octet-stream"
+# Clients may reuse a copy briefly, then revalidate with If-None-Match
+HEATMAP_CACHE_CONTROL = "public, max-age=60"
+
+class HeatmapSnapshot:
+    """
+    One immutable heatmap, encoded once in both wire formats.
+    The ETag is derived from the content, so it only changes when the points do.
+    """
+
+    def __init__(self, points):
+        self.points = points
+        arr = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        self.bin = (
+            BIN_HEADER.pack(len(arr))
+            + arr[:, 0].astype("<f4").tobytes()
+            + arr[:, 1].astype("<f4").tobytes()
+            + np.clip(np.rint(arr[:, 2] * 255), 0, 255).astype(np.uint8).tobytes()
+        )
+        self.json = json.dumps(points, separators=(",", ":")).encode()
+        self.etag = '"hm-' + hashlib.sha256(self.bin).hexdigest()[:20] + '"'
+
+def decode_bin(data: bytes):
+    """Inverse of the binary format (used by tooling and checks)."""
+    (count,) = BIN_HEADER.unpack_from(data)
+    offset = BIN_HEADER.size
+    lats = np.frombuffer(data, "<f4", count, offset)
+    lons = np.frombuffer(data, "<f4", count, offset + 4 * count)
+    intensity = np.frombuffer(data, np.uint8, count, offset + 8 * count) / 255.0
+    return lats, lons, intensity
+
+def baseline_points():
+    """Synthetic coastline layer, reproducible via HEATMAP_SEED."""
+    return [[round(lat, 4), round(lon, 4), round(i, 3)]
+            for lat, lon, i in generate_heatmap_data(random.Random(HEATMAP_SEED))]
+
+def post_contribution(post):
+    """
+    (lat, lon, weight, time) an open, located post adds to the heatmap, or None.
+    """
+    if post.lat is None or post.lon is None or post.status not in ("Open", None):
+        return None
+    return post.lat, post.lon, max(post.risk_score or 0, MIN_POST_WEIGHT), post.created_at or get_ist_time()
+
+def alert_contribution(alert):
+    if alert.lat is None or alert.lon is None:
+        return None
+    return alert.lat, alert.lon, severity_weight(alert.severity), alert.created_at or get_ist_time()
+
+CONTRIBUTIONS = {Post: ("post", post_contribution), Alert: ("alert", alert_contribution)}
+
+class DensityGrid:
+    """
+    Report density per DENSITY_CELL_DEG cell with exponential time decay,
+    updated one report at a time.
+
+    Forward decay: a report of weight w at time t is stored as
+    w * 2^((t - landmark) / half_life), so stored sums never need touching as
+    time passes; reading scales them by 2^(-(now - landmark) / half_life).
+    Each report's stored contribution is remembered so an update or delete
+    subtracts exactly what it added.
+    """
+
+    def __init__(self, half_life_s=HEATMAP_HALF_LIFE, cell_deg=DENSITY_CELL_DEG):
+        self.half_life_s = half_life_s
+        self.cell_deg = cell_deg
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self, landmark=None):
+        with self._lock:
+            self._landmark = landmark or get_ist_time()
+            # cell -> [weight, weight * lat, weight * lon, reports]
+            self._cells = {}
+            # (entity, id) -> (cell, weight, lat, lon)
+            self._reports = {}
+            self.changes = 0
+
+    def _forward(self, when):
+        exponent = (when - self._landmark).total_seconds() / self.half_life_s
+        if exponent > REBASE_EXPONENT:
+            # Keep the stored numbers finite: move the landmark to `when`
+            self._rebase(when)
+            exponent = 0.0
+        return 2.0 ** exponent
+
+    def _rebase(self, when):
+        scale = 2.0 ** (-(when - self._landmark).total_seconds() / self.half_life_s)
+        for sums in self._cells.values():
+            sums[0] *= scale
+            sums[1] *= scale
+            sums[2] *= scale
+        self._reports = {k: (c, w * scale, a, o) for k, (c, w, a, o) in self._reports.items()}
+        self._landmark = when
+
+    def _remove(self, key):
+        old = self._reports.pop(key, None)
+        if old is None:
+            return
+        cell, w, lat, lon = old
+        sums = self._cells[cell]
+        sums[0] -= w
+        sums[1] -= w * lat
+        sums[2] -= w * lon
+        sums[3] -= 1
+        if sums[3] == 0:
+            del self._cells[cell]
+
+    def apply(self, key, contribution):
+        """Sets report `key` to `contribution` ((lat, lon, weight, time) or None = gone)."""
+        with self._lock:
+            self._remove(key)
+            if contribution is not None:
+                lat, lon, weight, when = contribution
+                w = weight * self._forward(when)
+                cell = grid_cell(lat, lon, self.cell_deg)
+                sums = self._cells.setdefault(cell, [0.0, 0.0, 0.0, 0])
+                sums[0] += w
+                sums[1] += w * lat
+                sums[2] += w * lon
+                sums[3] += 1
+                self._reports[key] = (cell, w, lat, lon)
+            self.changes += 1
+
+    def points(self, now=None):
+        """[[lat, lon, intensity], ...] at each cell's weighted centre, decayed to `now`."""
+        with self._lock:
+            now = now or get_ist_time()
+            decay = 2.0 ** (-(now - self._landmark).total_seconds() / self.half_life_s)
+            points = []
+            for total, lat_sum, lon_sum, _ in self._cells.values():
+                intensity = min(1.0, total * decay / DENSITY_SATURATION)
+                if total <= 0 or intensity < MIN_INTENSITY:
+                    continue
+                points.append([round(lat_sum / total, 4), round(lon_sum / total, 4), round(intensity, 3)])
+            return points
+
+    def __len__(self):
+        return len(self._reports)
+
+density_grid = DensityGrid()
+
+def rebuild_density(db):
+    """
+    Full pass over posts and alerts. Only used at startup and for the
+    periodic reconcile that picks up writes made outside this process.
+    """
+    density_grid.clear()
+    post_q = db.query(Post).options(load_only(
+        Post.id, Post.lat, Post.lon, Post.status, Post.risk_score, Post.created_at
+    )).filter(Post.lat != None, Post.lon != None)
+    for post in post_q.yield_per(1000):
+        density_grid.apply(("post", post.id), post_contribution(post))
+    alert_q = db.query(Alert).options(load_only(
+        Alert.id, Alert.lat, Alert.lon, Alert.severity, Alert.created_at
+    )).filter(Alert.lat != None, Alert.lon != None)
+    for alert in alert_q.yield_per(1000):
+        density_grid.apply(("alert", alert.id), alert_contribution(alert))
+
+def build_snapshot():
+    density = density_grid.points()
+    if HEATMAP_BASELINE == "always" or (HEATMAP_BASELINE == "auto" and not density):
+        return HeatmapSnapshot(_baseline + density)
+    return HeatmapSnapshot(density)
+
+_baseline = baseline_points()
+_snapshot = None
+_last_reconcile = None
+
+def get_heatmap():
+    """Current snapshot; built on first use, then only by refresh_heatmap()."""
+    global _snapshot
+    if _snapshot is None:
+        refresh_heatmap(reconcile=True)
+    return _snapshot
+
+def refresh_heatmap(reconcile=False):
+    """
+    Re-encodes the snapshot from the in-memory grid (cheap: one pass over cells).
+    With reconcile=True the grid is first rebuilt from the database.
+    """
+    global _snapshot, _last_reconcile
+    if reconcile:
+        db = SessionLocal()
+        try:
+            rebuild_density(db)
+        finally:
+            db.close()
+        _last_reconcile = time.monotonic()
+    fresh = build_snapshot()
+    # Keep the old object when nothing changed so the ETag stays stable
+    if _snapshot is None or fresh.etag != _snapshot.etag:
+        _snapshot = fresh
+    return _snapshot
+
+# --- Incremental updates ---
+# Mapper events capture each changed report's new contribution at flush time;
+# the grid is only touched once the transaction commits.
+
+_PENDING_KEY = "heatmap_pending"
+
+def _queue_report(deleted):
+    def listener(mapper, connection, target):
+        session = object_session(target)
+        if session is None:
+            return
+        entity, contribution = CONTRIBUTIONS[type(target)]
+        value = None if deleted else contribution(target)
+        session.info.setdefault(_PENDING_KEY, []).append(((entity, target.id), value))
+    return listener
+
+for _model in CONTRIBUTIONS:
+    event.listen(_model, "after_insert", _queue_report(False))
+    event.listen(_model, "after_update", _queue_report(False))
+    event.listen(_model, "after_delete", _queue_report(True))
+
+@event.listens_for(Session, "after_commit")
+def _apply_pending(session):
+    for key, contribution in session.info.pop(_PENDING_KEY, ()):
+        density_grid.apply(key, contribution)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session):
+    session.info.pop(_PENDING_KEY, None)
+
+async def heatmap_loop(interval=HEATMAP_REFRESH):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            reconcile = _last_reconcile is None or time.monotonic() - _last_reconcile >= HEATMAP_RECONCILE
+            await asyncio.to_thread(refresh_heatmap, reconcile)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Heatmap refresh failed: {e!r}")
+
+_task = None
+
+def start_heatmap_refresh():
+    global _task
+    if HEATMAP_REFRESH_ENABLED and _task is None:
+        _task = asyncio.create_task(heatmap_loop())
+    return _task
+
+async def stop_heatmap_refresh():
+    global _task
+    if _task is not None:
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+        _task = None
@@ -0,0 +1,30 @@
+import httpx
+
+# One keep-alive pool for every upstream call in this process, so repeated
+# requests to Open-Meteo / USGS reuse TCP+TLS connections instead of
+# handshaking each time.
+POOL_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=30)
+DEFAULT_TIMEOUT = httpx.Timeout(5.0, connect=3.0)
+
+_client = None
+
+def get_http_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(limits=POOL_LIMITS, timeout=DEFAULT_TIMEOUT)
+    return _client
+
+async def get_json(url, timeout=None):
+    """
+    GET a JSON document through the shared pool. Raises on HTTP errors.
+    """
+    client = get_http_client()
+    response = await client.get(url, timeout=timeout if timeout is not None else DEFAULT_TIMEOUT)
+    response.raise_for_status()
+    return response.json()
+
+async def close_http_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
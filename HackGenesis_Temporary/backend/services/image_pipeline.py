@@ -0,0 +1,101 @@
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image, ImageOps
+from ..database import SessionLocal
+from ..models import Post, record_change
+from .blob_store import put_bytes, blob_path
+
+# Derived sizes: longest edge in px, JPEG quality.
+# Lists show "thumb", the feed/detail cards "medium", the original is fetched on demand.
+THUMB_SIZE, THUMB_QUALITY = 320, 70
+MEDIUM_SIZE, MEDIUM_QUALITY = 1024, 80
+
+# Pillow releases the GIL while decoding/resizing, so threads give real parallelism
+IMAGE_WORKERS = int(os.environ.get("IMAGE_WORKERS", "2"))
+_pool = None
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        _pool = ThreadPoolExecutor(max_workers=IMAGE_WORKERS, thread_name_prefix="image")
+    return _pool
+
+def _encode_jpeg(img, quality):
+    buf = io.BytesIO()
+    img.save(buf, format="JPEG", quality=quality, optimize=True, progressive=True)
+    return buf.getvalue()
+
+def make_variants(data: bytes):
+    """
+    Decodes the upload once and derives both sizes from that single decode.
+    Returns {"thumb": hash, "medium": hash}.
+    """
+    with Image.open(io.BytesIO(data)) as img:
+        img = ImageOps.exif_transpose(img)
+        if img.mode in ("RGBA", "LA", "P"):
+            # JPEG has no alpha: flatten onto white
+            img = img.convert("RGBA")
+            background = Image.new("RGB", img.size, (255, 255, 255))
+            background.paste(img, mask=img.split()[-1])
+            img = background
+        else:
+            img = img.convert("RGB")
+
+        # thumbnail() never upscales, so small uploads just get re-encoded
+        medium = img.copy()
+        medium.thumbnail((MEDIUM_SIZE, MEDIUM_SIZE), Image.LANCZOS)
+        # Shrinking from the medium copy is much cheaper than from the original
+        thumb = medium.copy()
+        thumb.thumbnail((THUMB_SIZE, THUMB_SIZE), Image.LANCZOS)
+
+    return {
+        "thumb": put_bytes(_encode_jpeg(thumb, THUMB_QUALITY)),
+        "medium": put_bytes(_encode_jpeg(medium, MEDIUM_QUALITY)),
+    }
+
+def process_post_image(post_id, image_hash, data=None):
+    db = SessionLocal()
+    try:
+        # Same image already processed for another post? Reuse its variants.
+        done = db.query(Post.thumb_hash, Post.medium_hash).filter(
+            Post.image_hash == image_hash, Post.thumb_hash != None
+        ).first()
+        if done:
+            variants = {"thumb": done.thumb_hash, "medium": done.medium_hash}
+        else:
+            if data is None:
+                with open(blob_path(image_hash), "rb") as f:
+                    data = f.read()
+            variants = make_variants(data)
+
+        db.query(Post).filter(Post.id == post_id).update(
+            {"thumb_hash": variants["thumb"], "medium_hash": variants["medium"]},
+            synchronize_session=False
+        )
+        # Bulk update skips mapper events; the dashboard still needs to see the thumbnail
+        record_change(db.connection(), "post", post_id, "update")
+        db.commit()
+        return variants
+    finally:
+        db.close()
+
+def _run_job(post_id, image_hash, data):
+    try:
+        process_post_image(post_id, image_hash, data)
+    except Exception as e:
+        # Undecodable / unsupported images keep only the original
+        print(f"Image processing failed for post {post_id}: {e!r}")
+
+def submit_post_image(post_id, image_hash, data=None):
+    """
+    Queues variant generation off the request thread.
+    Pass the already-decoded upload bytes to skip re-reading the blob.
+    """
+    return _get_pool().submit(_run_job, post_id, image_hash, data)
+
+def shutdown_image_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
@@ -0,0 +1,241 @@
+import asyncio
+import os
+import time
+from datetime import datetime, timedelta
+from ..database import SessionLocal
+from ..models import Alert, alert_expiry, get_ist_time
+from .feed_guard import FEEDS
+from .live_data import (
+    get_quake_store, get_current_weather, classify_wind, quake_severity,
+    WEATHER_DEADLINE, USGS_DEADLINE, WEATHER_TTL, USGS_TTL
+)
+from .stations import MONITORED_STATIONS
+
+# Poll interval (seconds). The USGS summary feed refreshes every minute.
+INGEST_INTERVAL = float(os.environ.get("INGEST_INTERVAL", "60"))
+INGEST_ENABLED = os.environ.get("INGEST_ENABLED", "1") == "1"
+
+# Each run re-fetches a feed once its cache entry has expired. Declared even
+# when this worker doesn't ingest: whichever worker does keeps them fresh.
+FEEDS["usgs"].refreshed_every(max(INGEST_INTERVAL, USGS_TTL))
+FEEDS["open-meteo"].refreshed_every(max(INGEST_INTERVAL, WEATHER_TTL))
+
+# Keep IN (...) lists well under SQLite's bound-parameter limit
+ID_CHUNK = 500
+
+IST_OFFSET = timedelta(hours=5, minutes=30)
+
+# Exposed via GET /alerts/ingestion-stats
+ingestion_stats = {
+    "runs": 0,
+    "errors": 0,
+    "last_run_at": None,
+    "last_duration_s": None,
+    "last_inserted": 0,
+    "last_updated": 0,
+    "last_removed": 0,
+    "total_rows_written": 0,
+    "rows_per_sec": None,
+    # Seconds between the newest upstream event and the moment it was stored
+    "ingestion_lag_s": None,
+}
+
+def _to_ist(epoch_ms):
+    # Same naive-IST convention as models.get_ist_time
+    return datetime.utcfromtimestamp(epoch_ms / 1000.0) + IST_OFFSET
+
+def quake_rows(store):
+    """
+    Parsed USGS feed (QuakeStore) -> Alert column dicts keyed by a stable external id.
+    """
+    rows = []
+    for i, quake_id in enumerate(store.ids):
+        if not quake_id:
+            continue
+        mag = round(float(store.mags[i]), 2)
+        place = store.places[i]
+        event_ms = int(store.times[i])
+        alert_type = "Tsunami" if mag > 6.5 and store.tsunami[i] == 1 else "Earthquake"
+        created_at = _to_ist(event_ms) if event_ms else None
+        rows.append({
+            "external_id": f"usgs:{quake_id}",
+            "location": place,
+            "lat": float(store.lats[i]),
+            "lon": float(store.lons[i]),
+            "title": f"Earthquake - Magnitude {mag}",
+            "message": f"Detected {place}.",
+            "severity": quake_severity(mag),
+            # USGS flags oceanic events with tsunami potential
+            "alert_type": alert_type,
+            "source": "USGS Real-time Feed",
+            "created_at": created_at,
+            # Valid from the event itself, not from when we first saw it
+            "expires_at": alert_expiry(alert_type, created_at) if created_at else None,
+        })
+    return rows
+
+def weather_row(station, current):
+    """
+    One alert per station while the wind is above advisory level, else None.
+    """
+    alert = classify_wind(current.get('windspeed', 0))
+    if not alert:
+        return None
+    return {
+        "external_id": f"openmeteo:{station['key']}:wind",
+        "location": station["name"],
+        "lat": station["lat"],
+        "lon": station["lon"],
+        "title": alert["title"],
+        "message": alert["message"],
+        "severity": alert["severity"],
+        "alert_type": alert["type"],
+        "source": alert["source"],
+        # Renewed while the wind stays up; lapses if the feed goes quiet
+        "expires_at": alert_expiry(alert["type"], get_ist_time()),
+    }
+
+async def _deadline(coro, seconds):
+    try:
+        return await asyncio.wait_for(coro, seconds)
+    except Exception as e:
+        return e
+
+async def collect_once():
+    """
+    Pulls every provider concurrently.
+    Returns (rows_to_upsert, external_ids_to_remove, newest_event_time).
+    """
+    results = await asyncio.gather(
+        _deadline(get_quake_store(), USGS_DEADLINE),
+        # No last-known-good weather here: a stale reading must not raise or
+        # clear a station's wind alert
+        *(_deadline(get_current_weather(s["lat"], s["lon"], allow_stale=False), WEATHER_DEADLINE)
+          for s in MONITORED_STATIONS)
+    )
+    quakes, weather = results[0], results[1:]
+
+    rows, cleared = [], []
+    newest_event = None
+    if isinstance(quakes, Exception):
+        print(f"Ingestion: USGS fetch failed: {quakes!r}")
+    else:
+        rows.extend(quake_rows(quakes))
+        newest_ms = quakes.newest_time()
+        if newest_ms:
+            newest_event = newest_ms / 1000.0
+
+    for station, current in zip(MONITORED_STATIONS, weather):
+        if isinstance(current, Exception):
+            # Unknown state: leave whatever is stored for this station alone
+            print(f"Ingestion: weather fetch failed for {station['key']}: {current!r}")
+            continue
+        row = weather_row(station, current)
+        if row:
+            rows.append(row)
+        else:
+            cleared.append(f"openmeteo:{station['key']}:wind")
+
+    return rows, cleared, newest_event
+
+def store_alerts(rows, cleared_ids):
+    """
+    Upserts rows by external_id and deletes cleared ones in one transaction.
+    Returns (inserted, updated, removed).
+    """
+    inserted = updated = removed = 0
+    db = SessionLocal()
+    try:
+        ids = [r["external_id"] for r in rows]
+        existing = {}
+        for i in range(0, len(ids), ID_CHUNK):
+            for a in db.query(Alert).filter(Alert.external_id.in_(ids[i:i + ID_CHUNK])):
+                existing[a.external_id] = a
+
+        now = get_ist_time()
+        for r in rows:
+            if r.get("expires_at") is not None and r["expires_at"] <= now:
+                # Past its window (e.g. an old quake still in the feed): it was
+                # or will be archived, don't bring it back
+                continue
+            alert = existing.get(r["external_id"])
+            if alert is None:
+                fields = {k: v for k, v in r.items() if v is not None}
+                db.add(Alert(**fields))
+                inserted += 1
+                continue
+            changed = False
+            for k, v in r.items():
+                if k == "created_at" or v is None:
+                    continue
+                if k == "expires_at" and alert.expires_at is not None and alert.expires_at - now > (v - now) / 2:
+                    # Renew once half the window is used up, not on every poll
+                    # (each update is pushed to subscribers)
+                    continue
+                if getattr(alert, k) != v:
+                    setattr(alert, k, v)
+                    changed = True
+            updated += changed
+
+        for i in range(0, len(cleared_ids), ID_CHUNK):
+            # Per-row ORM delete (only a handful of station alerts) so mapper
+            # events see it, e.g. the heatmap density grid
+            for alert in db.query(Alert).filter(Alert.external_id.in_(cleared_ids[i:i + ID_CHUNK])):
+                db.delete(alert)
+                removed += 1
+
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+    return inserted, updated, removed
+
+async def run_ingestion_cycle():
+    start = time.perf_counter()
+    rows, cleared, newest_event = await collect_once()
+    inserted, updated, removed = await asyncio.to_thread(store_alerts, rows, cleared)
+    duration = time.perf_counter() - start
+
+    written = inserted + updated + removed
+    stats = ingestion_stats
+    stats["runs"] += 1
+    stats["last_run_at"] = datetime.utcnow().isoformat() + "Z"
+    stats["last_duration_s"] = round(duration, 3)
+    stats["last_inserted"] = inserted
+    stats["last_updated"] = updated
+    stats["last_removed"] = removed
+    stats["total_rows_written"] += written
+    stats["rows_per_sec"] = round(len(rows) / duration, 1) if duration > 0 else None
+    if newest_event is not None:
+        stats["ingestion_lag_s"] = round(time.time() - newest_event, 1)
+
+async def ingestion_loop(interval=INGEST_INTERVAL):
+    while True:
+        try:
+            await run_ingestion_cycle()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            ingestion_stats["errors"] += 1
+            print(f"Ingestion cycle failed: {e!r}")
+        await asyncio.sleep(interval)
+
+_task = None
+
+def start_ingestion():
+    global _task
+    if INGEST_ENABLED and _task is None:
+        _task = asyncio.create_task(ingestion_loop())
+    return _task
+
+async def stop_ingestion():
+    global _task
+    if _task is not None:
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+        _task = None
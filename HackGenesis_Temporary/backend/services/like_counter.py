@@ -0,0 +1,162 @@
+import asyncio
+import os
+import threading
+import zlib
+from sqlalchemy import text
+from ..database import engine
+
+# Independent counter shards (each with its own lock) so concurrent likes on
+# different posts rarely wait on each other
+LIKE_SHARDS = int(os.environ.get("LIKE_SHARDS", "16"))
+# How often pending increments are written to the database (seconds)
+LIKE_FLUSH_INTERVAL = float(os.environ.get("LIKE_FLUSH_INTERVAL", "1.0"))
+# Persisted counts remembered per shard before the shard's cache is dropped
+LIKE_CACHE_SIZE = int(os.environ.get("LIKE_CACHE_SIZE", "10000"))
+
+_INCREMENT = text("UPDATE posts SET likes = COALESCE(likes, 0) + :n WHERE id = :id")
+_READ = text("SELECT likes FROM posts WHERE id = :id")
+
+class _Shard:
+    def __init__(self):
+        self.lock = threading.Lock()
+        # post id -> likes not yet written
+        self.pending = {}
+        # post id -> likes as last read from the database (plus increments being flushed)
+        self.stored = {}
+
+class LikeCounter:
+    """
+    Likes are counted in memory and written in bulk.
+    A like only bumps a number in its post's shard; every LIKE_FLUSH_INTERVAL
+    the pending increments are swapped out and written with one executemany
+    `likes = likes + :n`, so concurrent likes are never lost and a click never
+    loads the post row. Current counts are served as stored + pending.
+    """
+
+    def __init__(self, shards=LIKE_SHARDS, bind=engine):
+        self.bind = bind
+        self._shards = [_Shard() for _ in range(shards)]
+        # Serializes flushes (the loop, shutdown, explicit calls)
+        self._flush_lock = threading.Lock()
+        self.stats = {"likes": 0, "flushes": 0, "rows_written": 0}
+
+    def _shard(self, post_id):
+        return self._shards[zlib.crc32(post_id.encode()) % len(self._shards)]
+
+    def _stored(self, shard, post_id):
+        """Stored count for post_id (from cache or one indexed read), or None if no such post."""
+        with shard.lock:
+            stored = shard.stored.get(post_id)
+        if stored is not None:
+            return stored
+        # Read with no flush in progress, so the row and the cache agree
+        with self._flush_lock:
+            with shard.lock:
+                stored = shard.stored.get(post_id)
+            if stored is not None:
+                return stored
+            with self.bind.connect() as conn:
+                row = conn.execute(_READ, {"id": post_id}).first()
+            if row is None:
+                return None
+            with shard.lock:
+                if len(shard.stored) >= LIKE_CACHE_SIZE:
+                    shard.stored.clear()
+                shard.stored[post_id] = row[0] or 0
+                return shard.stored[post_id]
+
+    def add(self, post_id, n=1):
+        """Counts n likes; returns the post's current count, or None if it doesn't exist."""
+        shard = self._shard(post_id)
+        stored = self._stored(shard, post_id)
+        if stored is None:
+            return None
+        with shard.lock:
+            pending = shard.pending.get(post_id, 0) + n
+            shard.pending[post_id] = pending
+            self.stats["likes"] += n
+            return shard.stored.get(post_id, stored) + pending
+
+    def pending(self, post_id):
+        """Likes on post_id not yet in the database (add to a freshly read count)."""
+        shard = self._shard(post_id)
+        with shard.lock:
+            return shard.pending.get(post_id, 0)
+
+    def count(self, post_id):
+        shard = self._shard(post_id)
+        stored = self._stored(shard, post_id)
+        if stored is None:
+            return None
+        with shard.lock:
+            return shard.stored.get(post_id, stored) + shard.pending.get(post_id, 0)
+
+    def flush(self):
+        """Writes all pending increments in one transaction; returns the number of posts touched."""
+        with self._flush_lock:
+            batches = []
+            for shard in self._shards:
+                with shard.lock:
+                    if shard.pending:
+                        batches.append((shard, shard.pending))
+                        shard.pending = {}
+                        # Counted as stored right away so reads never dip mid-flush
+                        for post_id, n in batches[-1][1].items():
+                            if post_id in shard.stored:
+                                shard.stored[post_id] += n
+            if not batches:
+                return 0
+            params = [{"id": post_id, "n": n} for _, pending in batches for post_id, n in pending.items()]
+            try:
+                with self.bind.begin() as conn:
+                    conn.execute(_INCREMENT, params)
+            except Exception:
+                # Move the increments back to pending so the next flush retries them
+                for shard, pending in batches:
+                    with shard.lock:
+                        for post_id, n in pending.items():
+                            shard.pending[post_id] = shard.pending.get(post_id, 0) + n
+                            if post_id in shard.stored:
+                                shard.stored[post_id] -= n
+                raise
+            # Re-read these on their next like, so likes flushed by other API
+            # workers sharing the database show up too
+            for shard, pending in batches:
+                with shard.lock:
+                    for post_id in pending:
+                        shard.stored.pop(post_id, None)
+            self.stats["flushes"] += 1
+            self.stats["rows_written"] += len(params)
+            return len(params)
+
+like_counter = LikeCounter()
+
+async def like_flush_loop(interval=LIKE_FLUSH_INTERVAL):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(like_counter.flush)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Like flush failed: {e!r}")
+
+_task = None
+
+def start_like_flush():
+    global _task
+    if _task is None:
+        _task = asyncio.create_task(like_flush_loop())
+    return _task
+
+async def stop_like_flush():
+    """Stops the loop and writes whatever is still pending."""
+    global _task
+    if _task is not None:
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+        _task = None
+    await asyncio.to_thread(like_counter.flush)
@@ -1,106 +1,112 @@
-import requests
+import os
 import datetime
-from math import radians, sin, cos, sqrt, atan2
+from .feed_cache import feed_cache
+from .feed_guard import FEEDS
+from .quake_store import QuakeStore
 
-def fetch_weather_alerts(lat, lon):
+# Upstream endpoints (overridable, e.g. to point at a local stub server)
+OPEN_METEO_URL = os.environ.get("OPEN_METEO_URL", "https://api.open-meteo.com/v1/forecast")
+USGS_FEED_URL = os.environ.get("USGS_FEED_URL", "https://earthquake.usgs.gov/earthquakes/feed/v1.0/summary/2.5_day.geojson")
+
+# Cache policy (seconds). USGS regenerates its summary feeds every minute.
+WEATHER_TTL = 300
+WEATHER_STALE_TTL = 600
+USGS_TTL = 60
+USGS_STALE_TTL = 300
+
+# Per-provider deadlines: a slow provider is dropped, it never delays the others
+WEATHER_DEADLINE = 3
+USGS_DEADLINE = 4
+
+# Weather is cached per grid cell so nearby users share one upstream call
+WEATHER_GRID_DEG = 0.25
+
+def _weather_cell(lat, lon):
+    # Snap to the centre of the cell so every user in it gets identical data
+    return (
+        round((lat // WEATHER_GRID_DEG) * WEATHER_GRID_DEG + WEATHER_GRID_DEG / 2, 4),
+        round((lon // WEATHER_GRID_DEG) * WEATHER_GRID_DEG + WEATHER_GRID_DEG / 2, 4),
+    )
+
+async def get_current_weather(lat, lon, allow_stale=True):
     """
-    Fetches real-time weather data from Open-Meteo and generates alerts based on thresholds.
+    Current weather for the grid cell containing (lat, lon), via the shared cache.
+    If Open-Meteo is failing (or its breaker is open) the last-known-good
+    reading is returned instead, unless allow_stale=False.
     """
-    alerts = []
+    cell_lat, cell_lon = _weather_cell(lat, lon)
+    url = f"{OPEN_METEO_URL}?latitude={cell_lat}&longitude={cell_lon}&current_weather=true&hourly=precipitation,wave_height&daily=windspeed_10m_max&timezone=auto"
+    feed = FEEDS["open-meteo"]
+
+    async def fetch():
+        return (await feed.get_json(url)).get('current_weather', {})
+
     try:
-        # Fetch current weather + forecast
-        url = f"https://api.open-meteo.com/v1/forecast?latitude={lat}&longitude={lon}&current_weather=true&hourly=precipitation,wave_height&daily=windspeed_10m_max&timezone=auto"
-        response = requests.get(url, timeout=5)
-        if response.status_code == 200:
-            data = response.json()
-            current = data.get('current_weather', {})
-            
-            # 1. Wind Analysis
-            wind_speed = current.get('windspeed', 0) # km/h
-            if wind_speed > 60:
-                alerts.append({
-                    "title": "Severe Gale Warning",
-                    "message": f"Dangerous wind speeds of {wind_speed} km/h detected. Avoid coastal areas.",
-                    "severity": "High",
-                    "type": "Cyclone",
-                    "source": "Open-Meteo Weather API"
-                })
-            elif wind_speed > 40:
-                alerts.append({
-                    "title": "Strong Wind Advisory",
-                    "message": f"High winds of {wind_speed} km/h. Small vessels should stay in port.",
-                    "severity": "Medium",
-                    "type": "Weather",
-                    "source": "Open-Meteo Weather API"
-                })
-                
-            # 2. Wave Height (if available in hourly for current hour)
-            # Not always available for all coords, but let's try
-            # (Simple heuristic if specific marine data isn't easily accessible without paid API)
-            
-    except Exception as e:
-        print(f"Error fetching weather: {e}")
-        
-    return alerts
+        return await feed_cache.get(
+            ("weather", cell_lat, cell_lon),
+            fetch,
+            ttl=WEATHER_TTL, stale_ttl=WEATHER_STALE_TTL
+        )
+    except Exception:
+        snapshot = feed.last_known_good(url) if allow_stale else None
+        if snapshot is None:
+            raise
+        return snapshot[0].get('current_weather', {})
+
+# Parsed last-known-good USGS feed: (fetched_at, QuakeStore)
+_lkg_quakes = (None, None)
 
-def fetch_earthquake_alerts(lat, lon, radius_km=1000):
+async def get_quake_store(allow_stale=True):
     """
-    Fetches recent significant earthquakes from USGS within a large radius.
+    The global USGS feed is the same for every caller, so it is fetched and
+    parsed into a QuakeStore once per refresh. Falls back to the
+    last-known-good feed like get_current_weather.
     """
-    alerts = []
-    try:
-        # USGS GeoJSON Feed (M2.5+ in last 24h) - Good balance
-        url = "https://earthquake.usgs.gov/earthquakes/feed/v1.0/summary/2.5_day.geojson"
-        response = requests.get(url, timeout=5)
-        
-        if response.status_code == 200:
-            features = response.json().get('features', [])
-            
-            for f in features:
-                props = f['properties']
-                geo = f['geometry']['coordinates'] # lon, lat, depth
-                
-                eq_lon, eq_lat = geo[0], geo[1]
-                mag = props.get('mag', 0)
-                place = props.get('place', 'Unknown')
-                
-                # Calculate distance
-                dist = haversine_distance(lat, lon, eq_lat, eq_lon)
-                
-                if dist < radius_km:
-                    # Relevance check
-                    severity = "Low"
-                    if mag > 6.0: severity = "High"
-                    elif mag > 4.5: severity = "Medium"
-                    
-                    # Create Alert
-                    alerts.append({
-                        "title": f"Earthquake - Magnitude {mag}",
-                        "message": f"Detected {place}. Distance: {int(dist)}km.",
-                        "severity": severity,
-                        "type": "Tsunami" if mag > 6.5 and dist < 200 else "Earthquake",
-                        "source": "USGS Real-time Feed",
-                        "lat": eq_lat,
-                        "lon": eq_lon
-                    })
-                    
-    except Exception as e:
-        print(f"Error fetching earthquakes: {e}")
-        
-    return alerts[:5] # Return top 5 nearest
+    global _lkg_quakes
+    feed = FEEDS["usgs"]
 
-def haversine_distance(lat1, lon1, lat2, lon2):
-    R = 6371  # Earth radius in km
-    dlat = radians(lat2 - lat1)
-    dlon = radians(lon2 - lon1)
-    a = sin(dlat / 2)**2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlon / 2)**2
-    c = 2 * atan2(sqrt(a), sqrt(1 - a))
-    return R * c
+    async def fetch():
+        features = (await feed.get_json(USGS_FEED_URL)).get('features', [])
+        return QuakeStore.from_geojson(features)
 
-def get_real_time_alerts(lat, lon):
+    try:
+        return await feed_cache.get(
+            ("usgs", USGS_FEED_URL),
+            fetch,
+            ttl=USGS_TTL, stale_ttl=USGS_STALE_TTL
+        )
+    except Exception:
+        snapshot = feed.last_known_good(USGS_FEED_URL) if allow_stale else None
+        if snapshot is None:
+            raise
+        document, fetched_at = snapshot
+        if _lkg_quakes[0] != fetched_at:
+            _lkg_quakes = (fetched_at, QuakeStore.from_geojson(document.get('features', [])))
+        return _lkg_quakes[1]
+
+def classify_wind(wind_speed):
     """
-    Aggregates alerts from all real-time providers.
+    Turns a wind speed (km/h) into an alert dict, or None below advisory level.
     """
-    weather = fetch_weather_alerts(lat, lon)
-    quakes = fetch_earthquake_alerts(lat, lon)
-    return weather + quakes
+    if wind_speed > 60:
+        return {
+            "title": "Severe Gale Warning",
+            "message": f"Dangerous wind speeds of {wind_speed} km/h detected. Avoid coastal areas.",
+            "severity": "High",
+            "type": "Cyclone",
+            "source": "Open-Meteo Weather API"
+        }
+    elif wind_speed > 40:
+        return {
+            "title": "Strong Wind Advisory",
+            "message": f"High winds of {wind_speed} km/h. Small vessels should stay in port.",
+            "severity": "Medium",
+            "type": "Weather",
+            "source": "Open-Meteo Weather API"
+        }
+    return None
+
+def quake_severity(mag):
+    if mag > 6.0: return "High"
+    elif mag > 4.5: return "Medium"
+    return "Low"
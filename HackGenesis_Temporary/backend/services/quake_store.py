@@ -0,0 +1,48 @@
+import numpy as np
+
+class QuakeStore:
+    """
+    One parsed snapshot of a USGS GeoJSON feed.
+
+    Parsed once per refresh into compact column arrays that ingestion
+    walks to upsert quake alerts; users query those alerts, not the store.
+    """
+
+    def __init__(self, ids, places, lats, lons, mags, times, tsunami):
+        self.ids = ids
+        self.places = places
+        self.lats = lats
+        self.lons = lons
+        self.mags = mags
+        self.times = times  # epoch ms
+        self.tsunami = tsunami
+
+    @classmethod
+    def from_geojson(cls, features):
+        ids, places, lats, lons, mags, times, tsunami = [], [], [], [], [], [], []
+        for f in features:
+            props = f.get('properties') or {}
+            coords = (f.get('geometry') or {}).get('coordinates') or []
+            if len(coords) < 2:
+                continue
+            ids.append(f.get('id') or props.get('code'))
+            places.append(props.get('place') or 'Unknown')
+            lons.append(coords[0])
+            lats.append(coords[1])
+            mags.append(props.get('mag') or 0)
+            times.append(props.get('time') or 0)
+            tsunami.append(props.get('tsunami') or 0)
+        return cls(
+            ids, places,
+            np.asarray(lats, dtype=np.float64),
+            np.asarray(lons, dtype=np.float64),
+            np.asarray(mags, dtype=np.float32),
+            np.asarray(times, dtype=np.int64),
+            np.asarray(tsunami, dtype=np.int8),
+        )
+
+    def __len__(self):
+        return len(self.ids)
+
+    def newest_time(self):
+        return int(self.times.max()) if len(self.times) else None
@@ -0,0 +1,310 @@
+import asyncio
+import math
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import event, func, literal, select
+from sqlalchemy.orm import Session, object_session
+from ..database import engine
+from ..models import ARCHIVE_TABLES, Alert, AidRequest, ChangeLog, Comment, Post, get_ist_time, lock_change_log
+from .heatmap import density_grid
+
+# Expiry wheel: one slot per tick (seconds); 240 x 30 s = 2 h per turn
+EXPIRY_TICK = float(os.environ.get("EXPIRY_TICK", "30"))
+EXPIRY_SLOTS = 240
+RETENTION_ENABLED = os.environ.get("RETENTION_ENABLED", "1") == "1"
+# Full retention pass (sweep + archiving + change_log pruning), seconds
+RETENTION_INTERVAL = float(os.environ.get("RETENTION_INTERVAL", "3600"))
+# Resolved/dismissed reports untouched this long leave the hot tables
+POST_RETENTION_DAYS = float(os.environ.get("POST_RETENTION_DAYS", "7"))
+AID_RETENTION_DAYS = float(os.environ.get("AID_RETENTION_DAYS", "7"))
+# Dashboard cursors older than this get {"reset": true} instead of a delta
+CHANGE_LOG_RETENTION_DAYS = float(os.environ.get("CHANGE_LOG_RETENTION_DAYS", "3"))
+# Rows per archive transaction (keeps the write lock short)
+ARCHIVE_CHUNK = 500
+
+ARCHIVED_POST_STATUSES = ("Resolved", "Dismissed")
+ARCHIVED_AID_STATUSES = ("Resolved",)
+
+# Exposed via GET /alerts/retention-stats
+retention_stats = {
+    "scheduled": 0,
+    "expired_on_time": 0,
+    "runs": 0,
+    "errors": 0,
+    "last_run_at": None,
+    "last_duration_s": None,
+    "alerts_archived": 0,
+    "posts_archived": 0,
+    "aid_requests_archived": 0,
+    "change_log_pruned": 0,
+}
+
+_EPOCH = datetime(2000, 1, 1)
+
+class TimerWheel:
+    """
+    Hashed timer wheel over naive-IST datetimes. A timer lands in slot
+    (tick % slots) with its absolute tick; advancing visits only the slots
+    between the last tick and now, and fires the entries that are due
+    (later turns of the wheel stay put). Rescheduling a key replaces its
+    old timer. Thread-safe: commits from worker threads schedule timers.
+    """
+
+    def __init__(self, tick_s=EXPIRY_TICK, slots=EXPIRY_SLOTS):
+        self.tick_s = tick_s
+        self._slots = [dict() for _ in range(slots)]
+        self._ticks = {}  # key -> tick it is scheduled for
+        self._current = None
+        self._lock = threading.Lock()
+
+    def _tick(self, when):
+        return math.ceil((when - _EPOCH).total_seconds() / self.tick_s)
+
+    def __len__(self):
+        return len(self._ticks)
+
+    def schedule(self, key, when):
+        with self._lock:
+            self._cancel(key)
+            tick = self._tick(when)
+            if self._current is not None and tick <= self._current:
+                # Already due: fire on the next advance
+                tick = self._current + 1
+            self._slots[tick % len(self._slots)][key] = tick
+            self._ticks[key] = tick
+
+    def cancel(self, key):
+        with self._lock:
+            self._cancel(key)
+
+    def _cancel(self, key):
+        tick = self._ticks.pop(key, None)
+        if tick is not None:
+            self._slots[tick % len(self._slots)].pop(key, None)
+
+    def advance(self, now):
+        """Keys whose time has come since the last call."""
+        with self._lock:
+            target = self._tick(now)
+            if self._current is None:
+                self._current = target - 1
+            if target <= self._current:
+                return []
+            # A long gap (e.g. the loop was blocked) wraps: every slot once
+            steps = min(target - self._current, len(self._slots))
+            due = []
+            for tick in range(target - steps + 1, target + 1):
+                slot = self._slots[tick % len(self._slots)]
+                fired = [key for key, at in slot.items() if at <= target]
+                for key in fired:
+                    del slot[key]
+                    del self._ticks[key]
+                due.extend(fired)
+            self._current = target
+            return due
+
+expiry_wheel = TimerWheel()
+
+# --- Scheduling on commit ---
+# Same pattern as services/alert_push: collect in the flush, apply once durable.
+
+_PENDING_KEY = "expiry_pending"
+
+def _queue_expiry(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(_PENDING_KEY, []).append((target.id, target.expires_at))
+
+event.listen(Alert, "after_insert", _queue_expiry)
+event.listen(Alert, "after_update", _queue_expiry)
+
+@event.listens_for(Session, "after_commit")
+def _schedule_pending(session):
+    for alert_id, expires_at in session.info.pop(_PENDING_KEY, ()):
+        if expires_at is None:
+            expiry_wheel.cancel(alert_id)
+        else:
+            expiry_wheel.schedule(alert_id, expires_at)
+        retention_stats["scheduled"] += 1
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session):
+    session.info.pop(_PENDING_KEY, None)
+
+def load_expiry_wheel():
+    """Schedules every active alert (startup; later ones arrive via commits)."""
+    with engine.connect() as conn:
+        rows = conn.execute(select(Alert.id, Alert.expires_at).where(Alert.expires_at.is_not(None))).all()
+    for alert_id, expires_at in rows:
+        expiry_wheel.schedule(alert_id, expires_at)
+    return len(rows)
+
+# --- Archiving ---
+
+def _log_deletes(conn, entity, ids):
+    # Core deletes skip the mapper events that normally fill change_log
+    lock_change_log(conn)
+    now = get_ist_time()
+    conn.execute(ChangeLog.__table__.insert(), [
+        {"entity": entity, "entity_id": str(i), "op": "delete", "changed_at": now} for i in ids
+    ])
+
+def _copy_to_archive(conn, table, where, now):
+    archive = ARCHIVE_TABLES[table.name]
+    names = [c.name for c in archive.c if c.name != "archived_at"]
+    conn.execute(archive.insert().from_select(
+        names + ["archived_at"],
+        select(*(table.c[n] for n in names), literal(now, archive.c.archived_at.type)).where(where),
+    ))
+
+def archive_rows(table, where, before_delete=None, chunk=ARCHIVE_CHUNK):
+    """
+    Moves rows of `table` matching `where` into its archive table, `chunk`
+    rows per transaction (copy + delete together, so a row is never in
+    both or neither). before_delete(conn, ids) runs inside each chunk.
+    Returns the moved ids.
+    """
+    moved = []
+    while True:
+        now = get_ist_time()
+        with engine.begin() as conn:
+            ids = conn.execute(select(table.c.id).where(where).order_by(table.c.id).limit(chunk)).scalars().all()
+            if not ids:
+                break
+            _copy_to_archive(conn, table, table.c.id.in_(ids), now)
+            if before_delete is not None:
+                before_delete(conn, ids)
+            conn.execute(table.delete().where(table.c.id.in_(ids)))
+        moved.extend(ids)
+        if len(ids) < chunk:
+            break
+    return moved
+
+def _forget_alerts(ids):
+    for alert_id in ids:
+        density_grid.apply(("alert", alert_id), None)
+
+def archive_expired_alerts(ids=None):
+    """
+    Archives alerts past expires_at: just `ids` (fired timers) or all of
+    them. The SQL re-checks expiry, so a timer that fires after the alert
+    was renewed (or already archived by another process) is a no-op.
+    """
+    alerts = Alert.__table__
+    where = alerts.c.expires_at <= get_ist_time()
+    if ids is None:
+        moved = archive_rows(alerts, where)
+    else:
+        moved = []
+        for i in range(0, len(ids), ARCHIVE_CHUNK):
+            moved.extend(archive_rows(alerts, where & alerts.c.id.in_(ids[i:i + ARCHIVE_CHUNK])))
+    _forget_alerts(moved)
+    retention_stats["alerts_archived"] += len(moved)
+    return moved
+
+def _archive_comments(conn, post_ids):
+    comments = Comment.__table__
+    where = comments.c.post_id.in_(post_ids)
+    _copy_to_archive(conn, comments, where, get_ist_time())
+    conn.execute(comments.delete().where(where))
+
+def archive_resolved_posts(days=POST_RETENTION_DAYS):
+    posts = Post.__table__
+    cutoff = get_ist_time() - timedelta(days=days)
+
+    def before_delete(conn, ids):
+        _archive_comments(conn, ids)
+        _log_deletes(conn, "post", ids)
+
+    moved = archive_rows(posts, posts.c.status.in_(ARCHIVED_POST_STATUSES)
+                         & (func.coalesce(posts.c.updated_at, posts.c.created_at) < cutoff), before_delete)
+    for post_id in moved:
+        density_grid.apply(("post", post_id), None)
+    retention_stats["posts_archived"] += len(moved)
+    return moved
+
+def archive_resolved_aid_requests(days=AID_RETENTION_DAYS):
+    aid = AidRequest.__table__
+    cutoff = get_ist_time() - timedelta(days=days)
+    moved = archive_rows(aid, aid.c.status.in_(ARCHIVED_AID_STATUSES)
+                         & (func.coalesce(aid.c.updated_at, aid.c.timestamp) < cutoff),
+                         lambda conn, ids: _log_deletes(conn, "aid_request", ids))
+    retention_stats["aid_requests_archived"] += len(moved)
+    return moved
+
+def prune_change_log(days=CHANGE_LOG_RETENTION_DAYS, chunk=ARCHIVE_CHUNK):
+    """
+    Drops old change_log rows. The newest row is always kept: the log's
+    max(seq) is the dashboard cursor, and an emptied SQLite table would
+    hand out old sequence numbers again.
+    """
+    log = ChangeLog.__table__
+    cutoff = get_ist_time() - timedelta(days=days)
+    total = 0
+    while True:
+        with engine.begin() as conn:
+            newest = conn.execute(select(func.max(log.c.seq))).scalar()
+            if newest is None:
+                break
+            seqs = conn.execute(select(log.c.seq).where(
+                log.c.changed_at < cutoff, log.c.seq < newest
+            ).order_by(log.c.seq).limit(chunk)).scalars().all()
+            if seqs:
+                conn.execute(log.delete().where(log.c.seq.in_(seqs)))
+        total += len(seqs)
+        if len(seqs) < chunk:
+            break
+    retention_stats["change_log_pruned"] += total
+    return total
+
+def run_retention():
+    start = time.perf_counter()
+    archive_expired_alerts()
+    archive_resolved_posts()
+    archive_resolved_aid_requests()
+    prune_change_log()
+    stats = retention_stats
+    stats["runs"] += 1
+    stats["last_run_at"] = datetime.utcnow().isoformat() + "Z"
+    stats["last_duration_s"] = round(time.perf_counter() - start, 3)
+
+# --- Background task ---
+
+async def retention_loop(tick=EXPIRY_TICK, interval=RETENTION_INTERVAL):
+    await asyncio.to_thread(load_expiry_wheel)
+    last_run = None
+    while True:
+        try:
+            due = expiry_wheel.advance(get_ist_time())
+            if due:
+                moved = await asyncio.to_thread(archive_expired_alerts, due)
+                retention_stats["expired_on_time"] += len(moved)
+            if last_run is None or time.monotonic() - last_run >= interval:
+                last_run = time.monotonic()
+                await asyncio.to_thread(run_retention)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            retention_stats["errors"] += 1
+            print(f"Retention failed: {e!r}")
+        await asyncio.sleep(tick)
+
+_task = None
+
+def start_retention():
+    global _task
+    if RETENTION_ENABLED and _task is None:
+        _task = asyncio.create_task(retention_loop())
+    return _task
+
+async def stop_retention():
+    global _task
+    if _task is not None:
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+        _task = None
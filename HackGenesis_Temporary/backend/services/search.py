@@ -0,0 +1,189 @@
+import html
+import re
+from itertools import zip_longest
+from datetime import datetime
+from sqlalchemy import text
+
+# Searchable text per result type: column -> weight class (A counts most).
+# SQLite: FTS5 external-content tables `<table>_fts`, kept in sync by
+# triggers. PostgreSQL: a GIN expression index over the weighted tsvector.
+SEARCH_INDEXES = {
+    "post": {
+        "table": "posts",
+        # posts.id is a string, so the FTS row is tied to the implicit rowid
+        "rowid": "rowid",
+        "columns": {"caption": "A", "location": "B", "description": "C"},
+        "fields": "id, caption AS title, location, status, created_at",
+    },
+    "alert": {
+        "table": "alerts",
+        "rowid": "id",
+        "columns": {"title": "A", "message": "C"},
+        "fields": "id, title, location, severity, alert_type, created_at",
+    },
+    "aid_request": {
+        "table": "aid_requests",
+        "rowid": "id",
+        "columns": {"needs": "A", "location": "B", "description": "C"},
+        "fields": "id, needs AS title, location, status, urgency, timestamp AS created_at",
+    },
+}
+SEARCH_TYPES = tuple(SEARCH_INDEXES)
+
+# FTS5 bm25 column weights matching the PostgreSQL weight classes
+BM25_WEIGHTS = {"A": 4.0, "B": 2.0, "C": 1.0, "D": 0.5}
+TS_CONFIG = "english"
+
+# Query terms beyond this are ignored
+MAX_TERMS = 8
+# The last term also matches as a prefix (search-as-you-type) from this length
+MIN_PREFIX = 3
+# Words of context in each snippet
+SNIPPET_TOKENS = 16
+# Highlight markers: control characters can't occur in the escaped text, so
+# they're swapped for <mark> only after the snippet is HTML-escaped
+_OPEN, _CLOSE = "\x02", "\x03"
+
+# --- Index DDL (used by the migration) ---
+
+def _fts(spec):
+    return f"{spec['table']}_fts"
+
+def _fts5_ddl(spec):
+    table, fts, rowid = spec["table"], _fts(spec), spec["rowid"]
+    cols = list(spec["columns"])
+    col_list = ", ".join(cols)
+    new_vals = ", ".join(f"new.{c}" for c in cols)
+    old_vals = ", ".join(f"old.{c}" for c in cols)
+    delete = f"INSERT INTO {fts}({fts}, rowid, {col_list}) VALUES ('delete', old.{rowid}, {old_vals});"
+    insert = f"INSERT INTO {fts}(rowid, {col_list}) VALUES (new.{rowid}, {new_vals});"
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({col_list}, content='{table}', "
+        f"content_rowid='{rowid}', tokenize='porter unicode61')",
+        # Index everything already in the table (also repairs a stale index)
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN {insert} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN {delete} END",
+        # Only edits to the searchable text touch the index (not likes, status, ...)
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {col_list} ON {table} BEGIN {delete} {insert} END",
+    ]
+
+def _tsvector(spec):
+    # Must stay byte-for-byte identical between the index and the queries
+    return " || ".join(
+        f"setweight(to_tsvector('{TS_CONFIG}', coalesce({col}, '')), '{weight}')"
+        for col, weight in spec["columns"].items()
+    )
+
+def create_search_indexes(conn):
+    """Builds the full-text indexes (idempotent; SQLite needs FTS5, which stock builds have)."""
+    for spec in SEARCH_INDEXES.values():
+        if conn.dialect.name == "sqlite":
+            for statement in _fts5_ddl(spec):
+                conn.exec_driver_sql(statement)
+        elif conn.dialect.name == "postgresql":
+            conn.exec_driver_sql(
+                f"CREATE INDEX IF NOT EXISTS ix_{spec['table']}_search ON {spec['table']} USING gin (({_tsvector(spec)}))"
+            )
+        else:
+            print(f"Search: no full-text index for {conn.dialect.name}")
+            return
+
+# --- Queries ---
+
+def query_terms(q):
+    return re.findall(r"\w+", q.lower())[:MAX_TERMS]
+
+def fts5_query(terms):
+    """Terms -> FTS5 MATCH string: every term required, quoted so nothing in it is syntax."""
+    parts = [f'"{t}"' for t in terms]
+    if len(terms[-1]) >= MIN_PREFIX:
+        parts[-1] += "*"
+    return " ".join(parts)
+
+def ts_query(terms):
+    parts = list(terms)
+    if len(terms[-1]) >= MIN_PREFIX:
+        parts[-1] += ":*"
+    return " & ".join(parts)
+
+def highlight(snippet):
+    """HTML-escaped snippet with matches wrapped in <mark>."""
+    if snippet is None:
+        return None
+    return html.escape(snippet).replace(_OPEN, "<mark>").replace(_CLOSE, "</mark>")
+
+def _sqlite_sql(spec):
+    table, fts, rowid = spec["table"], _fts(spec), spec["rowid"]
+    weights = ", ".join(str(BM25_WEIGHTS[w]) for w in spec["columns"].values())
+    # Every match is ranked (O(matches): a word in a quarter of a million
+    # posts takes a few hundred ms). Ordering by FTS5's own rank column sorts
+    # inside FTS5, so snippet() and the join only run for the page
+    return f"""
+        SELECT {spec['fields']}, hit.snippet, -hit.rank AS score
+        FROM (
+            SELECT rowid, rank, snippet({fts}, -1, :open, :close, '…', :tokens) AS snippet
+            FROM {fts} WHERE {fts} MATCH :q AND rank MATCH 'bm25({weights})'
+            ORDER BY rank LIMIT :limit
+        ) AS hit
+        JOIN {table} ON {table}.{rowid} = hit.rowid
+        ORDER BY hit.rank
+    """
+
+def _postgres_sql(spec):
+    table = spec["table"]
+    document = "concat_ws(' … ', " + ", ".join(spec["columns"]) + ")"
+    # Same shape as SQLite: rank every match from the GIN index, then
+    # headline only the page
+    return f"""
+        SELECT {spec['fields']}, ts_headline('{TS_CONFIG}', {document}, q, :options) AS snippet, score
+        FROM (
+            SELECT {table}.*, q, ts_rank({_tsvector(spec)}, q) AS score
+            FROM {table}, to_tsquery('{TS_CONFIG}', :q) AS q
+            WHERE ({_tsvector(spec)}) @@ q
+            ORDER BY score DESC LIMIT :limit
+        ) AS {table}
+        ORDER BY score DESC
+    """
+
+async def search(db, q, types=SEARCH_TYPES, limit=20, offset=0):
+    """
+    Ranked matches for q across `types`, best first: each type's top
+    offset+limit+1 are interleaved by rank (each type's best, then each
+    type's second, ...), then the page is sliced out. Scores come from
+    separate indexes with their own statistics, so they're only compared
+    within a type.
+    Returns (results, has_more).
+    """
+    terms = query_terms(q)
+    if not terms:
+        return [], False
+    dialect = db.bind.dialect.name
+    want = offset + limit + 1
+    if dialect == "sqlite":
+        params = {"q": fts5_query(terms), "open": _OPEN, "close": _CLOSE, "tokens": SNIPPET_TOKENS}
+    elif dialect == "postgresql":
+        params = {
+            "q": ts_query(terms),
+            "options": f"StartSel={_OPEN}, StopSel={_CLOSE}, MaxWords={SNIPPET_TOKENS}, MinWords={SNIPPET_TOKENS // 2}",
+        }
+    else:
+        raise RuntimeError(f"Full-text search is not supported on {dialect}")
+
+    ranked = []
+    for name in dict.fromkeys(types):
+        spec = SEARCH_INDEXES[name]
+        sql = _sqlite_sql(spec) if dialect == "sqlite" else _postgres_sql(spec)
+        rows = await db.execute(text(sql), {**params, "limit": want})
+        hits = []
+        for row in rows.mappings():
+            hit = {"type": name, **row}
+            hit["snippet"] = highlight(hit["snippet"])
+            if isinstance(hit["created_at"], str):
+                # Raw SQLite text
+                hit["created_at"] = datetime.fromisoformat(hit["created_at"])
+            hits.append(hit)
+        ranked.append(hits)
+
+    hits = [hit for tier in zip_longest(*ranked) for hit in tier if hit is not None]
+    return hits[offset:offset + limit], len(hits) > offset + limit
@@ -0,0 +1,20 @@
+from ..utils.geo import haversine
+
+# Coastal monitoring stations polled by the background collectors.
+# Same hotspots the simulated alert generator in ai_logic uses.
+MONITORED_STATIONS = [
+    {"key": "mumbai", "name": "Mumbai Coast", "lat": 19.0760, "lon": 72.8777},
+    {"key": "goa_north", "name": "North Goa", "lat": 15.2993, "lon": 74.1240},
+    {"key": "kochi", "name": "Coastal Kerala", "lat": 9.9312, "lon": 76.2673},
+    {"key": "chennai", "name": "Chennai", "lat": 13.0827, "lon": 80.2707},
+    {"key": "puri", "name": "Puri", "lat": 19.8135, "lon": 85.8312},
+    {"key": "surat", "name": "Gujarat Coast (Surat)", "lat": 21.1702, "lon": 72.8311},
+    {"key": "surat_dumas", "name": "Surat Beach (Dumas)", "lat": 21.0688, "lon": 72.7231},
+    {"key": "andaman", "name": "Andaman", "lat": 11.7401, "lon": 92.6586},
+]
+
+STATIONS_BY_KEY = {s["key"]: s for s in MONITORED_STATIONS}
+
+def nearest_station(lat, lon):
+    """The monitored station closest to (lat, lon)."""
+    return min(MONITORED_STATIONS, key=lambda s: haversine(lat, lon, s["lat"], s["lon"]))
@@ -0,0 +1,283 @@
+import asyncio
+import math
+import os
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from ..database import engine
+from ..models import TrendDaily, TrendHourly, get_ist_time
+from ..utils.geo import haversine_np
+from .feed_guard import FEEDS
+from .live_data import OPEN_METEO_URL
+from .quake_store import QuakeStore
+from .stations import MONITORED_STATIONS
+
+MARINE_URL = os.environ.get("MARINE_URL", "https://marine-api.open-meteo.com/v1/marine")
+# The week feed lets a collector that was down for a few days catch up on quakes
+TRENDS_USGS_URL = os.environ.get(
+    "TRENDS_USGS_URL", "https://earthquake.usgs.gov/earthquakes/feed/v1.0/summary/4.5_week.geojson"
+)
+# Span the USGS feed covers; older hours have no quake reading (NULL, not 0)
+TRENDS_USGS_WINDOW = timedelta(days=7)
+
+# Collector schedule (seconds). Open-Meteo data is hourly.
+TRENDS_INTERVAL = float(os.environ.get("TRENDS_INTERVAL", "3600"))
+TRENDS_ENABLED = os.environ.get("TRENDS_ENABLED", "1") == "1"
+# Hourly refresh of every feed the collector reads (the only one reading marine data)
+for _feed in ("open-meteo-marine", "open-meteo", "usgs"):
+    FEEDS[_feed].refreshed_every(TRENDS_INTERVAL)
+# History pulled for a station with no stored readings (Open-Meteo's past_days limit)
+TRENDS_BACKFILL_DAYS = 92
+# Quakes this close to a station count towards its tsunami trend
+TRENDS_QUAKE_RADIUS_KM = float(os.environ.get("TRENDS_QUAKE_RADIUS_KM", "3000"))
+TRENDS_DEADLINE = 10
+# Stations are all on the Indian coast; readings are stored in naive IST like the rest of the DB
+TRENDS_TIMEZONE = "Asia%2FKolkata"
+
+# /trends/data ranges and the point budget before downsampling kicks in
+TRENDS_MAX_DAYS = 365
+TRENDS_MAX_HOURLY_DAYS = 14
+TRENDS_MAX_POINTS = 120
+
+# Exposed via GET /trends/collector-stats
+collector_stats = {
+    "runs": 0,
+    "errors": 0,
+    "last_run_at": None,
+    "last_duration_s": None,
+    "last_hours_written": 0,
+    "last_days_rolled_up": 0,
+    "failed_sources": [],
+}
+
+# --- Collecting ---
+
+def _hourly_url(base, variable, station, past_days):
+    return (
+        f"{base}?latitude={station['lat']}&longitude={station['lon']}&hourly={variable}"
+        f"&past_days={past_days}&forecast_days=1&timezone={TRENDS_TIMEZONE}"
+    )
+
+async def _fetch(feed, url):
+    # Exceptions are returned (not raised) so one failing source keeps the others.
+    # No last-known-good fallback: the store itself is the last known good.
+    try:
+        return await asyncio.wait_for(FEEDS[feed].get_json(url, snapshot=False), TRENDS_DEADLINE)
+    except Exception as e:
+        return e
+
+def hourly_series(data, variable):
+    """Open-Meteo `hourly` block -> {hour: value}, gaps dropped."""
+    hourly = data.get("hourly") or {}
+    return {
+        datetime.fromisoformat(t): float(v)
+        for t, v in zip(hourly.get("time", []), hourly.get(variable, []))
+        if v is not None
+    }
+
+def quake_hours(store, lat, lon, radius_km=TRENDS_QUAKE_RADIUS_KM):
+    """{hour (naive IST): strongest magnitude} for quakes within radius_km."""
+    if not len(store):
+        return {}
+    near = haversine_np(lat, lon, store.lats, store.lons) < radius_km
+    hours = {}
+    for mag, ms in zip(store.mags[near].tolist(), store.times[near].tolist()):
+        hour = (datetime.utcfromtimestamp(ms / 1000.0) + timedelta(hours=5, minutes=30)).replace(
+            minute=0, second=0, microsecond=0
+        )
+        hours[hour] = max(hours.get(hour, 0.0), round(mag, 2))
+    return hours
+
+def station_rows(station, waves, winds, quakes, quakes_since, now):
+    """
+    trend_hourly rows for every hour any source reported, up to now.
+    A source that failed this round contributes None, which the upsert
+    treats as "keep the stored value".
+    """
+    hours = set(waves) | set(winds)
+    if quakes is not None:
+        hours |= set(quakes)
+    rows = []
+    for hour in sorted(h for h in hours if h <= now):
+        if quakes is None or hour < quakes_since:
+            quake = None
+        else:
+            quake = quakes.get(hour, 0.0)
+        rows.append({
+            "station": station["key"], "hour": hour,
+            "wave_height": waves.get(hour), "wind_speed": winds.get(hour), "quake_mag": quake,
+        })
+    return rows
+
+def _upsert(conn, table, rows, keys, keep_existing):
+    """
+    INSERT ... ON CONFLICT DO UPDATE (SQLite and PostgreSQL share the syntax).
+    keep_existing: NULLs in `rows` don't overwrite stored values.
+    """
+    insert = postgresql.insert if conn.dialect.name == "postgresql" else sqlite.insert
+    stmt = insert(table)
+    updates = {
+        c.name: func.coalesce(stmt.excluded[c.name], c) if keep_existing else stmt.excluded[c.name]
+        for c in table.c if c.name not in keys
+    }
+    conn.execute(stmt.on_conflict_do_update(index_elements=keys, set_=updates), rows)
+
+def _rollup_days(conn, station, first_day, last_day):
+    """Recomputes trend_daily for [first_day, last_day] from the hourly rows."""
+    hourly = TrendHourly.__table__
+    rows = conn.execute(select(hourly.c.hour, hourly.c.wave_height, hourly.c.wind_speed, hourly.c.quake_mag).where(
+        hourly.c.station == station,
+        hourly.c.hour >= datetime.combine(first_day, datetime.min.time()),
+        hourly.c.hour < datetime.combine(last_day + timedelta(days=1), datetime.min.time()),
+    ))
+    days = {}
+    for hour, wave, wind, quake in rows:
+        acc = days.setdefault(hour.date(), [None, None, None])
+        for i, value in enumerate((wave, wind, quake)):
+            if value is not None and (acc[i] is None or value > acc[i]):
+                acc[i] = value
+    if days:
+        _upsert(conn, TrendDaily.__table__, [
+            {"station": station, "day": day, "wave_height_max": w, "wind_speed_max": s, "quake_mag_max": q}
+            for day, (w, s, q) in days.items()
+        ], ["station", "day"], keep_existing=False)
+    return len(days)
+
+def store_trends(rows_by_station):
+    """Upserts hourly rows and re-rolls the days they touch, in one transaction."""
+    hours = days = 0
+    with engine.begin() as conn:
+        for station, rows in rows_by_station.items():
+            if not rows:
+                continue
+            _upsert(conn, TrendHourly.__table__, rows, ["station", "hour"], keep_existing=True)
+            hours += len(rows)
+            days += _rollup_days(conn, station, rows[0]["hour"].date(), rows[-1]["hour"].date())
+    return hours, days
+
+def last_stored_hours():
+    """{station: newest stored hour}"""
+    with engine.connect() as conn:
+        return dict(conn.execute(
+            select(TrendHourly.station, func.max(TrendHourly.hour)).group_by(TrendHourly.station)
+        ).all())
+
+def _past_days(last_hour, now):
+    if last_hour is None:
+        return TRENDS_BACKFILL_DAYS
+    # Re-read the last stored day too; Open-Meteo revises recent hours
+    return max(1, min(TRENDS_BACKFILL_DAYS, math.ceil((now - last_hour) / timedelta(days=1)) + 1))
+
+async def collect_trends():
+    start = time.perf_counter()
+    now = get_ist_time()
+    last = await asyncio.to_thread(last_stored_hours)
+
+    urls = []
+    for station in MONITORED_STATIONS:
+        past_days = _past_days(last.get(station["key"]), now)
+        urls.append(("open-meteo-marine", _hourly_url(MARINE_URL, "wave_height", station, past_days)))
+        urls.append(("open-meteo", _hourly_url(OPEN_METEO_URL, "windspeed_10m", station, past_days)))
+    results = await asyncio.gather(_fetch("usgs", TRENDS_USGS_URL), *(_fetch(f, u) for f, u in urls))
+
+    failed = []
+    usgs = results[0]
+    if isinstance(usgs, Exception):
+        failed.append("usgs")
+        store = None
+    else:
+        store = QuakeStore.from_geojson(usgs.get("features", []))
+
+    rows_by_station = {}
+    for i, station in enumerate(MONITORED_STATIONS):
+        marine, weather = results[1 + 2 * i], results[2 + 2 * i]
+        waves, winds = {}, {}
+        if isinstance(marine, Exception):
+            failed.append(f"marine:{station['key']}")
+        else:
+            waves = hourly_series(marine, "wave_height")
+        if isinstance(weather, Exception):
+            failed.append(f"wind:{station['key']}")
+        else:
+            winds = hourly_series(weather, "windspeed_10m")
+        quakes = quake_hours(store, station["lat"], station["lon"]) if store is not None else None
+        rows_by_station[station["key"]] = station_rows(
+            station, waves, winds, quakes, now - TRENDS_USGS_WINDOW, now
+        )
+
+    hours, days = await asyncio.to_thread(store_trends, rows_by_station)
+
+    stats = collector_stats
+    stats["runs"] += 1
+    stats["last_run_at"] = datetime.utcnow().isoformat() + "Z"
+    stats["last_duration_s"] = round(time.perf_counter() - start, 3)
+    stats["last_hours_written"] = hours
+    stats["last_days_rolled_up"] = days
+    stats["failed_sources"] = failed
+
+async def trend_collector_loop(interval=TRENDS_INTERVAL):
+    while True:
+        try:
+            await collect_trends()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            collector_stats["errors"] += 1
+            print(f"Trend collection failed: {e!r}")
+        await asyncio.sleep(interval)
+
+_task = None
+
+def start_trend_collector():
+    global _task
+    if TRENDS_ENABLED and _task is None:
+        _task = asyncio.create_task(trend_collector_loop())
+    return _task
+
+async def stop_trend_collector():
+    global _task
+    if _task is not None:
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+        _task = None
+
+# --- Reading ---
+
+def downsample(labels, series, max_points=TRENDS_MAX_POINTS):
+    """
+    Folds consecutive points into buckets (max per bucket: these are risk
+    peaks) so a long range stays within max_points. Returns
+    (labels, series, bucket_size); each label is its bucket's first.
+    """
+    size = max(1, math.ceil(len(labels) / max_points))
+    if size == 1:
+        return labels, series, 1
+    out = {}
+    for name, values in series.items():
+        folded = []
+        for i in range(0, len(values), size):
+            present = [v for v in values[i:i + size] if v is not None]
+            folded.append(max(present) if present else None)
+        out[name] = folded
+    return labels[::size], out, size
+
+def trend_series(rows, first, count, step, label_format):
+    """
+    rows: (time, wave, wind, quake) sorted by time. Lays them on a regular
+    grid of `count` slots from `first` every `step` (missing slots -> None),
+    then downsamples.
+    """
+    by_time = {r[0]: r for r in rows}
+    slots = [first + step * i for i in range(count)]
+    series = {"flood_risk": [], "storm_risk": [], "tsunami_risk": []}
+    for slot in slots:
+        row = by_time.get(slot)
+        series["flood_risk"].append(row[1] if row else None)
+        series["storm_risk"].append(row[2] if row else None)
+        series["tsunami_risk"].append(row[3] if row else None)
+    labels, series, bucket = downsample([s.strftime(label_format) for s in slots], series)
+    return {"dates": labels, "bucket": bucket, **series}
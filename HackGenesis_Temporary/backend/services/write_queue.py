@@ -0,0 +1,134 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from ..database import SessionLocal
+
+# Max operations folded into one commit
+WRITE_BATCH_MAX = int(os.environ.get("WRITE_BATCH_MAX", "200"))
+# How long the writer waits for more operations once it has one (seconds)
+WRITE_BATCH_WINDOW = float(os.environ.get("WRITE_BATCH_WINDOW", "0.002"))
+# How long a request waits for its write before giving up (seconds)
+WRITE_TIMEOUT = float(os.environ.get("WRITE_TIMEOUT", "10"))
+
+_STOP = object()
+
+class WriteQueue:
+    """
+    Single writer thread doing group commits.
+    Small writes (comments, likes, status changes) are queued as functions
+    `op(session) -> result`; the writer runs a batch of them in one
+    transaction and commits once. If an op raises (e.g. a 404), the batch is
+    replayed with a SAVEPOINT per op so only the failing one is rolled back;
+    ops must therefore be safe to run again after a rollback.
+    With one writer there is no lock contention between request threads.
+    """
+
+    def __init__(self, batch_max=WRITE_BATCH_MAX, window=WRITE_BATCH_WINDOW, session_factory=SessionLocal):
+        self.batch_max = batch_max
+        self.window = window
+        self.session_factory = session_factory
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.stats = {"ops": 0, "commits": 0, "failed_ops": 0, "max_batch": 0}
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+                self._thread.start()
+
+    def stop(self, timeout=5):
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(_STOP)
+            thread.join(timeout)
+
+    def submit(self, op):
+        """Queues op(session); returns a Future with its result (set after commit)."""
+        self.start()
+        future = Future()
+        self._queue.put((op, future))
+        return future
+
+    def run(self, op, timeout=WRITE_TIMEOUT):
+        """Blocking submit for sync endpoints; re-raises whatever op raised."""
+        return self.submit(op).result(timeout)
+
+    def _next_batch(self):
+        first = self._queue.get()
+        if first is _STOP:
+            return None
+        batch = [first]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.batch_max:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                # Finish this batch, then exit
+                self._queue.put(_STOP)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            self._commit_batch(batch)
+
+    def _apply(self, db, batch, savepoints):
+        results = []
+        for op, future in batch:
+            if savepoints:
+                try:
+                    with db.begin_nested():
+                        result = op(db)
+                    results.append((future, result, None))
+                except Exception as e:
+                    results.append((future, None, e))
+            else:
+                results.append((future, op(db), None))
+        db.commit()
+        return results
+
+    def _commit_batch(self, batch):
+        batch = [(op, future) for op, future in batch if future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        db = self.session_factory()
+        try:
+            try:
+                # Fast path: the whole batch in one plain transaction
+                results = self._apply(db, batch, savepoints=False)
+            except Exception:
+                # Some op failed: redo the batch with a SAVEPOINT per op so
+                # only the failing ones are rolled back
+                db.rollback()
+                results = self._apply(db, batch, savepoints=True)
+        except Exception as e:
+            # The commit itself failed: every op in the batch failed with it
+            db.rollback()
+            print(f"Write batch of {len(batch)} failed: {e!r}")
+            results = [(future, None, e) for _, future in batch]
+        finally:
+            db.close()
+
+        self.stats["commits"] += 1
+        self.stats["ops"] += len(results)
+        self.stats["max_batch"] = max(self.stats["max_batch"], len(results))
+        for future, result, error in results:
+            if error is not None:
+                self.stats["failed_ops"] += 1
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+write_queue = WriteQueue()
@@ -1,7 +1,10 @@
+CPI_BY_TYPE = {
+    "Pollution": 90,
+    "Cyclone": 40,
+    "Weather": 50,
+    "Illegal": 80
+}
+DEFAULT_CPI = 30
+
 def estimate_cpi(alert_type: str):
-    return {
-        "Pollution": 90,
-        "Cyclone": 40,
-        "Weather": 50,
-        "Illegal": 80
-    }.get(alert_type, 30)
+    return CPI_BY_TYPE.get(alert_type, DEFAULT_CPI)
@@ -1,7 +1,17 @@
 import math
+import numpy as np
+
+R_EARTH_KM = 6371  # Earth radius in km
+
+# Size of the coarse spatial grid used to index alerts (degrees).
+# 1 deg is ~111 km of latitude, so a typical 50 km radius touches at most 4 cells.
+GRID_CELL_DEG = 1.0
+
+# Past this many cells the IN (...) list stops paying off; fall back to a plain bbox scan
+MAX_GRID_CELLS = 400
 
 def haversine(lat1, lon1, lat2, lon2):
-    R = 6371  # Earth radius in km
+    R = R_EARTH_KM
     dlat = math.radians(lat2 - lat1)
     dlon = math.radians(lon2 - lon1)
 
@@ -13,3 +23,68 @@ def haversine(lat1, lon1, lat2, lon2):
     )
     c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
     return R * c
+
+def haversine_np(lat1, lon1, lats, lons):
+    """
+    Vectorized haversine from one point to arrays of points (km).
+    """
+    lat1 = np.radians(lat1)
+    lats = np.radians(lats)
+    dlat = lats - lat1
+    dlon = np.radians(lons) - np.radians(lon1)
+
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lats) * np.sin(dlon / 2) ** 2
+    return 2 * R_EARTH_KM * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+def grid_cell(lat, lon, cell_deg=GRID_CELL_DEG):
+    """
+    Maps a coordinate to an integer cell id on a fixed lat/lon grid.
+    Row-major: cell = row * cols + col, cols = 360 / cell_deg.
+    """
+    if lat is None or lon is None:
+        return None
+    cols = int(360 / cell_deg)
+    row = int(math.floor((min(max(lat, -90.0), 89.999999) + 90) / cell_deg))
+    col = int(math.floor(((lon + 180) % 360) / cell_deg))
+    return row * cols + col
+
+def bounding_box(lat, lon, radius_km):
+    """
+    Returns (min_lat, max_lat, min_lon, max_lon) enclosing the circle.
+    Longitude span widens with latitude; near the poles or across the
+    antimeridian we give up and return the full longitude range.
+    """
+    dlat = math.degrees(radius_km / R_EARTH_KM)
+    min_lat = max(-90.0, lat - dlat)
+    max_lat = min(90.0, lat + dlat)
+
+    cos_lat = math.cos(math.radians(max(abs(min_lat), abs(max_lat))))
+    if cos_lat < 1e-6:
+        return min_lat, max_lat, -180.0, 180.0
+
+    dlon = math.degrees(radius_km / (R_EARTH_KM * cos_lat))
+    min_lon = lon - dlon
+    max_lon = lon + dlon
+    if dlon >= 180 or min_lon < -180 or max_lon > 180:
+        return min_lat, max_lat, -180.0, 180.0
+    return min_lat, max_lat, min_lon, max_lon
+
+def cells_in_box(min_lat, max_lat, min_lon, max_lon, cell_deg=GRID_CELL_DEG):
+    """
+    Lists every grid cell overlapping the box, or None if there are too
+    many to be worth an IN (...) lookup.
+    """
+    cols = int(360 / cell_deg)
+    row_lo = int(math.floor((min_lat + 90) / cell_deg))
+    row_hi = int(math.floor((min(max_lat, 89.999999) + 90) / cell_deg))
+    col_lo = int(math.floor((min_lon + 180) / cell_deg))
+    col_hi = int(math.floor((min(max_lon, 179.999999) + 180) / cell_deg))
+
+    if (row_hi - row_lo + 1) * (col_hi - col_lo + 1) > MAX_GRID_CELLS:
+        return None
+
+    return [
+        row * cols + col
+        for row in range(row_lo, row_hi + 1)
+        for col in range(col_lo, col_hi + 1)
+    ]
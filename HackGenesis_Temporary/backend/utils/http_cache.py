@@ -0,0 +1,14 @@
+from fastapi import Response
+
+def etag_matches(request, etag):
+    if_none_match = request.headers.get("if-none-match", "")
+    return if_none_match.strip() == "*" or etag in [t.strip() for t in if_none_match.split(",")]
+
+def cached_response(request, body: bytes, media_type, etag, cache_control="no-cache", headers=None):
+    """
+    Serves pre-encoded bytes with an ETag, or a bodyless 304 if the client already has them.
+    """
+    headers = {"ETag": etag, "Cache-Control": cache_control, **(headers or {})}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type=media_type, headers=headers)
@@ -0,0 +1,42 @@
+import json
+
+# Flush once this many bytes are buffered (the first row always goes out immediately)
+FLUSH_BYTES = 16 * 1024
+
+def _default(o):
+    if hasattr(o, "isoformat"):
+        return o.isoformat()
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+def stream_json_object(sections, trailer=None):
+    """
+    Incrementally encodes {"key": [rows...], ..., **trailer} as it iterates.
+    `sections` is a list of (key, iterable_of_dicts); `trailer` may be a dict or
+    a zero-argument callable evaluated after all rows are sent (e.g. has_more flags).
+    """
+    buf = ["{"]
+    size = 1
+    first_key = True
+    first_flushed = False
+
+    for key, rows in sections:
+        buf.append(("" if first_key else ",") + json.dumps(key) + ":[")
+        first_key = False
+        first_row = True
+        for row in rows:
+            chunk = ("" if first_row else ",") + json.dumps(row, default=_default)
+            first_row = False
+            buf.append(chunk)
+            size += len(chunk)
+            if not first_flushed or size >= FLUSH_BYTES:
+                yield "".join(buf)
+                buf, size = [], 0
+                first_flushed = True
+        buf.append("]")
+
+    extra = trailer() if callable(trailer) else (trailer or {})
+    for key, value in extra.items():
+        buf.append(("" if first_key else ",") + json.dumps(key) + ":" + json.dumps(value, default=_default))
+        first_key = False
+    buf.append("}")
+    yield "".join(buf)
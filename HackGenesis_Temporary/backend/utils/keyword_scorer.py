@@ -0,0 +1,153 @@
+import json
+import os
+import re
+from bisect import bisect_right
+from itertools import accumulate
+
+# Optional JSON file overriding the built-in lexicons, e.g.
+# {"risk": {"tsunami": 40, ...}, "aid_keywords": {...}}  (see ai_logic for the names)
+LEXICON_FILE = os.environ.get("KEYWORD_LEXICON_FILE")
+
+# Joins batch texts; never part of a word, so it also acts as a word boundary
+_BATCH_SEP = "\n"
+
+def load_lexicon(name, default):
+    """
+    Returns the `name` lexicon from LEXICON_FILE if it defines one, else `default`.
+    """
+    if not LEXICON_FILE:
+        return default
+    try:
+        with open(LEXICON_FILE) as f:
+            return json.load(f).get(name, default)
+    except Exception as e:
+        print(f"Could not load keyword lexicon {name!r} from {LEXICON_FILE}: {e}")
+        return default
+
+class TextBatch:
+    """
+    Texts lowercased and joined once, so several scorers can search the same
+    batch (e.g. the risk and shore lexicons over the same reports).
+    """
+
+    def __init__(self, texts):
+        lowered = [(t or "").lower() for t in texts]
+        self.size = len(lowered)
+        self.starts = list(accumulate((len(t) + len(_BATCH_SEP) for t in lowered), initial=0))
+        self.joined = _BATCH_SEP.join(lowered)
+
+def _batch(texts):
+    return texts if isinstance(texts, TextBatch) else TextBatch(texts)
+
+# What may follow a keyword inside the same word ("flooding", "stormy",
+# "beaches"), by the keyword's last letter. Keywords ending in e/y are
+# searched without it, so "rescuing" and "supplies" are found too.
+_ENDING = r"(?![^\W_])"
+_SUFFIXES = {
+    "e": re.compile(r"(?:e|es|ed|ing)" + _ENDING),
+    "y": re.compile(r"(?:y|ies|ied)" + _ENDING),
+    None: re.compile(r"(?:s|es|ed|ing|y)?" + _ENDING),
+}
+_EXACT = re.compile(_ENDING)
+
+class KeywordScorer:
+    """
+    Weighted keyword lexicon, prepared once at import.
+    - Whole words, with common inflections: "flood" matches "floods",
+      "flooded", "flooding"; "storm" matches "stormy". It doesn't match
+      inside another word ("stidewalk", "floodlights", "wasteland").
+    - Case-insensitive; each keyword counts once per text, however often it appears.
+    Candidates are found with str.find (C speed) and only actual occurrences
+    run the boundary check. The *_many methods search a whole batch joined
+    into one string, one scan per keyword for the whole batch.
+    """
+
+    def __init__(self, lexicon, inflections=True):
+        self.keywords = [kw.lower() for kw in lexicon]
+        self.weights = list(lexicon.values())
+        # (search stem, check for what follows it) per keyword
+        self._stems = []
+        for kw in self.keywords:
+            if not inflections:
+                self._stems.append((kw, _EXACT))
+            elif kw[-1] in "ey":
+                self._stems.append((kw[:-1], _SUFFIXES[kw[-1]]))
+            else:
+                self._stems.append((kw, _SUFFIXES[None]))
+
+    @staticmethod
+    def _find(text, stem, suffix, start=0):
+        """Position of the first whole-word occurrence of stem + suffix in text[start:], or -1."""
+        find = text.find
+        pos = find(stem, start)
+        while pos != -1:
+            if (pos == 0 or not text[pos - 1].isalnum()) and suffix.match(text, pos + len(stem)):
+                return pos
+            pos = find(stem, pos + 1)
+        return -1
+
+    def _hits(self, text):
+        lowered = (text or "").lower()
+        find = self._find
+        return [i for i, (stem, suffix) in enumerate(self._stems)
+                if stem in lowered and find(lowered, stem, suffix) != -1]
+
+    def _batch_hits(self, batch):
+        """(keyword index, text index) for every keyword present in every text."""
+        # _find inlined: this loop runs once per occurrence in the whole batch
+        joined, starts = batch.joined, batch.starts
+        find = joined.find
+        for i, (stem, suffix) in enumerate(self._stems):
+            size = len(stem)
+            whole = stem == self.keywords[i]
+            pos = find(stem)
+            while pos != -1:
+                end = pos + size
+                if (pos == 0 or not joined[pos - 1].isalnum()) and (
+                        (whole and not joined[end:end + 1].isalnum()) or suffix.match(joined, end)):
+                    n = bisect_right(starts, pos) - 1
+                    yield i, n
+                    # One hit per text is enough: resume at the next text
+                    pos = find(stem, starts[n + 1])
+                else:
+                    pos = find(stem, pos + 1)
+
+    def matches(self, text):
+        return {self.keywords[i] for i in self._hits(text)}
+
+    def score(self, text):
+        """Sum of the weights of every distinct keyword present."""
+        return sum(self.weights[i] for i in self._hits(text))
+
+    def max_weight(self, text):
+        """Weight of the strongest keyword present (0 if none)."""
+        return max((self.weights[i] for i in self._hits(text)), default=0)
+
+    def any(self, text):
+        return bool(self._hits(text))
+
+    # Batch versions: texts is a list of strings or a TextBatch
+
+    def score_many(self, texts):
+        batch = _batch(texts)
+        scores = [0] * batch.size
+        weights = self.weights
+        for i, n in self._batch_hits(batch):
+            scores[n] += weights[i]
+        return scores
+
+    def max_weight_many(self, texts):
+        batch = _batch(texts)
+        best = [0] * batch.size
+        weights = self.weights
+        for i, n in self._batch_hits(batch):
+            if weights[i] > best[n]:
+                best[n] = weights[i]
+        return best
+
+    def any_many(self, texts):
+        batch = _batch(texts)
+        found = [False] * batch.size
+        for _, n in self._batch_hits(batch):
+            found[n] = True
+        return found
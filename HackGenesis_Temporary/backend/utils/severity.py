@@ -1,6 +1,9 @@
+SEVERITY_WEIGHTS = {
+    "High": 100,
+    "Medium": 60,
+    "Low": 30
+}
+DEFAULT_SEVERITY_WEIGHT = 20
+
 def severity_weight(severity: str):
-    return {
-        "High": 100,
-        "Medium": 60,
-        "Low": 30
-    }.get(severity, 20)
+    return SEVERITY_WEIGHTS.get(severity, DEFAULT_SEVERITY_WEIGHT)
@@ -0,0 +1,110 @@
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from backend.database import Base, apply_sqlite_pragmas
+from backend.models import User, Post, Comment
+from backend.services.write_queue import WriteQueue
+
+THREADS = 32
+WRITES_PER_THREAD = 100
+
+def make_engine(path, tuned):
+    engine = create_engine(
+        f"sqlite:///{path}",
+        connect_args={"check_same_thread": False, "timeout": 30},
+        pool_size=THREADS, max_overflow=0,
+    )
+    if tuned:
+        event.listen(engine, "connect", apply_sqlite_pragmas)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+    db = Session()
+    db.add(User(id=1, name="bench", email="bench@example.com", hashed_password="x"))
+    db.add(Post(id="p_bench", user_id=1, caption="c", description="d"))
+    db.commit()
+    db.close()
+    return engine, Session
+
+def comment_op(i):
+    def op(db):
+        db.add(Comment(text=f"comment {i}", post_id="p_bench"))
+    return op
+
+def run_threads(write_one):
+    latencies = []
+    lock = threading.Lock()
+
+    def worker(t):
+        local = []
+        for n in range(WRITES_PER_THREAD):
+            start = time.perf_counter()
+            write_one(t * WRITES_PER_THREAD + n)
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=worker, args=(t,)) for t in range(THREADS)]
+    start = time.perf_counter()
+    for th in threads:
+        th.start()
+    for th in threads:
+        th.join()
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return elapsed, latencies
+
+def report(label, elapsed, latencies):
+    total = THREADS * WRITES_PER_THREAD
+    p50 = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[int(len(latencies) * 0.99)] * 1000
+    print(f"{label:<38} {total / elapsed:>9,.0f} writes/s   p50 {p50:6.1f} ms   p99 {p99:7.1f} ms")
+
+def bench_commit_per_request(Session):
+    def write_one(i):
+        db = Session()
+        try:
+            comment_op(i)(db)
+            db.commit()
+        finally:
+            db.close()
+    return run_threads(write_one)
+
+def bench_write_queue(Session):
+    queue = WriteQueue(session_factory=Session)
+    try:
+        return run_threads(lambda i: queue.run(comment_op(i))), queue.stats
+    finally:
+        queue.stop()
+
+def main():
+    """
+    Concurrent small writes (comments) from THREADS request threads:
+    default SQLite settings vs WAL/pragmas vs WAL + group-commit write queue.
+    """
+    global THREADS, WRITES_PER_THREAD
+    if len(sys.argv) > 1:
+        THREADS = int(sys.argv[1])
+    if len(sys.argv) > 2:
+        WRITES_PER_THREAD = int(sys.argv[2])
+    print(f"{THREADS} threads x {WRITES_PER_THREAD} writes\n")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        _, Session = make_engine(os.path.join(tmp, "default.db"), tuned=False)
+        report("rollback journal, commit per request", *bench_commit_per_request(Session))
+
+        _, Session = make_engine(os.path.join(tmp, "wal.db"), tuned=True)
+        report("WAL + pragmas, commit per request", *bench_commit_per_request(Session))
+
+        _, Session = make_engine(os.path.join(tmp, "wal_queue.db"), tuned=True)
+        (elapsed, latencies), stats = bench_write_queue(Session)
+        report("WAL + pragmas, group-commit queue", elapsed, latencies)
+        print(f"  {stats['commits']} commits for {stats['ops']} writes (largest batch {stats['max_batch']})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+import random
+import time
+
+from backend.ai_logic import (
+    calculate_risk_score, calculate_risk_scores, calculate_aid_priority, calculate_aid_priorities
+)
+
+# Previous per-keyword substring implementations, kept here for comparison
+def legacy_risk_score(text, location):
+    text_lower = text.lower()
+    score = 0
+    for kw in ["tsunami", "cyclone", "flood", "drowning", "sos", "emergency", "earthquake"]:
+        if kw in text_lower:
+            score += 40
+    for kw in ["storm", "oil spill", "pollution", "hazard", "blocked", "bridge collapse"]:
+        if kw in text_lower:
+            score += 20
+    for kw in ["algal bloom", "waste", "trash", "erosion", "beach", "tide"]:
+        if kw in text_lower:
+            score += 10
+    if "beach" in text_lower or "shore" in text_lower:
+        score += 5
+    return min(score, 100)
+
+def legacy_aid_priority(needs, description):
+    text_lower = (needs + " " + description).lower()
+    score = 0
+    if "medical" in needs.lower() or "rescue" in needs.lower():
+        score += 50
+    elif "food" in needs.lower() or "water" in needs.lower():
+        score += 30
+    elif "shelter" in needs.lower():
+        score += 20
+    for kw in ["rescue", "trapped", "bleeding", "medical", "drowning", "ambulance", "stuck", "baby", "elderly", "pregnant", "critical"]:
+        if kw in text_lower:
+            score += 15
+    for kw in ["food", "water", "shelter", "medicine", "fever", "electricity", "supply", "hungry", "sick"]:
+        if kw in text_lower:
+            score += 10
+    if len(description) > 20:
+        score += 5
+    score = min(score, 100)
+    return ("High" if score >= 70 else "Medium" if score >= 40 else "Low"), score
+
+# Filler words without lexicon hits; each text gets 0-3 real keywords mixed in
+WORDS = ("the level near road is rising fast after last night and people are waiting "
+         "on the street a tree fell across the way we saw boats along the coast with lots of "
+         "debris please send help my family needs support there is no power since morning").split()
+# Base forms, inflected forms (true matches) and words that only contain a keyword (false hits)
+KEYWORDS = ["tsunami", "flood", "cyclone", "tide", "erosion", "trapped", "rescue", "sick", "hungry",
+            "beach", "storm", "water", "food",
+            "flooding", "flooded", "stormy", "tides", "beaches", "rescued", "rescuing", "supplies",
+            "stidewalk", "floodlight"]
+
+def make_text(n_words):
+    words = random.choices(WORDS, k=n_words)
+    for _ in range(random.randint(0, 3)):
+        words.insert(random.randrange(len(words) + 1), random.choice(KEYWORDS))
+    return " ".join(words)
+
+def bench(label, fn, n):
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<28} {elapsed * 1000:8.1f} ms  {n / elapsed:>12,.0f} texts/s")
+    return elapsed
+
+def run():
+    """
+    Compares the compiled keyword scorer with the old substring scans on
+    synthetic report texts of different lengths.
+    """
+    random.seed(42)
+    false_hits = ["Stidewalk is wet", "Wasteland photos", "Apostrophes everywhere", "Floodlights are off"]
+    print("Keyword inside another word, no longer a hit (old -> new):")
+    for t in false_hits:
+        print(f"  {t!r}: {legacy_risk_score(t, '')} -> {calculate_risk_score(t, '')}")
+    inflected = ["Severe flooding near the beach", "Houses flooded", "Stormy night, high tides",
+                 "Beaches closed", "Oil spills reported"]
+    print("Inflected forms, still hits (old -> new):")
+    for t in inflected:
+        print(f"  {t!r}: {legacy_risk_score(t, '')} -> {calculate_risk_score(t, '')}")
+    for needs, t in [("Rescue", "Rescuing two people"), ("Food", "Supplies ran out")]:
+        print(f"  {needs!r}, {t!r}: {legacy_aid_priority(needs, t)[1]} -> {calculate_aid_priority(needs, t)[1]}")
+
+    for n_words in (20, 100, 500):
+        texts = [make_text(n_words) for _ in range(5000)]
+        pairs = [(random.choice(["Food", "Medical", "Shelter", "Water"]), t) for t in texts]
+        print(f"\n5000 texts x {n_words} words")
+        old = bench("risk: legacy substring", lambda: [legacy_risk_score(t, "") for t in texts], len(texts))
+        new = bench("risk: word-boundary batch", lambda: calculate_risk_scores(texts), len(texts))
+        print(f"  relative throughput {old / new:.2f}x")
+        old = bench("aid: legacy substring", lambda: [legacy_aid_priority(n, d) for n, d in pairs], len(pairs))
+        new = bench("aid: word-boundary batch", lambda: calculate_aid_priorities(pairs), len(pairs))
+        print(f"  relative throughput {old / new:.2f}x")
+
+        assert calculate_risk_scores(texts) == [calculate_risk_score(t, "") for t in texts]
+        assert calculate_aid_priorities(pairs) == [calculate_aid_priority(n, d) for n, d in pairs]
+        old_scores = [legacy_risk_score(t, "") for t in texts]
+        new_scores = calculate_risk_scores(texts)
+        lower = sum(n < o for o, n in zip(old_scores, new_scores))
+        higher = sum(n > o for o, n in zip(old_scores, new_scores))
+        print(f"  risk scores vs legacy: {lower} lower (false hits dropped), "
+              f"{higher} higher (forms legacy missed), of {len(texts)}")
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,85 @@
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from backend.migrations import migrate
+from backend.services.search import create_search_indexes, search
+
+ROWS = 1_000_000
+QUERIES = ["flood", "oil spill", "chennai", "storm surge marina", "stranded fam", "tsunami warning"]
+REPEAT = 20
+
+WORDS = (
+    "water rising road blocked near the beach boats damaged fishermen missing waves high wind "
+    "trees fallen power cut shore erosion garbage plastic dead fish smell harbour jetty family "
+    "stranded rescue needed food medicine shelter rain heavy night morning village coast"
+).split()
+HAZARDS = ["flood", "flooding", "oil spill", "storm surge", "cyclone", "tsunami warning", "high tide", "algal bloom"]
+PLACES = ["Chennai", "Mumbai", "Kochi", "Puri", "Vizag", "Goa", "Mangalore", "Kolkata", "Marina beach", "Juhu"]
+
+def fill(path, n):
+    """Bulk-loads n posts with the triggers' work deferred to one index rebuild (much faster)."""
+    engine = create_engine(f"sqlite:///{path}")
+    migrate(engine)
+    rnd = random.Random(26)
+    raw = engine.raw_connection()
+    try:
+        cur = raw.cursor()
+        cur.execute("INSERT INTO users (id, name, email) VALUES (1, 'bench', 'bench@example.com')")
+        cur.execute("DROP TRIGGER posts_fts_ai")
+        batch = []
+        for i in range(n):
+            hazard, place = rnd.choice(HAZARDS), rnd.choice(PLACES)
+            batch.append((
+                f"p_{i}", f"{hazard.title()} at {place}",
+                " ".join(rnd.choices(WORDS, k=20)) + f" {hazard}", place, 1, "Open", 1,
+            ))
+            if len(batch) == 10_000:
+                cur.executemany("INSERT INTO posts (id, caption, description, location, user_id, status, version) "
+                                "VALUES (?, ?, ?, ?, ?, ?, ?)", batch)
+                batch = []
+        if batch:
+            cur.executemany("INSERT INTO posts (id, caption, description, location, user_id, status, version) "
+                            "VALUES (?, ?, ?, ?, ?, ?, ?)", batch)
+        raw.commit()
+    finally:
+        raw.close()
+    engine.dispose()
+    # Put the trigger back and index everything, as migration 5 would
+    engine = create_engine(f"sqlite:///{path}")
+    with engine.begin() as conn:
+        create_search_indexes(conn)
+    engine.dispose()
+
+async def run(path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    async with AsyncSession(engine) as db:
+        print(f"{'query':>20} | {'hits':>5} | {'p50 (ms)':>9} | {'max (ms)':>9}")
+        print("-" * 54)
+        for q in QUERIES:
+            times = []
+            for _ in range(REPEAT):
+                start = time.perf_counter()
+                results, _ = await search(db, q, ["post"], limit=20)
+                times.append((time.perf_counter() - start) * 1000)
+            times.sort()
+            print(f"{q:>20} | {len(results):>5} | {times[len(times) // 2]:>9.1f} | {times[-1]:>9.1f}")
+    await engine.dispose()
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else ROWS
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        start = time.perf_counter()
+        fill(path, n)
+        print(f"Loaded and indexed {n} posts in {time.perf_counter() - start:.1f}s")
+        asyncio.run(run(path))
+
+if __name__ == "__main__":
+    main()
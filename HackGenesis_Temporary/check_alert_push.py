@@ -0,0 +1,375 @@
+"""
+Load checks for alert push.
+
+    python check_alert_push.py [connections]
+
+1. Broker fan-out microbenchmark: 10k subscribers on AlertBroker in this
+   process, consumed straight from their asyncio queues. Measures matching
+   and fan-out only, no sockets.
+2. Live run: a uvicorn server (child process, throwaway SQLite database)
+   holding `connections` real clients, half on GET /alerts/stream (SSE) and
+   half on /ws/alerts. Alerts are committed by the server, so they reach
+   the broker the same way ingestion's do. Measures server memory per
+   connection, tasks, delivery latency over the wire, idle keepalive cost,
+   and the slow-client disconnect path.
+"""
+import asyncio
+import json
+import os
+import random
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+from websockets.asyncio.client import connect as ws_connect
+from websockets.exceptions import ConnectionClosed
+
+from backend.services.alert_push import AlertBroker, CLOSE
+
+SUBSCRIBERS = 10_000
+ALERTS = 1_000
+# Every 100th subscriber never reads, to exercise the drop/disconnect path
+SLOW_EVERY = 100
+
+# Live run
+LIVE_CONNECTIONS = 10_000
+LIVE_ALERTS = 2_000
+LIVE_PORT = 8765
+# Alerts per server-side commit
+LIVE_BATCH = 50
+# Short keepalive so the idle phase sees a few of them
+LIVE_KEEPALIVE = 2
+# Connections opened at once while ramping up
+CONNECT_BATCH = 500
+
+# Subscribers clustered along the Indian coastline like the real user base
+COAST = [(19.07, 72.87), (13.08, 80.27), (15.49, 73.82), (8.52, 76.93), (22.57, 88.36), (17.68, 83.21)]
+
+def random_point(spread):
+    lat, lon = random.choice(COAST)
+    return lat + random.uniform(-spread, spread), lon + random.uniform(-spread, spread)
+
+def raise_fd_limit():
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    return hard
+
+def percentiles(latencies):
+    latencies.sort()
+    if not latencies:
+        return 0, 0
+    return latencies[len(latencies) // 2] * 1000, latencies[int(len(latencies) * 0.99)] * 1000
+
+# --- 1. Broker fan-out microbenchmark ---
+
+async def consumer(sub, received, latencies):
+    while True:
+        message = await sub.queue.get()
+        if message is CLOSE:
+            return
+        received[0] += 1
+        # publish time is embedded in the title for this check
+        latencies.append(time.perf_counter() - float(message.split('"title": "')[1].split('"')[0]))
+
+async def broker_fan_out():
+    """
+    10k in-process subscribers on one event loop, 1k published alerts,
+    1% of subscribers never reading.
+    """
+    random.seed(7)
+    broker = AlertBroker(queue_size=100)
+    received, latencies = [0], []
+
+    start = time.perf_counter()
+    subs, tasks = [], []
+    for i in range(SUBSCRIBERS):
+        lat, lon = random_point(2.0)
+        sub = broker.subscribe(lat, lon, random.choice([25, 50, 100, 250]))
+        subs.append(sub)
+        if i % SLOW_EVERY:
+            tasks.append(asyncio.create_task(consumer(sub, received, latencies)))
+    print(f"Subscribed {SUBSCRIBERS} in {time.perf_counter() - start:.2f}s "
+          f"({len(broker._cells)} cells, {len(broker._wide)} wide)")
+
+    fan_out_time = 0.0
+    for i in range(ALERTS):
+        lat, lon = random_point(3.0)
+        t = time.perf_counter()
+        broker.fan_out([{"id": i, "lat": lat, "lon": lon, "title": repr(t), "severity": "High"}])
+        fan_out_time += time.perf_counter() - t
+        if i % 50 == 0:
+            # Let the consumers drain between bursts
+            await asyncio.sleep(0)
+    await asyncio.sleep(0.1)
+
+    stats = broker.stats
+    p50, p99 = percentiles(latencies)
+    print(f"Published {stats['published']} alerts, delivered {stats['delivered']} messages "
+          f"({stats['delivered'] / max(stats['published'], 1):.0f} per alert)")
+    print(f"Fan-out: {fan_out_time * 1000 / ALERTS:.2f} ms per alert, "
+          f"{stats['delivered'] / fan_out_time:,.0f} deliveries/s")
+    print(f"Delivery latency p50 {p50:.1f} ms, p99 {p99:.1f} ms, consumed {received[0]}")
+    print(f"Dropped {stats['dropped']}, slow subscribers disconnected {stats['disconnected']}, "
+          f"still subscribed {len(broker)}")
+    print(f"Peak RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB")
+
+    for sub in subs:
+        broker.unsubscribe(sub)
+    await asyncio.gather(*tasks)
+    print(f"After unsubscribe: {len(broker)} subscribers, {len(broker._cells)} cells")
+
+# --- 2. Live run: server side ---
+
+def serve(port):
+    """Runs the app with two extra routes the client uses to drive and inspect it."""
+    raise_fd_limit()
+    import uvicorn
+    from fastapi import APIRouter
+    from backend.database import SessionLocal
+    from backend.main import app
+    from backend.models import Alert
+
+    router = APIRouter()
+
+    @router.post("/_check/publish")
+    def publish(count: int, batch: int = LIVE_BATCH):
+        # Same path as ingestion: commit from a worker thread, broker fans out on the loop
+        rnd = random.Random(11)
+        for start in range(0, count, batch):
+            db = SessionLocal()
+            try:
+                for i in range(start, min(start + batch, count)):
+                    lat, lon = random.choice(COAST)
+                    db.add(Alert(
+                        lat=lat + rnd.uniform(-3, 3), lon=lon + rnd.uniform(-3, 3),
+                        location="check", title=repr(time.time()), message="load check " * 10,
+                        severity="High", alert_type="Weather", source="check",
+                    ))
+                db.commit()
+            finally:
+                db.close()
+        return {"published": count}
+
+    @router.get("/_check/tasks")
+    async def tasks():
+        return {"tasks": len(asyncio.all_tasks())}
+
+    # Ahead of the static files mounted at "/"
+    app.router.routes[:0] = router.routes
+
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning", backlog=4096)
+
+def rss_mb(pid):
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+def cpu_seconds(pid):
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    # utime + stime, in clock ticks
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+# --- 2. Live run: clients ---
+
+class Client:
+    __slots__ = ("slow", "received", "keepalives", "closed_by_server", "latencies", "ready")
+
+    def __init__(self, slow):
+        self.slow = slow
+        self.received = 0
+        self.keepalives = 0
+        self.closed_by_server = False
+        self.latencies = []
+        self.ready = asyncio.Event()
+
+    def on_message(self, data):
+        self.received += 1
+        self.latencies.append(time.time() - float(json.loads(data)["title"]))
+
+async def sse_client(port, lat, lon, radius_km, client, stop):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    if client.slow:
+        # A phone on a bad link: tiny receive window, and we stop reading
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+    sock.setblocking(False)
+    await asyncio.get_running_loop().sock_connect(sock, ("127.0.0.1", port))
+    reader, writer = await asyncio.open_connection(sock=sock, limit=1024 if client.slow else 2 ** 16)
+    writer.write(f"GET /alerts/stream?lat={lat}&lon={lon}&radius_km={radius_km} HTTP/1.1\r\n"
+                 f"Host: 127.0.0.1\r\nAccept: text/event-stream\r\n\r\n".encode())
+    try:
+        # Chunked body: size lines are skipped, SSE lines are matched by prefix
+        while True:
+            line = await reader.readline()
+            if not line:
+                return
+            if line.startswith(b": subscribed"):
+                client.ready.set()
+                if client.slow:
+                    await stop.wait()
+            elif line.startswith(b": keepalive"):
+                client.keepalives += 1
+            elif line.startswith(b"data: "):
+                client.on_message(line[6:])
+            elif line.startswith(b"event: close"):
+                client.closed_by_server = True
+                return
+    finally:
+        client.ready.set()
+        writer.close()
+
+async def ws_client(port, lat, lon, radius_km, client, stop):
+    url = f"ws://127.0.0.1:{port}/ws/alerts?lat={lat}&lon={lon}&radius_km={radius_km}"
+    # max_queue=1: a client that isn't reading stops the socket reads almost immediately
+    async with ws_connect(url, ping_interval=None, max_queue=1 if client.slow else 16) as ws:
+        # The server subscribes right after accepting; a round trip makes sure it has
+        await ws.send("hello")
+        client.ready.set()
+        if client.slow:
+            await stop.wait()
+        try:
+            async for message in ws:
+                client.on_message(message)
+        except ConnectionClosed:
+            pass
+        client.closed_by_server = ws.close_code == 1013
+
+async def wait_until(predicate, timeout, interval=0.2):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if await predicate():
+            return True
+        await asyncio.sleep(interval)
+    return False
+
+async def live(connections):
+    random.seed(3)
+    tmp = tempfile.TemporaryDirectory()
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{os.path.join(tmp.name, 'check.db')}",
+        "INGEST_ENABLED": "0", "TRENDS_ENABLED": "0", "RETENTION_ENABLED": "0", "HEATMAP_REFRESH_ENABLED": "0",
+        "ALERT_PUSH_KEEPALIVE": str(LIVE_KEEPALIVE),
+    }
+    server = subprocess.Popen([sys.executable, "-W", "ignore", __file__, "--serve", str(LIVE_PORT)], env=env)
+    base = f"http://127.0.0.1:{LIVE_PORT}"
+    clients, conn_tasks = [], []
+    stop = asyncio.Event()
+    try:
+        async with httpx.AsyncClient(base_url=base, timeout=120) as http:
+            async def up():
+                try:
+                    return (await http.get("/alerts/push-stats")).status_code == 200
+                except httpx.TransportError:
+                    return False
+
+            if not await wait_until(up, 60):
+                raise RuntimeError("Server did not start")
+            idle_tasks = (await http.get("/_check/tasks")).json()["tasks"]
+            rss_before = rss_mb(server.pid)
+
+            start = time.perf_counter()
+            for i in range(connections):
+                client = Client(slow=i % SLOW_EVERY == 0)
+                lat, lon = random_point(2.0)
+                # Slow clients watch the whole coast so they fall behind quickly
+                radius = 2000 if client.slow else random.choice([25, 50, 100, 250])
+                kind = sse_client if i % 2 == 0 else ws_client
+                clients.append(client)
+                conn_tasks.append(asyncio.create_task(kind(LIVE_PORT, lat, lon, radius, client, stop)))
+                if len(conn_tasks) % CONNECT_BATCH == 0:
+                    await asyncio.gather(*(c.ready.wait() for c in clients[-CONNECT_BATCH:]))
+            await asyncio.gather(*(c.ready.wait() for c in clients))
+            ramp = time.perf_counter() - start
+            failed = sum(t.done() for t in conn_tasks)
+
+            stats = (await http.get("/alerts/push-stats")).json()
+            held_tasks = (await http.get("/_check/tasks")).json()["tasks"]
+            rss_held = rss_mb(server.pid)
+            print(f"Connected {connections} ({connections - connections // 2} SSE, {connections // 2} WS) "
+                  f"in {ramp:.1f}s, {failed} failed; server sees {stats['subscribers']} subscribers")
+            print(f"Server RSS {rss_before:.0f} -> {rss_held:.0f} MB "
+                  f"({(rss_held - rss_before) * 1024 / connections:.1f} KB per connection), "
+                  f"tasks {idle_tasks} -> {held_tasks}")
+
+            # Idle: only keepalives flow
+            cpu = cpu_seconds(server.pid)
+            keepalives = sum(c.keepalives for c in clients)
+            await asyncio.sleep(LIVE_KEEPALIVE * 2.5)
+            idle_cpu = cpu_seconds(server.pid) - cpu
+            keepalives = sum(c.keepalives for c in clients) - keepalives
+            print(f"Idle {LIVE_KEEPALIVE * 2.5:.0f}s: {keepalives} keepalives received, "
+                  f"server CPU {idle_cpu:.2f}s ({idle_cpu * 1000 / LIVE_KEEPALIVE / 2.5:.0f} ms/s)")
+
+            # Publish through the database
+            cpu = cpu_seconds(server.pid)
+            start = time.perf_counter()
+            await http.post("/_check/publish", params={"count": LIVE_ALERTS})
+            last = [-1]
+
+            async def settled():
+                total = sum(c.received for c in clients if not c.slow)
+                done, last[0] = total == last[0], total
+                return done
+
+            await wait_until(settled, 120, interval=1.0)
+            elapsed = time.perf_counter() - start
+            busy_cpu = cpu_seconds(server.pid) - cpu
+            stats = (await http.get("/alerts/push-stats")).json()
+            fast = [c for c in clients if not c.slow]
+            latencies = [x for c in fast for x in c.latencies]
+            p50, p99 = percentiles(latencies)
+            print(f"Published {LIVE_ALERTS} alerts in {elapsed:.1f}s: broker delivered {stats['delivered']} "
+                  f"({stats['delivered'] / max(stats['published'], 1):.0f} per alert), "
+                  f"server CPU {busy_cpu:.1f}s, peak RSS {rss_mb(server.pid):.0f} MB")
+            print(f"Over the wire: {sum(c.received for c in fast)} messages to readers, "
+                  f"latency p50 {p50:.1f} ms, p99 {p99:.1f} ms")
+
+            # Slow clients start reading: they should find a close at the end of what was buffered
+            stop.set()
+            slow = [c for c in clients if c.slow]
+            start = time.perf_counter()
+            await asyncio.wait([t for t, c in zip(conn_tasks, clients) if c.slow], timeout=120)
+            print(f"Dropped {stats['dropped']}, disconnected {stats['disconnected']}; "
+                  f"{sum(c.closed_by_server for c in slow)}/{len(slow)} slow clients were hung up on "
+                  f"(ALERT_PUSH_MAX_DROPPED) after reading {sum(c.received for c in slow) // max(len(slow), 1)} "
+                  f"buffered messages each ({time.perf_counter() - start:.1f}s)")
+
+            for task in conn_tasks:
+                task.cancel()
+            await asyncio.gather(*conn_tasks, return_exceptions=True)
+
+            async def drained():
+                return (await http.get("/alerts/push-stats")).json()["subscribers"] == 0
+
+            ok = await wait_until(drained, 30)
+            tasks_after = (await http.get("/_check/tasks")).json()["tasks"]
+            print(f"After disconnect: {'no' if ok else 'some'} subscribers left, tasks {tasks_after}")
+    finally:
+        server.terminate()
+        server.wait()
+        tmp.cleanup()
+    print(f"Client peak RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB")
+
+def main():
+    connections = int(sys.argv[1]) if len(sys.argv) > 1 else LIVE_CONNECTIONS
+    limit = raise_fd_limit()
+    if connections + 100 > limit:
+        print(f"Open file limit is {limit}; using {limit - 100} connections")
+        connections = limit - 100
+    print("== Broker fan-out (in process, no sockets) ==")
+    asyncio.run(broker_fan_out())
+    print(f"\n== Live server: {connections} SSE/WebSocket connections ==")
+    asyncio.run(live(connections))
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2 and sys.argv[1] == "--serve":
+        serve(int(sys.argv[2]))
+    else:
+        main()
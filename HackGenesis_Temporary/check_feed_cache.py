@@ -0,0 +1,65 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Local stub standing in for Open-Meteo and USGS
+hits = {"weather": 0, "usgs": 0}
+hits_lock = threading.Lock()
+
+class StubHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        time.sleep(0.2)  # pretend to be a slow upstream
+        if self.path.startswith("/forecast"):
+            kind = "weather"
+            body = {"current_weather": {"windspeed": 65}}
+        else:
+            kind = "usgs"
+            body = {"features": [{
+                "properties": {"mag": 5.1, "place": "Stub Sea"},
+                "geometry": {"coordinates": [72.9, 19.1, 10]}
+            }]}
+        with hits_lock:
+            hits[kind] += 1
+        payload = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+def main(users=1000):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    port = server.server_address[1]
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    os.environ["OPEN_METEO_URL"] = f"http://127.0.0.1:{port}/forecast"
+    os.environ["USGS_FEED_URL"] = f"http://127.0.0.1:{port}/usgs.geojson"
+    from backend.services.live_data import get_current_weather, get_quake_store
+    from backend.services.feed_cache import feed_cache
+
+    async def one_user(lat, lon):
+        weather, store = await asyncio.gather(get_current_weather(lat, lon), get_quake_store())
+        return weather.get("windspeed"), len(store.ids)
+
+    async def run_users():
+        # Everyone is within the same weather cell around Mumbai
+        return await asyncio.gather(*(one_user(19.07, 72.87) for _ in range(users)))
+
+    start = time.perf_counter()
+    results = asyncio.run(run_users())
+    elapsed = time.perf_counter() - start
+
+    print(f"{users} concurrent users served in {elapsed:.2f}s")
+    print(f"Upstream requests: weather={hits['weather']} usgs={hits['usgs']} (uncached would be {2 * users})")
+    print(f"(windspeed, quakes) per user: {set(results)}")
+    print(f"Cache stats: {feed_cache.stats}")
+    server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Checks the models against PostgreSQL.
+
+Always: compiles every table and index for the postgresql dialect.
+With DATABASE_URL pointing at PostgreSQL (a scratch database!), also builds
+the schema there through the migrations and runs a few writes and reads
+through the sync session, the async session, full-text search and the bulk
+SQL the services use, and the LISTEN/NOTIFY path that carries alert push between workers.
+
+    docker run -d -p 5432:5432 -e POSTGRES_PASSWORD=pw postgres:16
+    DATABASE_URL=postgresql+psycopg2://postgres:pw@localhost/postgres INGEST_ENABLED=0 python check_postgres.py
+"""
+import asyncio
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import select, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateIndex, CreateTable
+from backend.database import Base, engine, IS_SQLITE, SQLALCHEMY_DATABASE_URL, AsyncSessionLocal, SessionLocal
+from backend.migrations import LATEST_VERSION, migrate, schema_meta, schema_state
+from backend.models import Alert, AidRequest, ChangeLog, Post, User
+from backend.services.alert_push import alert_broker, start_alert_listener, stop_alert_listener
+from backend.services.change_feed import changed_entities
+from backend.services.search import search
+from backend.services.like_counter import LikeCounter
+
+def compile_ddl():
+    dialect = postgresql.dialect()
+    count = 0
+    for table in Base.metadata.sorted_tables:
+        CreateTable(table).compile(dialect=dialect)
+        for index in table.indexes:
+            CreateIndex(index).compile(dialect=dialect)
+            count += 1
+    print(f"DDL ok: {len(Base.metadata.sorted_tables)} tables, {count} indexes compile for PostgreSQL")
+
+def run_sync():
+    db = SessionLocal()
+    try:
+        user = User(name="pg-check", email="pg-check@example.com", role="user")
+        db.add(user)
+        db.flush()
+        db.add(Post(id="p_pgcheck", user_id=user.id, location="Chennai", caption="check",
+                    description="flooding near the shore", lat=13.08, lon=80.27, risk_score=40))
+        db.add(AidRequest(user_id=user.id, description="water", needs="water", urgency="High",
+                          contact="-", location="Chennai"))
+        db.add(Alert(title="check", message="check", severity="High", location="Chennai",
+                     lat=13.08, lon=80.27, alert_type="Test", source="check"))
+        db.commit()
+        post = db.get(Post, "p_pgcheck")
+        post.status = "Resolved"
+        db.commit()
+        assert post.version == 2, post.version
+        changes = changed_entities(db, 0, 100)
+        assert "p_pgcheck" in changes.get("post", []), changes
+        print("Sync session ok: insert, versioned update, change_log")
+    finally:
+        db.close()
+
+def run_likes():
+    counter = LikeCounter(bind=engine)
+    for _ in range(5):
+        counter.add("p_pgcheck")
+    counter.flush()
+    with engine.connect() as conn:
+        likes = conn.execute(text("SELECT likes FROM posts WHERE id = 'p_pgcheck'")).scalar()
+    assert likes == 5, likes
+    print("Bulk like increments ok")
+
+async def run_async():
+    async with AsyncSessionLocal() as db:
+        post = await db.scalar(select(Post).where(Post.id == "p_pgcheck"))
+        assert post is not None and post.likes == 5
+        log = (await db.scalars(select(ChangeLog).where(ChangeLog.entity_id == "p_pgcheck"))).all()
+        assert len(log) >= 2
+    print("Async session ok")
+
+async def run_search():
+    async with AsyncSessionLocal() as db:
+        results, more = await search(db, "chenn")
+        # One hit per type, interleaved by rank in SEARCH_TYPES order
+        assert [r["type"] for r in results] == ["post", "aid_request"] and not more, results
+        assert "<mark>Chennai</mark>" in results[0]["snippet"], results[0]
+    print("Full-text search ok")
+
+def _write_alert(title, commit):
+    db = SessionLocal()
+    try:
+        db.add(Alert(title=title, message="check", severity="High", location="Chennai",
+                     lat=13.08, lon=80.27, alert_type="Test", source="check"))
+        db.flush()
+        if commit:
+            db.commit()
+        else:
+            db.rollback()
+    finally:
+        db.close()
+
+async def run_push():
+    # The listener is what lets a worker push alerts another worker committed
+    start_alert_listener()
+    sub = alert_broker.subscribe(13.08, 80.27, 50)
+    try:
+        await asyncio.sleep(1)  # LISTEN registered
+        await asyncio.to_thread(_write_alert, "push rolled back", False)
+        await asyncio.to_thread(_write_alert, "push committed", True)
+        message = await asyncio.wait_for(sub.queue.get(), 10)
+        assert '"push committed"' in message and sub.queue.empty(), message
+    finally:
+        alert_broker.unsubscribe(sub)
+        await stop_alert_listener()
+    print("Alert push via LISTEN/NOTIFY ok")
+
+async def run_async_checks():
+    await run_async()
+    await run_search()
+    await run_push()
+
+def main():
+    compile_ddl()
+    if IS_SQLITE:
+        print(f"DATABASE_URL is {SQLALCHEMY_DATABASE_URL}; set it to a PostgreSQL URL for the live checks.")
+        return
+    # Fresh schema every run (this is why it must be a scratch database)
+    Base.metadata.drop_all(bind=engine)
+    schema_meta.drop_all(bind=engine)
+    migrate(engine)
+    assert schema_state(engine) == (LATEST_VERSION, True)
+    print(f"Migrations ok: schema at version {LATEST_VERSION}")
+    run_sync()
+    run_likes()
+    # One loop for both: pooled async connections belong to the loop that opened them
+    asyncio.run(run_async_checks())
+    print("All PostgreSQL checks passed.")
+
+if __name__ == "__main__":
+    main()
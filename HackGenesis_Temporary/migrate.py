@@ -0,0 +1,34 @@
+import argparse
+import os
+import sys
+
+# Ensure backend module can be found
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from backend.database import SQLALCHEMY_DATABASE_URL
+from backend.migrations import LATEST_VERSION, MIGRATIONS, migrate, schema_state
+
+def main():
+    """
+    Applies pending schema migrations (backend/migrations.py) and runs their
+    backfills to completion. Replaces the old fix_* / add_* scripts.
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--status", action="store_true", help="show the schema version and exit")
+    parser.add_argument("--no-backfill", action="store_true", help="schema changes only; backfills run when the app starts")
+    args = parser.parse_args()
+
+    version, backfilled = schema_state()
+    print(f"{SQLALCHEMY_DATABASE_URL}: schema version {version}, code expects {LATEST_VERSION}"
+          + ("" if backfilled or version == 0 else " (backfills pending)"))
+    if args.status:
+        for m in MIGRATIONS:
+            print(f"  {'x' if m.version <= version else ' '} {m.version}: {m.name}")
+        return
+
+    migrate(backfill=not args.no_backfill)
+    version, backfilled = schema_state()
+    print(f"Done. Schema version {version}" + ("" if backfilled else " (backfills pending)"))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+import sqlite3
+import os
+
+from backend.services.blob_store import put_bytes, decode_data_url, blob_path
+from backend.services.image_pipeline import make_variants
+
+DB_PATH = 'sql_app.db'
+BATCH_SIZE = 200
+
+def migrate_images():
+    """
+    Moves inline base64 post images into the blob store and builds their thumbnails.
+    Safe to re-run: only rows without an image_hash are touched.
+    """
+    if not os.path.exists(DB_PATH):
+        print("Database not found, skipping migration.")
+        return
+
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+
+    # image_hash / thumb_hash / medium_hash come from the schema migrations
+    cursor.execute("PRAGMA table_info(posts)")
+    if 'image_hash' not in [info[1] for info in cursor.fetchall()]:
+        print("posts.image_hash is missing, run `python migrate.py` first.")
+        conn.close()
+        return
+
+    moved = failed = 0
+    last_id = ""
+    while True:
+        # Keyset walk so each batch is a short transaction
+        rows = cursor.execute(
+            "SELECT id, image_data FROM posts "
+            "WHERE id > ? AND image_hash IS NULL AND image_data IS NOT NULL AND image_data != '' "
+            "ORDER BY id LIMIT ?",
+            (last_id, BATCH_SIZE)
+        ).fetchall()
+        if not rows:
+            break
+
+        updates = []
+        for post_id, image_data in rows:
+            try:
+                updates.append((put_bytes(decode_data_url(image_data)), post_id))
+            except Exception as e:
+                failed += 1
+                print(f"Skipping post {post_id}: {e}")
+        cursor.executemany("UPDATE posts SET image_hash = ?, image_data = NULL WHERE id = ?", updates)
+        conn.commit()
+
+        moved += len(updates)
+        last_id = rows[-1][0]
+        print(f"Moved {moved} images...")
+
+    print(f"Done. Moved {moved} images, {failed} failed.")
+
+    # Resized variants for every post that has an image but no thumbnail yet
+    resized = 0
+    rows = cursor.execute(
+        "SELECT id, image_hash FROM posts WHERE image_hash IS NOT NULL AND thumb_hash IS NULL"
+    ).fetchall()
+    for post_id, image_hash in rows:
+        try:
+            with open(blob_path(image_hash), "rb") as f:
+                variants = make_variants(f.read())
+        except Exception as e:
+            print(f"Could not resize image for post {post_id}: {e}")
+            continue
+        cursor.execute(
+            "UPDATE posts SET thumb_hash = ?, medium_hash = ? WHERE id = ?",
+            (variants["thumb"], variants["medium"], post_id)
+        )
+        conn.commit()
+        resized += 1
+    print(f"Generated thumbnails for {resized} posts.")
+    if moved:
+        # Give the freed base64 pages back to the filesystem
+        cursor.execute("VACUUM")
+        # VACUUM may renumber posts' rowids, which the search index is keyed on
+        if cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'posts_fts'").fetchone():
+            cursor.execute("INSERT INTO posts_fts(posts_fts) VALUES ('rebuild')")
+            conn.commit()
+    conn.close()
+
+if __name__ == "__main__":
+    migrate_images()
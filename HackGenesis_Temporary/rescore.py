@@ -0,0 +1,194 @@
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+# Ensure backend module can be found
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import text
+from backend.database import engine
+from backend.models import get_ist_time, ChangeLog, lock_change_log
+from backend import ai_logic
+
+STATE_FILE = "rescore_state.json"
+CHUNK_SIZE = 1000
+
+# Per table: change_log entity, columns the scorer needs (keyset on id), UPDATE for changed rows
+TABLES = {
+    "posts": {
+        "entity": "post",
+        "select": "SELECT id, caption, description, location, risk_score FROM posts",
+        "update": (
+            "UPDATE posts SET risk_score = :score, version = COALESCE(version, 1) + 1, "
+            "updated_at = :now WHERE id = :id"
+        ),
+    },
+    "aid_requests": {
+        "entity": "aid_request",
+        "select": "SELECT id, needs, description, urgency, urgency_score FROM aid_requests",
+        "update": (
+            "UPDATE aid_requests SET urgency = :label, urgency_score = :score, "
+            "version = COALESCE(version, 1) + 1, updated_at = :now WHERE id = :id"
+        ),
+    },
+}
+
+def lexicon_fingerprint():
+    """
+    Changes whenever any lexicon changes, so a finished run is redone after tuning.
+    """
+    lexicons = {
+        "risk": ai_logic.RISK_LEXICON,
+        "shore": ai_logic.SHORE_WORDS,
+        "shore_bonus": ai_logic.SHORE_BONUS,
+        "aid_needs": ai_logic.AID_NEEDS_LEXICON,
+        "aid_keywords": ai_logic.AID_KEYWORD_LEXICON,
+    }
+    return hashlib.sha256(json.dumps(lexicons, sort_keys=True).encode()).hexdigest()[:16]
+
+def load_state(path, fingerprint):
+    if os.path.exists(path):
+        with open(path) as f:
+            state = json.load(f)
+        if state.get("fingerprint") == fingerprint:
+            return state
+        print("Lexicon changed since the last run, starting over.")
+    return {"fingerprint": fingerprint, "last_id": {}, "done": []}
+
+def save_state(path, state):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp, path)
+
+# --- Scoring (runs in worker processes; must be top-level to pickle) ---
+
+def score_posts(rows):
+    """rows: [(id, caption, description, location, old_score)] -> [(id, score, None)] for changed rows"""
+    scores = ai_logic.calculate_risk_scores(f"{r[1] or ''} {r[2] or ''}" for r in rows)
+    return [(r[0], s, None) for r, s in zip(rows, scores) if s != r[4]]
+
+def score_aid_requests(rows):
+    """rows: [(id, needs, description, old_label, old_score)] -> [(id, score, label)] for changed rows"""
+    results = ai_logic.calculate_aid_priorities([(r[1], r[2]) for r in rows])
+    return [(r[0], score, label) for r, (label, score) in zip(rows, results) if (label, score) != (r[3], r[4])]
+
+SCORERS = {"posts": score_posts, "aid_requests": score_aid_requests}
+
+# --- Reading / writing ---
+
+def read_chunks(table, after, chunk_size):
+    """
+    Keyset-paged read, each page a short read transaction.
+    (A single open cursor would hold SQLite's read lock and block our own commits.)
+    """
+    select = TABLES[table]["select"]
+    first = text(f"{select} ORDER BY id LIMIT :limit")
+    rest = text(f"{select} WHERE id > :after ORDER BY id LIMIT :limit")
+    while True:
+        with engine.connect() as conn:
+            sql = first if after is None else rest
+            rows = [tuple(r) for r in conn.execute(sql, {"after": after, "limit": chunk_size})]
+        if not rows:
+            return
+        yield rows
+        after = rows[-1][0]
+
+def write_changes(table, changes):
+    """
+    One transaction per chunk: executemany UPDATE plus the change_log rows the
+    dashboard delta feed needs (bulk SQL skips the ORM events that add them).
+    """
+    if not changes:
+        return
+    now = get_ist_time()
+    entity = TABLES[table]["entity"]
+    with engine.begin() as conn:
+        lock_change_log(conn)
+        conn.execute(text(TABLES[table]["update"]), [
+            {"id": row_id, "score": score, "label": label, "now": now} for row_id, score, label in changes
+        ])
+        conn.execute(ChangeLog.__table__.insert(), [
+            {"entity": entity, "entity_id": str(row_id), "op": "update", "changed_at": now}
+            for row_id, _, _ in changes
+        ])
+
+def rescore_table(table, state, state_path, pool, workers, chunk_size, dry_run):
+    if table in state["done"]:
+        print(f"{table}: already re-scored with this lexicon, skipping (use --restart to force).")
+        return
+    after = state["last_id"].get(table)
+    if after is not None:
+        print(f"{table}: resuming after id {after!r}")
+
+    scorer = SCORERS[table]
+    scanned = changed = 0
+    start = time.perf_counter()
+    # Bounded look-ahead: workers score the next chunks while this one is written
+    pending = deque()
+    max_pending = workers * 2 if pool else 1
+
+    def drain_one():
+        nonlocal scanned, changed
+        rows, result = pending.popleft()
+        changes = result.result() if pool else result
+        if not dry_run:
+            write_changes(table, changes)
+            state["last_id"][table] = rows[-1][0]
+            save_state(state_path, state)
+        scanned += len(rows)
+        changed += len(changes)
+        elapsed = time.perf_counter() - start
+        print(f"{table}: {scanned} rows scanned, {changed} changed, {scanned / elapsed:,.0f} rows/s")
+
+    for rows in read_chunks(table, after, chunk_size):
+        pending.append((rows, pool.submit(scorer, rows) if pool else scorer(rows)))
+        if len(pending) >= max_pending:
+            drain_one()
+    while pending:
+        drain_one()
+
+    elapsed = time.perf_counter() - start
+    rate = scanned / elapsed if elapsed > 0 else 0
+    print(f"{table}: done. {scanned} rows in {elapsed:.2f}s ({rate:,.0f} rows/s), {changed} updated.")
+    if not dry_run:
+        state["done"].append(table)
+        save_state(state_path, state)
+
+def main():
+    """
+    Re-computes posts.risk_score and aid_requests.urgency/urgency_score with the
+    current keyword lexicons (see ai_logic). Resumable: progress is checkpointed
+    per chunk, so an interrupted run continues where it stopped.
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("tables", nargs="*", help=f"any of {', '.join(TABLES)} (default: all)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="scoring processes (0 = score in this process)")
+    parser.add_argument("--state", default=STATE_FILE)
+    parser.add_argument("--restart", action="store_true", help="ignore saved progress")
+    parser.add_argument("--dry-run", action="store_true", help="count changes without writing")
+    args = parser.parse_args()
+    unknown = set(args.tables) - set(TABLES)
+    if unknown:
+        parser.error(f"unknown table(s): {', '.join(sorted(unknown))}")
+
+    fingerprint = lexicon_fingerprint()
+    state = {"fingerprint": fingerprint, "last_id": {}, "done": []} if args.restart else load_state(args.state, fingerprint)
+
+    pool = ProcessPoolExecutor(max_workers=args.workers) if args.workers > 0 else None
+    try:
+        for table in args.tables or TABLES:
+            rescore_table(table, state, args.state, pool, args.workers, args.chunk_size, args.dry_run)
+    finally:
+        if pool:
+            pool.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,12 @@
 from backend.database import SessionLocal, engine, Base
+from backend.migrations import migrate, schema_meta
 from backend.models import User, Post, AidRequest, Alert
 from datetime import datetime
 
 # Recreate tables (reset DB)
 Base.metadata.drop_all(bind=engine)
-Base.metadata.create_all(bind=engine)
+schema_meta.drop_all(bind=engine)
+migrate(engine)
 
 db = SessionLocal()
 